@@ -0,0 +1,94 @@
+"""
+Benchmark de clean_temperature_data: copia por etapa x sem copias.
+
+Compara tres modos sobre o mesmo chunk bruto (ja com os tipos do
+extrator):
+- legacy: cada etapa recebe e devolve uma copia (comportamento antigo)
+- default: clean_temperature_data(df, source) - uma copia rasa
+- inplace: clean_temperature_data(df, source, inplace=True)
+
+Mede tempo e pico de memoria alocada (tracemalloc) de cada modo,
+para as fontes city e state.
+
+Uso:
+    python -m benchmarks.bench_cleaning --rows 1000000
+"""
+
+import argparse
+import logging
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.synthetic import make_city_frame
+from src.models.schema import CLEAN_DTYPES, RAW_DTYPES, apply_dtypes
+from src.transform.cleaners import (
+    add_metadata_columns,
+    clean_temperature_data,
+    clean_text_columns,
+    parse_coordinates_columns,
+    standardize_column_names,
+)
+
+
+def legacy_clean(df: pd.DataFrame, source: str) -> pd.DataFrame:
+    """Encadeamento antigo: uma copia completa por etapa."""
+    df = standardize_column_names(df)
+    if 'dt' in df.columns:
+        df['dt'] = pd.to_datetime(df['dt'], errors='coerce')
+    df = clean_text_columns(df, ['country', 'state', 'city'])
+    df = parse_coordinates_columns(df)
+    df = add_metadata_columns(df, source)
+    return apply_dtypes(df, CLEAN_DTYPES)
+
+
+def make_raw(source: str, rows: int) -> pd.DataFrame:
+    """Chunk bruto sintetico de cidades ou estados."""
+    raw = make_city_frame(rows)
+    if source == 'state':
+        raw = raw.drop(columns=['Latitude', 'Longitude']).rename(columns={'City': 'State'})
+    return apply_dtypes(raw, RAW_DTYPES)
+
+
+MODES = {
+    'legacy': lambda df, source: legacy_clean(df, source),
+    'default': lambda df, source: clean_temperature_data(df, source),
+    'inplace': lambda df, source: clean_temperature_data(df, source, inplace=True),
+}
+
+
+def measure(source: str, rows: int, mode: str):
+    """Retorna (segundos, pico de MB alocados alem do chunk bruto)."""
+    func = MODES[mode]
+
+    raw = make_raw(source, rows)
+    start = time.perf_counter()
+    func(raw, source)
+    seconds = time.perf_counter() - start
+
+    raw = make_raw(source, rows)
+    tracemalloc.start()
+    func(raw, source)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds, peak / (1024 * 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Linhas por chunk")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    for source in ['city', 'state']:
+        print(f"{source} ({args.rows} linhas)")
+        for mode in MODES:
+            seconds, peak_mb = measure(source, args.rows, mode)
+            print(f"  {mode:<8} {seconds:7.3f}s  pico +{peak_mb:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark de leitura do CSV: pd.read_csv x leitor Arrow.
+
+Mede CSVExtractor.extract (sem cache Parquet) com engine='pandas' e
+engine='arrow', lendo o arquivo inteiro e em chunks.
+
+Uso:
+    python -m benchmarks.bench_csv_engines --rows 2000000
+    python -m benchmarks.bench_csv_engines --csv data/raw/GlobalLandTemperaturesByCity.csv
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import make_city_frame
+from src.config import CHUNK_SIZE, CSV_FILES
+from src.extract.csv_extractor import CSVExtractor
+
+
+def _timed(label: str, func) -> float:
+    start = time.perf_counter()
+    rows = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {elapsed:7.2f}s  {rows / elapsed:>12,.0f} linhas/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Linhas sinteticas")
+    parser.add_argument("--csv", help="Usa um CSV real de cidades em vez de dados sinteticos")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.csv:
+            data_dir = Path(args.csv).parent
+        else:
+            data_dir = Path(tmp)
+            make_city_frame(args.rows).to_csv(
+                data_dir / CSV_FILES['city']['filename'], index=False
+            )
+
+        size_mb = (data_dir / CSV_FILES['city']['filename']).stat().st_size / (1024 * 1024)
+        print(f"{size_mb:.0f} MB, {os.cpu_count()} nucleos")
+
+        results = {}
+        for engine in ['pandas', 'arrow']:
+            extractor = CSVExtractor(data_dir, use_cache=False, engine=engine)
+            results[engine] = _timed(
+                f"{engine} inteiro", lambda: len(extractor.extract('city'))
+            )
+            _timed(
+                f"{engine} chunks",
+                lambda: sum(len(c) for c in extractor.extract('city', chunksize=CHUNK_SIZE))
+            )
+
+        print(f"speedup arrow x pandas: {results['pandas'] / results['arrow']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
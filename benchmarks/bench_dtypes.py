@@ -0,0 +1,84 @@
+"""
+Benchmark de memoria: tipos padrao x plano de tipos compactos.
+
+Le o arquivo de cidades, limpa e compara a memoria do DataFrame
+limpo em tres versoes:
+- object: textos como objetos Python e float64 (pandas < 3)
+- str: textos no tipo str do pandas 3 (Arrow) e float64
+- compact: plano de src/models/schema.py (category, float32)
+
+Uso:
+    python -m benchmarks.bench_dtypes --rows 1000000
+    python -m benchmarks.bench_dtypes --csv data/raw/GlobalLandTemperaturesByCity.csv
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import make_city_frame
+from src.config import CSV_FILES
+from src.extract.csv_extractor import CSVExtractor
+from src.transform.cleaners import clean_temperature_data
+from src.utils.memory import frame_memory_mb, memory_report
+
+
+def _widen(df: pd.DataFrame, text_dtype) -> pd.DataFrame:
+    """Desfaz o plano: category -> texto e float32 -> float64."""
+    widened = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            widened[col] = df[col].astype(text_dtype)
+        elif dtype == 'float32':
+            widened[col] = df[col].astype('float64')
+        else:
+            widened[col] = df[col]
+    return pd.DataFrame(widened)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Linhas sinteticas")
+    parser.add_argument("--csv", help="Usa um CSV real de cidades em vez de dados sinteticos")
+    parser.add_argument("--report", action="store_true", help="Mostra a memoria por coluna")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.csv:
+            data_dir = Path(args.csv).parent
+            # O extrator procura o arquivo pelo nome configurado
+            assert Path(args.csv).name == CSV_FILES['city']['filename']
+        else:
+            data_dir = Path(tmp)
+            make_city_frame(args.rows).to_csv(
+                data_dir / CSV_FILES['city']['filename'], index=False
+            )
+
+        extractor = CSVExtractor(data_dir, use_cache=False)
+        start = time.perf_counter()
+        compact = clean_temperature_data(extractor.extract('city'), 'city')
+        elapsed = time.perf_counter() - start
+
+    print(f"{len(compact)} linhas de cidade (extract + clean em {elapsed:.1f}s)")
+
+    results = {
+        'object': frame_memory_mb(_widen(compact, object)),
+        'str': frame_memory_mb(_widen(compact, 'str')),
+        'compact': frame_memory_mb(compact),
+    }
+    for label, mb in results.items():
+        print(f"{label:<8} {mb:10.1f} MB  ({results['object'] / mb:.1f}x menor que object)")
+
+    if args.report:
+        print(memory_report(compact).to_string())
+
+
+if __name__ == "__main__":
+    main()
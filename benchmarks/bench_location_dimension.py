@@ -0,0 +1,100 @@
+"""
+Benchmark de create_location_dimension: versao com iterrows x colunar.
+
+Compara tres formas de montar dim_location para o arquivo de cidades:
+- legacy: implementacao antiga (drop_duplicates + iterrows por linha)
+- columnar: implementacao atual sobre o DataFrame inteiro
+- streaming: LocationCollector alimentado chunk a chunk
+
+Uso:
+    python -m benchmarks.bench_location_dimension --rows 1000000
+    python -m benchmarks.bench_location_dimension --csv data/raw/GlobalLandTemperaturesByCity.csv
+"""
+
+import argparse
+import logging
+import time
+from typing import Dict
+
+import pandas as pd
+
+from benchmarks.synthetic import make_city_frame
+from src.config import CHUNK_SIZE
+from src.transform.cleaners import clean_temperature_data
+from src.transform.transformers import LocationCollector, create_location_dimension
+from src.utils.coordinates import parse_coordinate
+
+
+def legacy_create_location_dimension(dfs: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Versao antiga (por linha), mantida apenas para comparacao."""
+    locations = [{'granularity': 'global', 'city': None, 'country': None,
+                  'latitude': None, 'longitude': None}]
+
+    for source in ['major_city', 'city']:
+        if source in dfs:
+            df = dfs[source]
+            cities = df[['city', 'country', 'latitude', 'longitude']].drop_duplicates()
+            for _, row in cities.iterrows():
+                lat_raw = row.get('latitude')
+                lon_raw = row.get('longitude')
+                locations.append({
+                    'granularity': 'city',
+                    'city': row['city'],
+                    'country': row['country'],
+                    'latitude': parse_coordinate(lat_raw) if pd.notna(lat_raw) else None,
+                    'longitude': parse_coordinate(lon_raw) if pd.notna(lon_raw) else None,
+                    'latitude_raw': lat_raw,
+                    'longitude_raw': lon_raw,
+                    'hemisphere_ns': str(lat_raw)[-1].upper() if pd.notna(lat_raw) else None,
+                    'hemisphere_ew': str(lon_raw)[-1].upper() if pd.notna(lon_raw) else None,
+                })
+
+    dim_location = pd.DataFrame(locations).drop_duplicates(
+        subset=['granularity', 'city', 'country']
+    )
+    dim_location['location_id'] = range(1, len(dim_location) + 1)
+    return dim_location
+
+
+def _timed(label: str, func) -> float:
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed:8.3f}s  ({len(result)} locais)")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Linhas sinteticas")
+    parser.add_argument("--csv", help="Usa um CSV real de cidades em vez de dados sinteticos")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    raw = pd.read_csv(args.csv, parse_dates=['dt']) if args.csv else make_city_frame(args.rows)
+    df = clean_temperature_data(raw, 'city')
+    del raw
+    print(f"{len(df)} linhas de cidade")
+
+    legacy = _timed("legacy", lambda: legacy_create_location_dimension({'city': df}))
+    columnar = _timed("columnar", lambda: create_location_dimension({'city': df}))
+
+    def streaming():
+        collector = LocationCollector()
+        for start in range(0, len(df), CHUNK_SIZE):
+            collector.update('city', df.iloc[start:start + CHUNK_SIZE])
+        return create_location_dimension(collector.frames())
+
+    _timed("streaming", streaming)
+    print(f"speedup columnar x legacy: {legacy / columnar:.1f}x")
+
+    # Mesma comparacao com o arquivo embaralhado (sem linhas repetidas em sequencia)
+    df = df.sample(frac=1, random_state=0)
+    legacy = _timed("legacy*", lambda: legacy_create_location_dimension({'city': df}))
+    columnar = _timed("columnar*", lambda: create_location_dimension({'city': df}))
+    print(f"speedup columnar x legacy (embaralhado): {legacy / columnar:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark de escala da limpeza em varios processos.
+
+Gera um CSV de cidades, monta as dimensoes e mede a segunda passada
+do pipeline (ler -> limpar -> resolver chaves) com 1, 2, 4, 8 e 16
+processos. Com 1 processo usa o caminho normal (extrator em chunks,
+tudo no processo principal).
+
+O ganho depende dos nucleos disponiveis: acima de os.cpu_count()
+processos nao ha mais o que ganhar.
+
+Uso:
+    python -m benchmarks.bench_parallel_clean --rows 4000000
+    python -m benchmarks.bench_parallel_clean --processes 1 4 16
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import make_city_frame
+from src.config import CSV_FILES
+from src.extract.csv_extractor import CSVExtractor
+from src.pipeline.parallel import parallel_fact_chunks
+from src.transform.cleaners import clean_temperature_data
+from src.transform.transformers import (
+    DateCollector,
+    LocationCollector,
+    create_date_dimension,
+    create_fact_temperature,
+    create_location_dimension,
+)
+
+
+def build_dimensions(extractor: CSVExtractor, chunk_size: int):
+    """Primeira passada, como no pipeline em streaming."""
+    dates = DateCollector()
+    locations = LocationCollector()
+    for chunk in extractor.extract('city', chunksize=chunk_size):
+        cleaned = clean_temperature_data(chunk, 'city', inplace=True)
+        dates.update(cleaned['dt'])
+        locations.update('city', cleaned)
+
+    dim_date = create_date_dimension(dates.dates())
+    return dim_date, create_location_dimension(locations.frames())
+
+
+def run_single(extractor, dim_date, dim_location, chunk_size) -> int:
+    rows = 0
+    for chunk in extractor.extract('city', chunksize=chunk_size):
+        cleaned = clean_temperature_data(chunk, 'city', inplace=True)
+        rows += len(create_fact_temperature(cleaned, dim_date, dim_location))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Linhas sinteticas")
+    parser.add_argument("--chunk-size", type=int, default=250_000, help="Linhas por chunk")
+    parser.add_argument(
+        "--processes", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+        help="Quantidades de processos a medir"
+    )
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_city_frame(args.rows).to_csv(
+            Path(tmp) / CSV_FILES['city']['filename'], index=False
+        )
+        extractor = CSVExtractor(tmp, use_cache=False)
+        dim_date, dim_location = build_dimensions(extractor, args.chunk_size)
+
+        print(f"{args.rows} linhas, chunks de {args.chunk_size}, {os.cpu_count()} nucleos")
+
+        baseline = None
+        for processes in args.processes:
+            start = time.perf_counter()
+            if processes == 1:
+                rows = run_single(extractor, dim_date, dim_location, args.chunk_size)
+            else:
+                rows = sum(len(fact) for fact in parallel_fact_chunks(
+                    'city', dim_date, dim_location, processes,
+                    chunk_size=args.chunk_size, data_dir=tmp
+                ))
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+
+            print(
+                f"{processes:>3} processos  {elapsed:7.2f}s  "
+                f"{rows / elapsed:>12,.0f} linhas/s  speedup {baseline / elapsed:.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
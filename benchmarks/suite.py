@@ -0,0 +1,345 @@
+"""
+Suite reprodutivel de benchmarks dos pontos quentes do ETL.
+
+Gera um CSV sintetico de cidades (benchmarks.synthetic), mede cada
+etapa algumas vezes e salva a mediana de cada uma num JSON junto com o
+commit, as versoes das bibliotecas e a maquina, para comparar commits:
+
+- parse_coordinate (escalar) e parse_coordinate_series (coluna inteira)
+- CSVExtractor.extract com engine='pandas' e engine='arrow'
+- clean_temperature_data
+- create_date_dimension e create_location_dimension
+- load_dataframe da tabela fato (DuckDB em memoria ou PostgreSQL local)
+
+Uso:
+    python -m benchmarks.suite --rows 1000000
+    python -m benchmarks.suite --rows 200000 --only clean dim_location --repeat 5
+    python -m benchmarks.suite --rows 1000000 --postgres
+    python -m benchmarks.suite --compare benchmarks/results/abc123-1000000.json \\
+        benchmarks/results/def456-1000000.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.synthetic import write_source_csv
+from src.extract.csv_extractor import CSVExtractor
+from src.load.duckdb_loader import DuckDBLoader
+from src.transform.cleaners import clean_temperature_data
+from src.transform.transformers import (
+    create_date_dimension,
+    create_fact_temperature,
+    create_location_dimension,
+)
+from src.utils.coordinates import clear_coordinate_cache, parse_coordinate, parse_coordinate_series
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# parse_coordinate e por valor (Python puro): limita as chamadas medidas
+SCALAR_COORDINATES = 200_000
+
+# Tabela descartavel usada no PostgreSQL (criada e apagada pela suite)
+POSTGRES_TABLE = "bench_fact_temperature"
+
+# Benchmark: (preparacao nao medida, funcao medida que retorna as linhas)
+Benchmark = Tuple[Optional[Callable[[], None]], Callable[[], int]]
+
+
+def measure(
+    setup: Optional[Callable[[], None]],
+    func: Callable[[], int],
+    repeat: int
+) -> Dict:
+    """
+    Roda func `repeat` vezes e resume os tempos.
+
+    A taxa (linhas/s) usa a mediana, que e menos sensivel a uma
+    execucao atrapalhada por outro processo do que a media.
+    """
+    runs = []
+    rows = 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        rows = func()
+        runs.append(time.perf_counter() - start)
+
+    median = statistics.median(runs)
+    return {
+        'rows': rows,
+        'runs_s': [round(r, 6) for r in runs],
+        'best_s': round(min(runs), 6),
+        'median_s': round(median, 6),
+        'rows_per_s': round(rows / median) if median > 0 else None,
+    }
+
+
+def environment() -> Dict:
+    """Commit, versoes e maquina: o que e preciso para comparar resultados."""
+    def git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ['git', *args], capture_output=True, text=True, check=True,
+                cwd=Path(__file__).parent
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'pyarrow': pa.__version__,
+        'duckdb': duckdb.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def _load_benchmark(fact: pd.DataFrame, postgres: bool) -> Tuple[Benchmark, Callable[[], None]]:
+    """
+    Benchmark de load_dataframe na tabela fato.
+
+    DuckDB: banco novo em memoria a cada repeticao. PostgreSQL: COPY
+    numa tabela com as colunas da fato, recriada a cada repeticao (sem
+    indices, para medir so a transferencia). Retorna tambem a limpeza.
+    """
+    if not postgres:
+        state = {}
+
+        def setup():
+            if 'loader' in state:
+                state['loader'].close()
+            state['loader'] = DuckDBLoader(':memory:')
+
+        def cleanup():
+            if 'loader' in state:
+                state['loader'].close()
+
+        return (setup, lambda: state['loader'].load_dataframe(fact, 'fact_temperature')), cleanup
+
+    from src.load.database_loader import DatabaseLoader
+
+    loader = DatabaseLoader()
+    target = f"{loader.schema}.{POSTGRES_TABLE}"
+
+    def setup():
+        loader.run_statements([
+            f"DROP TABLE IF EXISTS {target}",
+            f"CREATE TABLE {target} (LIKE {loader.schema}.fact_temperature)",
+            # Sem o DEFAULT (que usaria a sequence da fato real)
+            f"ALTER TABLE {target} ALTER COLUMN temperature_id DROP NOT NULL",
+        ])
+
+    def cleanup():
+        loader.run_statements([f"DROP TABLE IF EXISTS {target}"])
+        loader.engine.dispose()
+
+    return (
+        (setup, lambda: loader.load_dataframe(fact, POSTGRES_TABLE, method='copy')),
+        cleanup,
+    )
+
+
+def run_suite(
+    rows: int,
+    repeat: int = 3,
+    only: Optional[List[str]] = None,
+    postgres: bool = False,
+    seed: int = 42
+) -> Dict:
+    """
+    Gera os dados e roda os benchmarks.
+
+    As entradas de cada etapa (DataFrame bruto, limpo, dimensoes) sao
+    preparadas uma vez fora da medicao, entao cada benchmark mede so a
+    sua funcao.
+
+    Args:
+        rows: Linhas do CSV sintetico de cidades
+        repeat: Execucoes por benchmark
+        only: Nomes dos benchmarks a rodar (padrao: todos)
+        postgres: Mede a carga no PostgreSQL configurado em vez do DuckDB
+        seed: Semente do gerador sintetico
+
+    Returns:
+        Dict com 'environment', 'parameters' e 'benchmarks'
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        csv_path = write_source_csv('city', rows, data_dir, seed=seed)
+
+        raw = CSVExtractor(data_dir, use_cache=False, engine='arrow').extract('city')
+        cleaned = clean_temperature_data(raw, 'city')
+        dim_date = create_date_dimension(cleaned['dt'])
+        dim_location = create_location_dimension({'city': cleaned})
+        fact = create_fact_temperature(cleaned, dim_date, dim_location)
+
+        scalar_coords = raw['Latitude'].iloc[:SCALAR_COORDINATES].tolist()
+
+        def parse_scalar() -> int:
+            for value in scalar_coords:
+                parse_coordinate(value)
+            return len(scalar_coords)
+
+        def build_dim_date() -> int:
+            create_date_dimension(cleaned['dt'])
+            return len(cleaned)
+
+        def build_dim_location() -> int:
+            create_location_dimension({'city': cleaned})
+            return len(cleaned)
+
+        def extract(engine: str) -> Callable[[], int]:
+            extractor = CSVExtractor(data_dir, use_cache=False, engine=engine)
+            return lambda: len(extractor.extract('city'))
+
+        load, cleanup = _load_benchmark(fact, postgres)
+
+        benchmarks: Dict[str, Benchmark] = {
+            'parse_coordinate': (clear_coordinate_cache, parse_scalar),
+            'parse_coordinate_series': (
+                clear_coordinate_cache,
+                lambda: len(parse_coordinate_series(raw['Latitude'])),
+            ),
+            'extract_pandas': (None, extract('pandas')),
+            'extract_arrow': (None, extract('arrow')),
+            'clean': (None, lambda: len(clean_temperature_data(raw, 'city'))),
+            'dim_date': (None, build_dim_date),
+            'dim_location': (None, build_dim_location),
+            'load': load,
+        }
+
+        unknown = set(only or []) - set(benchmarks)
+        if unknown:
+            raise ValueError(f"Benchmarks desconhecidos: {sorted(unknown)}")
+
+        results = {}
+        try:
+            for name, (setup, func) in benchmarks.items():
+                if only and name not in only:
+                    continue
+                results[name] = measure(setup, func, repeat)
+                print(
+                    f"{name:<24} {results[name]['median_s']:8.3f}s  "
+                    f"{results[name]['rows_per_s']:>12,} linhas/s",
+                    flush=True
+                )
+        finally:
+            cleanup()
+
+        return {
+            'environment': environment(),
+            'parameters': {
+                'rows': rows,
+                'repeat': repeat,
+                'seed': seed,
+                'csv_mb': round(csv_path.stat().st_size / (1024 * 1024), 1),
+                'load_backend': 'postgres' if postgres else 'duckdb',
+            },
+            'benchmarks': results,
+        }
+
+
+def default_output(result: Dict) -> Path:
+    """benchmarks/results/<commit>-<linhas>.json (um arquivo por commit e escala)."""
+    commit = (result['environment']['commit'] or 'nogit')[:12]
+    if result['environment']['dirty']:
+        commit += '-dirty'
+    return RESULTS_DIR / f"{commit}-{result['parameters']['rows']}.json"
+
+
+def compare(base: Dict, new: Dict, threshold: float = 1.10) -> List[str]:
+    """
+    Compara as medianas de dois resultados.
+
+    Imprime uma linha por benchmark presente nos dois e retorna os
+    nomes dos que ficaram mais lentos que base * threshold.
+    """
+    if base['parameters']['rows'] != new['parameters']['rows']:
+        print(
+            f"Aviso: escalas diferentes ({base['parameters']['rows']} x "
+            f"{new['parameters']['rows']} linhas); compare pelas linhas/s"
+        )
+    if base['parameters']['load_backend'] != new['parameters']['load_backend']:
+        print(
+            f"Aviso: carga em bancos diferentes ({base['parameters']['load_backend']} x "
+            f"{new['parameters']['load_backend']})"
+        )
+
+    regressions = []
+    print(f"{'benchmark':<24} {'base':>9} {'novo':>9} {'razao':>7}")
+    for name, old in base['benchmarks'].items():
+        if name not in new['benchmarks']:
+            continue
+        ratio = old['rows_per_s'] / new['benchmarks'][name]['rows_per_s']
+        flag = ''
+        if ratio > threshold:
+            regressions.append(name)
+            flag = '  <- mais lento'
+        print(
+            f"{name:<24} {old['median_s']:8.3f}s "
+            f"{new['benchmarks'][name]['median_s']:8.3f}s {ratio:6.2f}x{flag}"
+        )
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Linhas sinteticas")
+    parser.add_argument("--repeat", type=int, default=3, help="Execucoes por benchmark")
+    parser.add_argument("--only", nargs="+", help="Roda apenas estes benchmarks")
+    parser.add_argument(
+        "--postgres", action="store_true",
+        help="Mede a carga no PostgreSQL configurado (.env) em vez do DuckDB"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON de saida (padrao: benchmarks/results/)")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BASE", "NOVO"),
+        help="Compara dois JSONs ja gerados (sai com 1 se houver regressao)"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=1.10,
+        help="Razao de tempo a partir da qual --compare acusa regressao"
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        base, new = (json.loads(Path(p).read_text()) for p in args.compare)
+        sys.exit(1 if compare(base, new, args.threshold) else 0)
+
+    logging.disable(logging.INFO)
+
+    result = run_suite(args.rows, args.repeat, args.only, args.postgres, args.seed)
+
+    output = Path(args.output) if args.output else default_output(result)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"Resultados em {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Gerador de dados sinteticos no formato do Berkeley Earth.
+
+Produz DataFrames (e CSVs) com as mesmas colunas, tipos e cardinalidades
+aproximadas dos arquivos reais, para medir o pipeline sem depender dos
+500 MB de dados reais.
+
+Uso:
+    from benchmarks.synthetic import make_city_frame
+    df = make_city_frame(rows=1_000_000)
+
+    python -m benchmarks.synthetic --rows 10000000 --out /tmp/berkeley
+    python -m benchmarks.synthetic --rows 500000 --sources country state --out /tmp/berkeley
+"""
+
+import argparse
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import CSV_FILES
+
+# Cardinalidades dos arquivos reais
+N_CITIES = 3_490
+N_COUNTRIES = 159
+N_MAJOR_CITIES = 100
+N_MAJOR_CITY_COUNTRIES = 49
+N_STATES = 241
+N_STATE_COUNTRIES = 7
+N_COUNTRY_SERIES = 243
+FIRST_MONTH = "1743-11-01"
+
+# Meses que cabem entre FIRST_MONTH e o limite do datetime64[ns] (2262)
+MAX_MONTHS = 6_000
+
+# Linhas geradas por vez ao escrever CSVs grandes
+WRITE_CHUNK_ROWS = 1_000_000
+
+
+def _coordinate_strings(values: np.ndarray, positive: str, negative: str) -> np.ndarray:
+    """Formata graus como "57.05N" / "10.33W"."""
+    letters = np.where(values >= 0, positive, negative)
+    return np.char.add(np.char.mod('%.2f', np.abs(values)), letters)
+
+
+def _layout(
+    rows: int,
+    n_series: int,
+    offset: int,
+    total_rows: Optional[int]
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Posiciona as linhas [offset, offset + rows) no arquivo completo.
+
+    O arquivo e ordenado por serie e data: cada serie ocupa `months`
+    linhas seguidas. Retorna (serie de cada linha, mes de cada linha,
+    meses por serie).
+    """
+    total_rows = total_rows or rows
+    months = -(-total_rows // n_series)  # divisao arredondando para cima
+    if months > MAX_MONTHS:
+        raise ValueError(
+            f"{total_rows} linhas em {n_series} series daria {months} meses "
+            f"por serie (maximo {MAX_MONTHS}); aumente o numero de series"
+        )
+
+    positions = np.arange(offset, offset + rows)
+    return positions // months, positions % months, months
+
+
+def _measurements(
+    rng: np.random.Generator,
+    base_temp: np.ndarray,
+    series_ids: np.ndarray,
+    month_ids: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Temperatura sazonal + ruido e incerteza, com ~4% de ausentes."""
+    rows = len(series_ids)
+    seasonal = 10 * np.sin(2 * np.pi * (month_ids % 12) / 12)
+    temperature = base_temp[series_ids] + seasonal + rng.normal(0, 1.5, rows)
+    uncertainty = rng.uniform(0.05, 3.0, rows)
+
+    missing = rng.random(rows) < 0.04
+    temperature[missing] = np.nan
+    uncertainty[missing] = np.nan
+
+    return temperature.round(3), uncertainty.round(3)
+
+
+def _row_rng(rng: np.random.Generator, seed: int, offset: int) -> np.random.Generator:
+    """
+    Gerador para os valores por linha.
+
+    No primeiro bloco continua o gerador das series (mesma saida de
+    sempre para make_city_frame(rows)); nos seguintes usa uma semente
+    derivada do offset, para que cada bloco seja reprodutivel sozinho.
+    """
+    return rng if offset == 0 else np.random.default_rng([seed, offset])
+
+
+def make_city_frame(
+    rows: int,
+    n_cities: int = N_CITIES,
+    n_countries: int = N_COUNTRIES,
+    seed: int = 42,
+    offset: int = 0,
+    total_rows: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Gera um DataFrame bruto no formato do arquivo de cidades.
+
+    Cada cidade tem uma serie mensal continua (como no arquivo real,
+    que e ordenado por cidade e data) e ~4% das temperaturas ausentes.
+
+    Args:
+        rows: Numero de linhas a gerar
+        n_cities: Cidades distintas
+        n_countries: Paises distintos
+        seed: Semente do gerador aleatorio
+        offset: Primeira linha do bloco dentro do arquivo completo
+        total_rows: Tamanho do arquivo completo (padrao: rows). Com
+            offset, permite gerar um arquivo grande em blocos.
+
+    Returns:
+        DataFrame com dt, AverageTemperature, AverageTemperatureUncertainty,
+        City, Country, Latitude, Longitude
+    """
+    rng = np.random.default_rng(seed)
+    n_cities = max(1, min(n_cities, total_rows or rows))
+    city_ids, month_ids, months = _layout(rows, n_cities, offset, total_rows)
+
+    dates = pd.date_range(FIRST_MONTH, periods=months, freq='MS')
+    city_names = np.array([f"City {i:04d}" for i in range(n_cities)], dtype=object)
+    country_names = np.array([f"Country {i:03d}" for i in range(n_countries)], dtype=object)
+    city_country = rng.integers(0, n_countries, n_cities)
+
+    latitudes = _coordinate_strings(rng.uniform(-60, 75, n_cities), 'N', 'S')
+    longitudes = _coordinate_strings(rng.uniform(-180, 180, n_cities), 'E', 'W')
+
+    base_temp = rng.uniform(-10, 30, n_cities)
+    temperature, uncertainty = _measurements(
+        _row_rng(rng, seed, offset), base_temp, city_ids, month_ids
+    )
+
+    return pd.DataFrame({
+        'dt': dates[month_ids],
+        'AverageTemperature': temperature,
+        'AverageTemperatureUncertainty': uncertainty,
+        'City': city_names[city_ids],
+        'Country': country_names[city_country[city_ids]],
+        'Latitude': latitudes[city_ids].astype(object),
+        'Longitude': longitudes[city_ids].astype(object),
+    })
+
+
+def make_major_city_frame(
+    rows: int,
+    seed: int = 42,
+    offset: int = 0,
+    total_rows: Optional[int] = None
+) -> pd.DataFrame:
+    """Arquivo das 100 principais cidades (mesmas colunas do de cidades)."""
+    return make_city_frame(
+        rows, N_MAJOR_CITIES, N_MAJOR_CITY_COUNTRIES, seed, offset, total_rows
+    )
+
+
+def make_state_frame(
+    rows: int,
+    seed: int = 42,
+    offset: int = 0,
+    total_rows: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Gera um DataFrame no formato do arquivo de estados.
+
+    Returns:
+        DataFrame com dt, AverageTemperature, AverageTemperatureUncertainty,
+        State, Country
+    """
+    rng = np.random.default_rng(seed)
+    n_states = max(1, min(N_STATES, total_rows or rows))
+    state_ids, month_ids, months = _layout(rows, n_states, offset, total_rows)
+
+    dates = pd.date_range(FIRST_MONTH, periods=months, freq='MS')
+    state_names = np.array([f"State {i:03d}" for i in range(n_states)], dtype=object)
+    country_names = np.array(
+        [f"Country {i:03d}" for i in range(N_STATE_COUNTRIES)], dtype=object
+    )
+    state_country = rng.integers(0, N_STATE_COUNTRIES, n_states)
+
+    base_temp = rng.uniform(-10, 30, n_states)
+    temperature, uncertainty = _measurements(
+        _row_rng(rng, seed, offset), base_temp, state_ids, month_ids
+    )
+
+    return pd.DataFrame({
+        'dt': dates[month_ids],
+        'AverageTemperature': temperature,
+        'AverageTemperatureUncertainty': uncertainty,
+        'State': state_names[state_ids],
+        'Country': country_names[state_country[state_ids]],
+    })
+
+
+def make_country_frame(
+    rows: int,
+    seed: int = 42,
+    offset: int = 0,
+    total_rows: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Gera um DataFrame no formato do arquivo de paises.
+
+    Returns:
+        DataFrame com dt, AverageTemperature, AverageTemperatureUncertainty,
+        Country
+    """
+    rng = np.random.default_rng(seed)
+    n_countries = max(1, min(N_COUNTRY_SERIES, total_rows or rows))
+    country_ids, month_ids, months = _layout(rows, n_countries, offset, total_rows)
+
+    dates = pd.date_range(FIRST_MONTH, periods=months, freq='MS')
+    country_names = np.array([f"Country {i:03d}" for i in range(n_countries)], dtype=object)
+
+    base_temp = rng.uniform(-10, 30, n_countries)
+    temperature, uncertainty = _measurements(
+        _row_rng(rng, seed, offset), base_temp, country_ids, month_ids
+    )
+
+    return pd.DataFrame({
+        'dt': dates[month_ids],
+        'AverageTemperature': temperature,
+        'AverageTemperatureUncertainty': uncertainty,
+        'Country': country_names[country_ids],
+    })
+
+
+def make_global_frame(
+    rows: int,
+    seed: int = 42,
+    offset: int = 0,
+    total_rows: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Gera um DataFrame no formato do GlobalTemperatures.csv.
+
+    Uma unica serie mensal (no maximo MAX_MONTHS linhas). Como no
+    arquivo real, max/min e terra+oceano so existem a partir de 1850.
+
+    Returns:
+        DataFrame com dt e as 8 colunas Land*/LandAndOcean*
+    """
+    rng = _row_rng(np.random.default_rng(seed), seed, offset)
+    _, month_ids, months = _layout(rows, 1, offset, total_rows)
+
+    dates = pd.date_range(FIRST_MONTH, periods=months, freq='MS')[month_ids]
+    land, land_unc = _measurements(rng, np.array([8.5]), np.zeros(rows, dtype=int), month_ids)
+    land_max = (land + 6 + rng.normal(0, 0.3, rows)).round(3)
+    land_min = (land - 6 + rng.normal(0, 0.3, rows)).round(3)
+    ocean = (land * 0.3 + 13 + rng.normal(0, 0.2, rows)).round(3)
+    small_unc = rng.uniform(0.02, 0.5, rows).round(3)
+
+    before_1850 = np.asarray(dates.year < 1850)
+    extended = {}
+    for name, values in [
+        ('LandMaxTemperature', land_max),
+        ('LandMaxTemperatureUncertainty', small_unc),
+        ('LandMinTemperature', land_min),
+        ('LandMinTemperatureUncertainty', small_unc),
+        ('LandAndOceanAverageTemperature', ocean),
+        ('LandAndOceanAverageTemperatureUncertainty', small_unc),
+    ]:
+        values = values.copy()
+        values[before_1850] = np.nan
+        extended[name] = values
+
+    return pd.DataFrame({
+        'dt': dates,
+        'LandAverageTemperature': land,
+        'LandAverageTemperatureUncertainty': land_unc,
+        **extended,
+    })
+
+
+# Gerador de cada fonte, com a assinatura (rows, seed, offset, total_rows)
+SOURCE_GENERATORS: Dict[str, Callable[..., pd.DataFrame]] = {
+    'global': make_global_frame,
+    'country': make_country_frame,
+    'state': make_state_frame,
+    'major_city': make_major_city_frame,
+    'city': lambda rows, seed=42, offset=0, total_rows=None: make_city_frame(
+        rows, seed=seed, offset=offset, total_rows=total_rows
+    ),
+}
+
+
+def write_source_csv(
+    source: str,
+    rows: int,
+    data_dir: Path,
+    seed: int = 42,
+    chunk_rows: int = WRITE_CHUNK_ROWS
+) -> Path:
+    """
+    Escreve o CSV sintetico de uma fonte com o nome do arquivo real.
+
+    Gera e grava em blocos de chunk_rows linhas, entao 10M de linhas
+    nao precisam caber inteiras na memoria. Os valores aleatorios por
+    linha dependem das fronteiras dos blocos: para comparar execucoes,
+    use o mesmo chunk_rows (o padrao).
+
+    Args:
+        source: Chave de CSV_FILES ('city', 'country', ...)
+        rows: Linhas do arquivo
+        data_dir: Diretorio de saida (criado se nao existir)
+        seed: Semente do gerador aleatorio
+        chunk_rows: Linhas geradas por vez
+
+    Returns:
+        Caminho do CSV escrito
+    """
+    if source not in SOURCE_GENERATORS:
+        raise ValueError(f"Fonte desconhecida: {source}")
+
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    path = data_dir / CSV_FILES[source]['filename']
+    generate = SOURCE_GENERATORS[source]
+
+    for offset in range(0, rows, chunk_rows):
+        frame = generate(
+            min(chunk_rows, rows - offset), seed=seed, offset=offset, total_rows=rows
+        )
+        frame.to_csv(
+            path,
+            mode='w' if offset == 0 else 'a',
+            header=offset == 0,
+            index=False,
+            date_format='%Y-%m-%d'
+        )
+
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Linhas por arquivo")
+    parser.add_argument("--out", required=True, help="Diretorio de saida")
+    parser.add_argument(
+        "--sources", nargs="+", default=['city'], choices=list(SOURCE_GENERATORS),
+        help="Fontes a gerar (padrao: city)"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for source in args.sources:
+        rows = args.rows
+        if source == 'global':
+            # Serie unica: limitada ao intervalo de datas suportado
+            rows = min(rows, MAX_MONTHS)
+        path = write_source_csv(source, rows, Path(args.out), seed=args.seed)
+        size_mb = path.stat().st_size / (1024 * 1024)
+        print(f"{source:<11} {rows:>12,} linhas  {size_mb:8.1f} MB  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,22 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { createClient } from '@supabase/supabase-js';
-import { calculateTrendAnalysis, aggregateToYearly } from '@/lib/regression';
+import {
+  calculateTrendAnalysis,
+  aggregateToYearly,
+  trendFromCoefficients,
+  TrendAnalysis,
+} from '@/lib/regression';
 
 const supabaseUrl = process.env.NEXT_PUBLIC_SUPABASE_URL!;
 const supabaseAnonKey = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY!;
 
 const supabase = createClient(supabaseUrl, supabaseAnonKey);
 
+// First year of the precomputed trends (TREND_START_YEAR in src/transform/trends.py)
+const PRECOMPUTED_START_YEAR = 1900;
+
+const FORECAST_YEARS = [2026, 2027, 2028];
+
 interface TemperatureRecord {
   avg_temperature: number;
   dim_date: {
@@ -15,6 +25,86 @@ interface TemperatureRecord {
   };
 }
 
+interface LocationTrendRecord {
+  location_id: number;
+  year_end: number;
+  n_years: number;
+  data_points: number;
+  slope: number;
+  intercept: number;
+  r_squared: number;
+  mean_temperature: number;
+  min_temperature: number;
+  max_temperature: number;
+}
+
+interface TrendResult {
+  historical: {
+    avgTemp: number;
+    maxTemp: number;
+    minTemp: number;
+    dataPoints: number;
+  };
+  yearlyData: { year: number; avgTemp: number }[];
+  trendAnalysis: TrendAnalysis;
+}
+
+/**
+ * Reads the trend precomputed by the ETL (location_trend) and the yearly
+ * series (agg_location_year): two indexed lookups instead of every monthly row.
+ * Only covers requests for all months starting at PRECOMPUTED_START_YEAR;
+ * returns null when the trend has to be calculated from the monthly data.
+ */
+async function loadPrecomputedTrend(
+  country: string,
+  yearStart: number,
+  yearEnd: number
+): Promise<TrendResult | null> {
+  if (yearStart !== PRECOMPUTED_START_YEAR) {
+    return null;
+  }
+
+  const { data: trend, error } = await supabase
+    .from('location_trend')
+    .select('*, dim_location!inner(country, granularity)')
+    .eq('dim_location.country', country)
+    .eq('dim_location.granularity', 'country')
+    .maybeSingle();
+
+  if (error || !trend || (trend as LocationTrendRecord).year_end > yearEnd) {
+    return null;
+  }
+  const record = trend as LocationTrendRecord;
+
+  const { data: yearly, error: yearlyError } = await supabase
+    .from('agg_location_year')
+    .select('year, avg_temperature')
+    .eq('location_id', record.location_id)
+    .gte('year', yearStart)
+    .lte('year', yearEnd)
+    .order('year');
+
+  if (yearlyError || !yearly || yearly.length === 0) {
+    return null;
+  }
+
+  return {
+    historical: {
+      avgTemp: record.mean_temperature,
+      maxTemp: record.max_temperature,
+      minTemp: record.min_temperature,
+      dataPoints: record.data_points,
+    },
+    yearlyData: yearly.map(d => ({ year: d.year, avgTemp: Number(d.avg_temperature) })),
+    trendAnalysis: trendFromCoefficients(
+      record.slope,
+      record.intercept,
+      record.r_squared,
+      FORECAST_YEARS
+    ),
+  };
+}
+
 export async function GET(request: NextRequest) {
   const { searchParams } = new URL(request.url);
   const country = searchParams.get('country');
@@ -29,63 +119,82 @@ export async function GET(request: NextRequest) {
     );
   }
 
+  const months = monthsParam
+    ? monthsParam.split(',').map(Number).filter(m => m >= 1 && m <= 12)
+    : [];
+  const filterMonths = months.length > 0 && months.length < 12;
+
   try {
-    // Build the query
-    let query = supabase
-      .from('fact_temperature')
-      .select(`
-        avg_temperature,
-        dim_date!inner(year, month),
-        dim_location!inner(country)
-      `)
-      .eq('dim_location.country', country)
-      .gte('dim_date.year', yearStart)
-      .lte('dim_date.year', yearEnd)
-      .not('avg_temperature', 'is', null);
-
-    // Apply month filter if provided
-    if (monthsParam) {
-      const months = monthsParam.split(',').map(Number).filter(m => m >= 1 && m <= 12);
-      if (months.length > 0 && months.length < 12) {
+    let result = filterMonths
+      ? null
+      : await loadPrecomputedTrend(country, yearStart, yearEnd);
+
+    if (!result) {
+      // Build the query
+      let query = supabase
+        .from('fact_temperature')
+        .select(`
+          avg_temperature,
+          dim_date!inner(year, month),
+          dim_location!inner(country, granularity)
+        `)
+        .eq('dim_location.country', country)
+        // Same series as the precomputed path: the country rows only,
+        // not the states and cities of that country
+        .eq('dim_location.granularity', 'country')
+        .gte('dim_date.year', yearStart)
+        .lte('dim_date.year', yearEnd)
+        .not('avg_temperature', 'is', null);
+
+      // Apply month filter if provided
+      if (filterMonths) {
         query = query.in('dim_date.month', months);
       }
-    }
-
-    const { data, error } = await query;
 
-    if (error) {
-      console.error('Supabase error:', error);
-      return NextResponse.json(
-        { error: error.message },
-        { status: 500 }
-      );
-    }
+      const { data, error } = await query;
 
-    if (!data || data.length === 0) {
-      return NextResponse.json(
-        { error: `No temperature data found for ${country}` },
-        { status: 404 }
-      );
-    }
-
-    // Transform data for analysis
-    const monthlyData = (data as unknown as TemperatureRecord[]).map(d => ({
-      year: d.dim_date.year,
-      month: d.dim_date.month,
-      avgTemp: d.avg_temperature,
-    }));
+      if (error) {
+        console.error('Supabase error:', error);
+        return NextResponse.json(
+          { error: error.message },
+          { status: 500 }
+        );
+      }
 
-    // Calculate historical stats
-    const temperatures = monthlyData.map(d => d.avgTemp);
-    const avgTemp = temperatures.reduce((a, b) => a + b, 0) / temperatures.length;
-    const maxTemp = Math.max(...temperatures);
-    const minTemp = Math.min(...temperatures);
+      if (!data || data.length === 0) {
+        return NextResponse.json(
+          { error: `No temperature data found for ${country}` },
+          { status: 404 }
+        );
+      }
 
-    // Aggregate to yearly averages for regression
-    const yearlyData = aggregateToYearly(monthlyData);
+      // Transform data for analysis
+      const monthlyData = (data as unknown as TemperatureRecord[]).map(d => ({
+        year: d.dim_date.year,
+        month: d.dim_date.month,
+        avgTemp: d.avg_temperature,
+      }));
+
+      // Calculate historical stats
+      const temperatures = monthlyData.map(d => d.avgTemp);
+
+      // Aggregate to yearly averages for regression
+      const yearlyData = aggregateToYearly(monthlyData);
+
+      result = {
+        historical: {
+          avgTemp: temperatures.reduce((a, b) => a + b, 0) / temperatures.length,
+          maxTemp: Math.max(...temperatures),
+          minTemp: Math.min(...temperatures),
+          dataPoints: data.length,
+        },
+        yearlyData,
+        // Calculate trend analysis with forecasts for 2026-2028
+        trendAnalysis: calculateTrendAnalysis(yearlyData, FORECAST_YEARS),
+      };
+    }
 
-    // Calculate trend analysis with forecasts for 2026-2028
-    const trendAnalysis = calculateTrendAnalysis(yearlyData, [2026, 2027, 2028]);
+    const { historical, yearlyData, trendAnalysis } = result;
 
     // Build time series for charting
     const timeSeries = yearlyData.map(d => ({
@@ -101,10 +210,10 @@ export async function GET(request: NextRequest) {
         end: yearEnd,
       },
       historical: {
-        avg_temp: Math.round(avgTemp * 100) / 100,
-        max_temp: Math.round(maxTemp * 100) / 100,
-        min_temp: Math.round(minTemp * 100) / 100,
-        data_points: data.length,
+        avg_temp: Math.round(historical.avgTemp * 100) / 100,
+        max_temp: Math.round(historical.maxTemp * 100) / 100,
+        min_temp: Math.round(historical.minTemp * 100) / 100,
+        data_points: historical.dataPoints,
         years_covered: yearlyData.length,
       },
       trend: {
@@ -103,12 +103,32 @@ export function calculateTrendAnalysis(
 
   const regression = linearRegression(dataPoints);
 
+  return trendFromCoefficients(
+    regression.slope,
+    regression.intercept,
+    regression.rSquared,
+    forecastYears,
+    uncertaintyMargin
+  );
+}
+
+/**
+ * Builds a trend analysis from an already fitted line
+ * (e.g. the precomputed climate.location_trend table)
+ */
+export function trendFromCoefficients(
+  slope: number,
+  intercept: number,
+  rSquared: number,
+  forecastYears: number[] = [2026, 2027, 2028],
+  uncertaintyMargin: number = 0.05
+): TrendAnalysis {
   // Calculate warming rate per decade
-  const warmingRatePerDecade = regression.slope * 10;
+  const warmingRatePerDecade = slope * 10;
 
   // Generate forecasts with confidence intervals
   const forecasts = forecastYears.map(year => {
-    const predicted = regression.predict(year);
+    const predicted = intercept + slope * year;
     const margin = Math.abs(predicted) * uncertaintyMargin;
 
     return {
@@ -120,9 +140,9 @@ export function calculateTrendAnalysis(
   });
 
   return {
-    slope: Math.round(regression.slope * 1000) / 1000,
-    intercept: Math.round(regression.intercept * 100) / 100,
-    rSquared: Math.round(regression.rSquared * 1000) / 1000,
+    slope: Math.round(slope * 1000) / 1000,
+    intercept: Math.round(intercept * 100) / 100,
+    rSquared: Math.round(rSquared * 1000) / 1000,
     warmingRatePerDecade: Math.round(warmingRatePerDecade * 100) / 100,
     forecasts,
   };
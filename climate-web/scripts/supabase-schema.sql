@@ -50,6 +50,35 @@ CREATE TABLE IF NOT EXISTS fact_temperature (
     UNIQUE(date_id, location_id, source_file)
 );
 
+-- Serie anual por localizacao (rollup gerado pelo pipeline: src/load/rollups.py)
+CREATE TABLE IF NOT EXISTS agg_location_year (
+    location_id       INTEGER NOT NULL REFERENCES dim_location(location_id),
+    year              INTEGER NOT NULL,
+    measurement_count INTEGER NOT NULL,
+    avg_temperature   NUMERIC,
+    min_temperature   NUMERIC,
+    max_temperature   NUMERIC,
+    avg_uncertainty   NUMERIC,
+    PRIMARY KEY (location_id, year)
+);
+
+-- Tendencia linear por localizacao (src/transform/trends.py)
+CREATE TABLE IF NOT EXISTS location_trend (
+    location_id             INTEGER PRIMARY KEY REFERENCES dim_location(location_id),
+    year_start              INTEGER NOT NULL,
+    year_end                INTEGER NOT NULL,
+    n_years                 INTEGER NOT NULL,
+    data_points             INTEGER NOT NULL,
+    slope                   DOUBLE PRECISION NOT NULL,
+    intercept               DOUBLE PRECISION NOT NULL,
+    r_squared               DOUBLE PRECISION NOT NULL,
+    warming_rate_per_decade DOUBLE PRECISION NOT NULL,
+    slope_stderr            DOUBLE PRECISION,
+    mean_temperature        DOUBLE PRECISION,
+    min_temperature         DOUBLE PRECISION,
+    max_temperature         DOUBLE PRECISION
+);
+
 -- Indices para performance
 CREATE INDEX IF NOT EXISTS idx_fact_date ON fact_temperature(date_id);
 CREATE INDEX IF NOT EXISTS idx_fact_location ON fact_temperature(location_id);
@@ -63,6 +92,8 @@ CREATE INDEX IF NOT EXISTS idx_dim_location_granularity ON dim_location(granular
 ALTER TABLE dim_date ENABLE ROW LEVEL SECURITY;
 ALTER TABLE dim_location ENABLE ROW LEVEL SECURITY;
 ALTER TABLE fact_temperature ENABLE ROW LEVEL SECURITY;
+ALTER TABLE agg_location_year ENABLE ROW LEVEL SECURITY;
+ALTER TABLE location_trend ENABLE ROW LEVEL SECURITY;
 
 -- Politicas para leitura publica (dados climaticos sao publicos)
 CREATE POLICY "Allow public read access on dim_date" ON dim_date
@@ -74,6 +105,12 @@ CREATE POLICY "Allow public read access on dim_location" ON dim_location
 CREATE POLICY "Allow public read access on fact_temperature" ON fact_temperature
     FOR SELECT USING (true);
 
+CREATE POLICY "Allow public read access on agg_location_year" ON agg_location_year
+    FOR SELECT USING (true);
+
+CREATE POLICY "Allow public read access on location_trend" ON location_trend
+    FOR SELECT USING (true);
+
 -- ==============================================
 -- Dados de Exemplo (para teste inicial)
 -- ==============================================
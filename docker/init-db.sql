@@ -45,12 +45,91 @@ CREATE TABLE IF NOT EXISTS climate.fact_temperature (
     land_ocean_avg_temp_uncertainty DECIMAL(10,4),
     source_file                 VARCHAR(100) NOT NULL,
     loaded_at                   TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(date_id, location_id, source_file)
+    -- Chave natural; (location_id, date_id) na frente tambem serve as
+    -- consultas de serie historica por localizacao
+    CONSTRAINT uq_fact_location_date_source UNIQUE (location_id, date_id, source_file)
+);
+
+-- Estado da carga incremental (marca d'agua por fonte + localizacao)
+CREATE TABLE IF NOT EXISTS climate.etl_state (
+    source_file   VARCHAR(100) NOT NULL,
+    location_id   INTEGER NOT NULL,
+    max_date      DATE NOT NULL,
+    content_hash  BIGINT NOT NULL,
+    row_count     BIGINT NOT NULL,
+    updated_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source_file, location_id)
+);
+
+-- Checkpoint por chunk da carga da tabela fato (src/load/checkpoint.py)
+CREATE TABLE IF NOT EXISTS climate.etl_checkpoint (
+    source_file   VARCHAR(100) NOT NULL,
+    chunk_index   INTEGER NOT NULL,
+    row_start     BIGINT NOT NULL,
+    row_end       BIGINT NOT NULL,
+    row_count     BIGINT NOT NULL,
+    content_hash  BIGINT NOT NULL,
+    fingerprint   VARCHAR(200) NOT NULL,
+    loaded_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source_file, chunk_index)
+);
+
+-- Rollup localizacao x ano (src/load/rollups.py)
+CREATE TABLE IF NOT EXISTS climate.agg_location_year (
+    location_id       INTEGER NOT NULL,
+    year              INTEGER NOT NULL,
+    measurement_count INTEGER NOT NULL,
+    avg_temperature   NUMERIC,
+    min_temperature   NUMERIC,
+    max_temperature   NUMERIC,
+    avg_uncertainty   NUMERIC,
+    PRIMARY KEY (location_id, year)
+);
+
+-- Rollup localizacao x decada (src/load/rollups.py)
+CREATE TABLE IF NOT EXISTS climate.agg_location_decade (
+    location_id       INTEGER NOT NULL,
+    decade            INTEGER NOT NULL,
+    measurement_count INTEGER NOT NULL,
+    avg_temperature   NUMERIC,
+    min_temperature   NUMERIC,
+    max_temperature   NUMERIC,
+    avg_uncertainty   NUMERIC,
+    PRIMARY KEY (location_id, decade)
+);
+
+-- Rollup localizacao x mes do ano (climatologia) (src/load/rollups.py)
+CREATE TABLE IF NOT EXISTS climate.agg_location_month (
+    location_id       INTEGER NOT NULL,
+    month             INTEGER NOT NULL,
+    measurement_count INTEGER NOT NULL,
+    avg_temperature   NUMERIC,
+    min_temperature   NUMERIC,
+    max_temperature   NUMERIC,
+    avg_uncertainty   NUMERIC,
+    PRIMARY KEY (location_id, month)
+);
+
+-- Tendencia linear por localizacao (src/transform/trends.py)
+CREATE TABLE IF NOT EXISTS climate.location_trend (
+    location_id             INTEGER PRIMARY KEY,
+    year_start              INTEGER NOT NULL,
+    year_end                INTEGER NOT NULL,
+    n_years                 INTEGER NOT NULL,
+    data_points             INTEGER NOT NULL,
+    slope                   DOUBLE PRECISION NOT NULL,
+    intercept               DOUBLE PRECISION NOT NULL,
+    r_squared               DOUBLE PRECISION NOT NULL,
+    warming_rate_per_decade DOUBLE PRECISION NOT NULL,
+    slope_stderr            DOUBLE PRECISION,
+    mean_temperature        DOUBLE PRECISION,
+    min_temperature         DOUBLE PRECISION,
+    max_temperature         DOUBLE PRECISION
 );
 
 -- Indices para performance
+-- (fact_temperature: ver src/load/fact_layout.py para particoes e carga em massa)
 CREATE INDEX idx_fact_date ON climate.fact_temperature(date_id);
-CREATE INDEX idx_fact_location ON climate.fact_temperature(location_id);
 CREATE INDEX idx_dim_date_decade ON climate.dim_date(decade);
 CREATE INDEX idx_dim_location_country ON climate.dim_location(country);
 
@@ -1,26 +1,24 @@
+-- Le os rollups (src/load/rollups.py), atualizados a cada carga.
+-- A granularidade global tem uma unica localizacao, entao cada linha
+-- do rollup ja e o valor global do periodo.
+
 -- Temperatura media por decada (Global)
 SELECT
-    d.decade,
-    ROUND(AVG(f.avg_temperature)::numeric, 2) as avg_temp,
-    ROUND(AVG(f.avg_temperature_uncertainty)::numeric, 3) as avg_uncertainty,
-    COUNT(*) as measurements
-FROM climate.fact_temperature f
-JOIN climate.dim_date d ON f.date_id = d.date_id
-JOIN climate.dim_location l ON f.location_id = l.location_id
+    r.decade,
+    ROUND(r.avg_temperature::numeric, 2) as avg_temp,
+    ROUND(r.avg_uncertainty::numeric, 3) as avg_uncertainty,
+    r.measurement_count as measurements
+FROM climate.agg_location_decade r
+JOIN climate.dim_location l ON r.location_id = l.location_id
 WHERE l.granularity = 'global'
-  AND f.avg_temperature IS NOT NULL
-GROUP BY d.decade
-ORDER BY d.decade;
+ORDER BY r.decade;
 
 -- Top 10 anos mais quentes
 SELECT
-    d.year,
-    ROUND(AVG(f.avg_temperature)::numeric, 2) as avg_temp
-FROM climate.fact_temperature f
-JOIN climate.dim_date d ON f.date_id = d.date_id
-JOIN climate.dim_location l ON f.location_id = l.location_id
+    r.year,
+    ROUND(r.avg_temperature::numeric, 2) as avg_temp
+FROM climate.agg_location_year r
+JOIN climate.dim_location l ON r.location_id = l.location_id
 WHERE l.granularity = 'global'
-  AND f.avg_temperature IS NOT NULL
-GROUP BY d.year
 ORDER BY avg_temp DESC
-LIMIT 10;
\ No newline at end of file
+LIMIT 10;
@@ -19,6 +19,13 @@ RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
 SAMPLE_DATA_DIR = DATA_DIR / "sample"
 
+# Cache Parquet dos CSVs brutos (ver CSVExtractor)
+CACHE_DIR = PROCESSED_DATA_DIR / "cache"
+USE_PARQUET_CACHE = os.getenv("USE_PARQUET_CACHE", "true").lower() == "true"
+
+# Leitor de CSV: "pandas" (pd.read_csv) ou "arrow" (pyarrow, multithread)
+CSV_ENGINE = os.getenv("CSV_ENGINE", "pandas")
+
 # Diretorio de SQL
 SQL_DIR = PROJECT_ROOT / "sql"
 
@@ -40,6 +47,17 @@ POSTGRES_CONNECTION_STRING = (
     f"@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 )
 
+# DuckDB (alternativa local ao PostgreSQL, ver src/load/duckdb_loader.py).
+# O nome do arquivo nao pode ser "climate.*": o DuckDB usa o nome do
+# arquivo como catalogo e "climate.tabela" ficaria ambiguo
+DUCKDB_PATH = Path(os.getenv("DUCKDB_PATH", str(PROCESSED_DATA_DIR / "warehouse.duckdb")))
+
+# Pool de conexoes (SQLAlchemy)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))            # Conexoes mantidas abertas
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))      # Conexoes extras sob demanda
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"  # Testa antes de usar
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))   # Recicla conexoes apos N segundos
+
 
 # =============================================================================
 # DATA FILES (Arquivos de dados)
@@ -85,6 +103,53 @@ CHUNK_SIZE = 500_000
 # Tamanho do batch para insercao no banco
 BATCH_SIZE = 50_000
 
+# Carga paralela: conexoes simultaneas e tentativas por chunk
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "4"))
+LOAD_MAX_RETRIES = int(os.getenv("LOAD_MAX_RETRIES", "3"))
+
+# Processos que limpam chunks em paralelo no pipeline em streaming
+CLEAN_PROCESSES = int(os.getenv("CLEAN_PROCESSES", "1"))
+
+# Pico de memoria desejado (MB) para o pipeline em streaming
+MEMORY_TARGET_MB = int(os.getenv("MEMORY_TARGET_MB", "3072"))
+
+# Indice espacial das localizacoes com coordenadas (src/utils/spatial.py),
+# regravado pelo pipeline em streaming sempre que dim_location muda
+LOCATION_INDEX_PATH = Path(
+    os.getenv("LOCATION_INDEX_PATH", str(PROCESSED_DATA_DIR / "location_index.npz"))
+)
+
+# Indice de busca por nome (src/utils/search.py), regravado pelo pipeline
+# em streaming junto com os rollups (ordena pela cobertura de dados)
+SEARCH_INDEX_PATH = Path(
+    os.getenv("SEARCH_INDEX_PATH", str(PROCESSED_DATA_DIR / "location_search.npz"))
+)
+
+# Metricas por etapa (src/utils/instrumentation.py). Vazio = so no log.
+# METRICS_PATH: arquivo JSON lines acumulado execucao a execucao
+# PROMETHEUS_TEXTFILE: arquivo .prom para o textfile collector do node_exporter
+METRICS_PATH = os.getenv("METRICS_PATH") or None
+PROMETHEUS_TEXTFILE = os.getenv("PROMETHEUS_TEXTFILE") or None
+
+
+# =============================================================================
+# SUPABASE (Migracao para o banco do frontend, ver src/load/supabase_uploader.py)
+# =============================================================================
+
+SUPABASE_URL = os.getenv("SUPABASE_URL") or os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+# Batches enviados ao mesmo tempo, tamanho inicial (ajustado pela latencia)
+# e tentativas por batch antes de ir para o journal
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+UPLOAD_BATCH_SIZE = int(os.getenv("UPLOAD_BATCH_SIZE", "500"))
+UPLOAD_MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", "5"))
+
+# Batches que falharam (JSON lines), reenviados com
+# python -m src.load.supabase_uploader replay
+UPLOAD_JOURNAL_PATH = Path(
+    os.getenv("UPLOAD_JOURNAL_PATH", str(PROCESSED_DATA_DIR / "supabase_failed.jsonl"))
+)
 
 # =============================================================================
 # QUALITY (Limites de qualidade de dados)
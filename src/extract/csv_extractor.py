@@ -1,15 +1,37 @@
+import hashlib
+import io
+import json
+import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from pathlib import Path
-from typing import Dict, Optional, Iterator, Union
+from typing import BinaryIO, Dict, List, Literal, Optional, Iterator, Tuple, Union
 import logging
 
-from src.config import RAW_DATA_DIR, CSV_FILES, CHUNK_SIZE
+from src.config import (
+    RAW_DATA_DIR, CSV_FILES, CHUNK_SIZE, CACHE_DIR, USE_PARQUET_CACHE, CSV_ENGINE
+)
+from src.models.schema import RAW_ARROW_TYPES, RAW_DTYPES
+from src.utils.instrumentation import instrumented
 
 # Configurar logging (registro de mensagens)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Chave, nos metadados do Parquet, com a "impressao digital" do CSV
+FINGERPRINT_KEY = b"climate_fingerprint"
+
+# Bytes do inicio e do fim do arquivo usados no hash da impressao digital
+FINGERPRINT_SAMPLE_BYTES = 1024 * 1024
+
+# Tamanho dos blocos lidos pelo leitor Arrow (cada bloco e parseado
+# em uma thread)
+ARROW_BLOCK_SIZE = 16 * 1024 * 1024
+
+
 class CSVExtractor:
     """
     Classe para extrair dados de arquivos CSV.
@@ -24,15 +46,34 @@ class CSVExtractor:
         df = extractor.extract("global")  # Extrai dados globais
     """
 
-    def __init__(self, data_dir: Optional[str] = None):
+    def __init__(
+        self,
+        data_dir: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        use_cache: bool = USE_PARQUET_CACHE,
+        engine: Literal['pandas', 'arrow'] = CSV_ENGINE
+    ):
         """
         Inicializa o extrator.
 
         Args:
             data_dir: Caminho para o diretorio com os CSVs.
                      Se nao informado, usa o padrao da config.
+            cache_dir: Onde guardar as copias Parquet dos CSVs.
+                     Se nao informado, usa CACHE_DIR da config.
+            use_cache: Se False, sempre le direto do CSV.
+            engine: Leitor usado nos CSVs
+                - 'pandas': pd.read_csv (uma thread)
+                - 'arrow': leitor CSV do pyarrow (multithread), com os
+                  tipos de RAW_ARROW_TYPES. Devolve os mesmos dtypes.
         """
+        if engine not in ('pandas', 'arrow'):
+            raise ValueError(f"Engine '{engine}' invalido. Opcoes: 'pandas', 'arrow'")
+
         self.data_dir = Path(data_dir) if data_dir else RAW_DATA_DIR
+        self.cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+        self.use_cache = use_cache
+        self.engine = engine
         self.file_configs = CSV_FILES
 
         logger.info(f"Extrator inicializado. Diretorio: {self.data_dir}")
@@ -65,20 +106,32 @@ class CSVExtractor:
 
         return filepath
 
+    @instrumented('extract')
     def extract(
         self,
         source: str,
-        chunksize: Optional[int] = None
+        chunksize: Optional[int] = None,
+        columns: Optional[List[str]] = None
     ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
         """
         Extrai dados de um arquivo CSV.
 
+        As colunas ja saem com os tipos compactos de RAW_DTYPES
+        (category para textos repetidos, float32 para temperaturas).
+
+        Na primeira leitura de cada fonte, grava uma copia Parquet
+        (colunar e ja tipada) no diretorio de cache. As leituras
+        seguintes usam essa copia, que e muito mais rapida que
+        reparsear o CSV. Se o CSV mudar, o cache e refeito.
+
         Args:
             source: Nome da fonte ("global", "country", "state",
                    "major_city", "city")
             chunksize: Se informado, retorna um iterator que le
                       o arquivo em pedacos desse tamanho.
                       Util para arquivos grandes!
+            columns: Se informado, le apenas essas colunas (nomes
+                    originais do CSV, ex: ["dt", "City"]).
 
         Returns:
             DataFrame com os dados, ou Iterator se chunksize informado
@@ -90,31 +143,344 @@ class CSVExtractor:
             # Ler arquivo grande em chunks
             for chunk in extractor.extract("city", chunksize=500000):
                 process(chunk)
+
+            # Ler so as colunas necessarias
+            df = extractor.extract("city", columns=["dt", "AverageTemperature", "City"])
         """
         filepath = self._get_filepath(source)
 
         logger.info(f"Extraindo dados de: {filepath.name}")
 
-        # Configuracoes de leitura
-        read_params = {
-            "filepath_or_buffer": filepath,
-            "na_values": [""],      # Celulas vazias = NaN
-            "parse_dates": ["dt"],  # Converte coluna 'dt' para datetime
-            "low_memory": False,    # Evita warnings de tipos mistos
-        }
+        cache_path = self._get_cache(source, filepath) if self.use_cache else None
+
+        if cache_path is not None:
+            if chunksize:
+                logger.info(f"Lendo cache Parquet em chunks de {chunksize} linhas")
+                return self._iter_parquet(cache_path, chunksize, columns)
+
+            df = pq.read_table(cache_path, columns=columns).to_pandas()
+            logger.info(f"Extraidos {len(df)} registros de {source} (cache)")
+            return df
 
-        # Adiciona chunksize se informado
         if chunksize:
-            read_params["chunksize"] = chunksize
             logger.info(f"Lendo em chunks de {chunksize} linhas")
 
-        df = pd.read_csv(**read_params)
+        df = self._read_csv(filepath, chunksize, columns)
 
         if not chunksize:
             logger.info(f"Extraidos {len(df)} registros de {source}")
 
         return df
 
+    def _read_csv(
+        self,
+        filepath: Path,
+        chunksize: Optional[int] = None,
+        columns: Optional[List[str]] = None
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """Le o CSV com o engine configurado (inteiro ou em chunks)."""
+        if self.engine == 'arrow':
+            if chunksize:
+                return self._iter_arrow_csv(filepath, chunksize, columns)
+            return pa_csv.read_csv(
+                filepath, **self._arrow_options(filepath, columns)
+            ).to_pandas()
+
+        read_params = self._read_params(filepath, columns)
+        if chunksize:
+            read_params["chunksize"] = chunksize
+        return pd.read_csv(**read_params)
+
+    @staticmethod
+    def _arrow_options(
+        filepath: Union[Path, BinaryIO],
+        columns: Optional[List[str]] = None
+    ) -> Dict:
+        """Opcoes do leitor Arrow equivalentes a _read_params."""
+        convert_options = pa_csv.ConvertOptions(
+            column_types=RAW_ARROW_TYPES,
+            strings_can_be_null=True,  # Celulas vazias = NaN, como no pandas
+        )
+
+        if columns is not None:
+            # Mesma ordem de colunas do arquivo (como o usecols do pandas)
+            if isinstance(filepath, Path):
+                with open(filepath, 'rb') as f:
+                    header = f.readline()
+            else:
+                header = filepath.readline()
+                filepath.seek(0)
+            names = header.decode('utf-8').strip().split(',')
+            convert_options.include_columns = [c for c in names if c in columns]
+
+        return {
+            "read_options": pa_csv.ReadOptions(block_size=ARROW_BLOCK_SIZE),
+            "convert_options": convert_options,
+        }
+
+    def _iter_arrow_csv(
+        self,
+        filepath: Path,
+        chunksize: int,
+        columns: Optional[List[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Le o CSV em streaming com o Arrow, em chunks de `chunksize` linhas.
+
+        O open_csv devolve blocos de ARROW_BLOCK_SIZE bytes; os blocos
+        sao acumulados e fatiados para ter o mesmo tamanho de chunk do
+        pd.read_csv.
+        """
+        reader = pa_csv.open_csv(filepath, **self._arrow_options(filepath, columns))
+
+        pending: List[pa.RecordBatch] = []
+        rows = 0
+        for batch in reader:
+            pending.append(batch)
+            rows += batch.num_rows
+
+            while rows >= chunksize:
+                table = pa.Table.from_batches(pending, schema=reader.schema)
+                yield table.slice(0, chunksize).to_pandas()
+                rest = table.slice(chunksize)
+                pending = rest.to_batches()
+                rows = rest.num_rows
+
+        if rows:
+            yield pa.Table.from_batches(pending, schema=reader.schema).to_pandas()
+
+    @staticmethod
+    def _read_params(filepath: Path, columns: Optional[List[str]] = None) -> Dict:
+        """Parametros do pd.read_csv usados em todas as leituras."""
+        read_params = {
+            "filepath_or_buffer": filepath,
+            "na_values": [""],      # Celulas vazias = NaN
+            "low_memory": False,    # Evita warnings de tipos mistos
+            "dtype": RAW_DTYPES,    # Tipos compactos (colunas ausentes sao ignoradas)
+        }
+
+        # Converte coluna 'dt' para datetime
+        if columns is None or "dt" in columns:
+            read_params["parse_dates"] = ["dt"]
+
+        if columns is not None:
+            read_params["usecols"] = columns
+
+        return read_params
+
+    @staticmethod
+    def _iter_parquet(
+        cache_path: Path,
+        chunksize: int,
+        columns: Optional[List[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Le o Parquet em pedacos de ate `chunksize` linhas.
+
+        Os pedacos nunca atravessam um row group (gravados com
+        CHUNK_SIZE linhas), entao o ultimo de cada grupo pode ser menor.
+        """
+        parquet_file = pq.ParquetFile(cache_path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+
+    def _fingerprint(self, filepath: Path) -> Dict:
+        """
+        "Impressao digital" do CSV para invalidar o cache.
+
+        Usa tamanho, data de modificacao e um hash do inicio e do fim
+        do arquivo (hashear os 500 MB inteiros a cada leitura anularia
+        o ganho do cache).
+        """
+        stat = filepath.stat()
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(filepath, 'rb') as f:
+            digest.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+            if stat.st_size > FINGERPRINT_SAMPLE_BYTES:
+                f.seek(max(stat.st_size - FINGERPRINT_SAMPLE_BYTES, FINGERPRINT_SAMPLE_BYTES))
+                digest.update(f.read())
+
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": digest.hexdigest(),
+            # Mudar o plano de tipos tambem invalida o cache
+            "dtypes": RAW_DTYPES,
+        }
+
+    @staticmethod
+    def _cache_stem(source: str, filepath: Path) -> str:
+        """
+        Nome base dos arquivos de cache de uma fonte.
+
+        Inclui um hash do caminho do CSV: extratores com data_dirs
+        diferentes dividem o mesmo cache_dir sem sobrescrever um ao outro.
+        """
+        path_hash = hashlib.blake2b(
+            str(filepath.resolve()).encode("utf-8"), digest_size=6
+        ).hexdigest()
+        return f"{source}-{path_hash}"
+
+    def _get_cache(self, source: str, filepath: Path) -> Optional[Path]:
+        """
+        Retorna o Parquet valido da fonte, criando se necessario.
+
+        Returns:
+            Caminho do Parquet, ou None se nao foi possivel usar o cache
+        """
+        cache_path = self.cache_dir / f"{self._cache_stem(source, filepath)}.parquet"
+        fingerprint = self._fingerprint(filepath)
+
+        if cache_path.exists():
+            try:
+                metadata = pq.read_schema(cache_path).metadata or {}
+                cached = json.loads(metadata.get(FINGERPRINT_KEY, b"{}"))
+            except (pa.ArrowInvalid, OSError, ValueError):
+                cached = {}
+
+            if cached == fingerprint:
+                return cache_path
+
+            logger.info(f"Cache de {source} desatualizado, recriando")
+
+        try:
+            self._build_cache(filepath, cache_path, fingerprint)
+        except OSError as e:
+            logger.warning(f"Nao foi possivel gravar o cache de {source}: {e}")
+            return None
+
+        return cache_path
+
+    def _build_cache(self, filepath: Path, cache_path: Path, fingerprint: Dict) -> None:
+        """
+        Converte o CSV em Parquet, chunk a chunk (memoria limitada).
+
+        Grava num arquivo temporario e so depois troca pelo definitivo,
+        para que uma execucao interrompida nao deixe cache corrompido.
+        """
+        logger.info(f"Criando cache Parquet de {filepath.name} em {cache_path}")
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".tmp{os.getpid()}")
+
+        writer = None
+        rows = 0
+        try:
+            for chunk in self._read_csv(filepath, chunksize=CHUNK_SIZE):
+                if writer is None:
+                    # O schema vem do primeiro chunk; colunas totalmente
+                    # vazias nele (tipo null) viram string e categorias
+                    # usam indices int32 (chunks seguintes podem ter mais
+                    # valores distintos que o primeiro)
+                    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                    for i, field in enumerate(schema):
+                        if pa.types.is_null(field.type):
+                            schema = schema.set(i, field.with_type(pa.string()))
+                        elif pa.types.is_dictionary(field.type):
+                            schema = schema.set(
+                                i, field.with_type(pa.dictionary(pa.int32(), pa.string()))
+                            )
+                    schema = schema.with_metadata({
+                        **(schema.metadata or {}),
+                        FINGERPRINT_KEY: json.dumps(fingerprint).encode(),
+                    })
+                    writer = pq.ParquetWriter(tmp_path, schema)
+
+                writer.write_table(
+                    pa.Table.from_pandas(chunk, schema=schema, preserve_index=False),
+                    row_group_size=CHUNK_SIZE
+                )
+                rows += len(chunk)
+        except Exception:
+            if writer is not None:
+                writer.close()
+                writer = None
+            tmp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            if writer is not None:
+                writer.close()
+
+        os.replace(tmp_path, cache_path)
+        logger.info(f"Cache criado: {rows} linhas")
+
+    def content_fingerprint(self, source: str) -> str:
+        """
+        Identifica o conteudo do CSV de uma fonte (tamanho + hash amostrado).
+
+        Ao contrario da chave do cache, ignora a data de modificacao:
+        copiar o mesmo arquivo para outro lugar nao muda o resultado.
+        """
+        fingerprint = self._fingerprint(self._get_filepath(source))
+        return f"{fingerprint['size']}-{fingerprint['hash']}"
+
+    def byte_ranges(self, source: str, chunk_rows: int = CHUNK_SIZE) -> List[Tuple[int, int]]:
+        """
+        Divide o CSV em faixas de bytes com ~chunk_rows linhas cada.
+
+        Cada faixa comeca no inicio de uma linha e termina logo apos um
+        "\n", entao pode ser lida de forma independente (por exemplo,
+        em outro processo) com read_byte_range. Os CSVs do Berkeley
+        Earth nao tem quebras de linha dentro de campos.
+
+        Args:
+            source: Nome da fonte
+            chunk_rows: Linhas aproximadas por faixa (estimadas pelo
+                tamanho medio das linhas no primeiro MB do arquivo)
+
+        Returns:
+            Lista de (inicio, fim) em bytes, na ordem do arquivo
+        """
+        filepath = self._get_filepath(source)
+        size = filepath.stat().st_size
+
+        with open(filepath, 'rb') as f:
+            start = len(f.readline())  # pula o header
+            sample = f.read(FINGERPRINT_SAMPLE_BYTES)
+            bytes_per_row = len(sample) / max(sample.count(b"\n"), 1)
+            chunk_bytes = max(int(chunk_rows * bytes_per_row), 1)
+
+            ranges = []
+            while start < size:
+                end = start + chunk_bytes
+                if end >= size:
+                    end = size
+                else:
+                    f.seek(end)
+                    f.readline()  # avanca ate o fim da linha
+                    end = f.tell()
+                ranges.append((start, end))
+                start = end
+
+        return ranges
+
+    def read_byte_range(
+        self,
+        source: str,
+        start: int,
+        end: int,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Le uma faixa de bytes do CSV (ver byte_ranges) como DataFrame.
+
+        Usa os mesmos parametros de leitura de extract (tipos, datas,
+        NaN). Sempre le o CSV, nunca o cache Parquet.
+        """
+        filepath = self._get_filepath(source)
+        with open(filepath, 'rb') as f:
+            header = f.readline()
+            f.seek(start)
+            body = f.read(end - start)
+
+        buffer = io.BytesIO(header + body)
+        if self.engine == 'arrow':
+            return pa_csv.read_csv(buffer, **self._arrow_options(buffer, columns)).to_pandas()
+
+        read_params = self._read_params(filepath, columns)
+        read_params["filepath_or_buffer"] = buffer
+        return pd.read_csv(**read_params)
+
     def extract_all_small(self) -> Dict[str, pd.DataFrame]:
         """
         Extrai todos os arquivos pequenos (tudo exceto 'city').
@@ -130,27 +496,145 @@ class CSVExtractor:
 
         return results
 
-    def get_file_info(self, source: str) -> Dict:
+    def get_file_info(self, source: str, profile: bool = False) -> Dict:
         """
         Retorna informacoes sobre um arquivo.
 
-        Util para saber o tamanho antes de processar.
+        Util para saber o tamanho antes de processar. A contagem de
+        linhas (e o perfil, se pedido) fica guardada em um JSON no
+        diretorio de cache junto com a impressao digital do CSV, entao
+        chamadas seguintes sao instantaneas enquanto o arquivo nao mudar.
+
+        Args:
+            source: Nome da fonte
+            profile: Se True, inclui em "profile" um perfil do arquivo
+                (locais distintos, periodo e % de nulos por coluna),
+                calculado em uma unica passada
+
+        Returns:
+            Dicionario com nome, caminho, linhas e tamanho do arquivo
         """
         filepath = self._get_filepath(source)
         config = self.file_configs[source]
 
-        # Conta linhas sem carregar tudo na memoria
-        with open(filepath, 'r') as f:
-            line_count = sum(1 for _ in f) - 1  # -1 pelo header
+        info_path = self.cache_dir / f"{self._cache_stem(source, filepath)}.info.json"
+        fingerprint = self._fingerprint(filepath)
+        cached = self._read_info_cache(info_path, fingerprint)
 
-        return {
+        missing = "rows" not in cached or (profile and "profile" not in cached)
+        if "rows" not in cached:
+            cached["rows"] = self._count_rows(filepath)
+        if profile and "profile" not in cached:
+            cached["profile"] = self._profile(source)
+        if missing:
+            # Acerto no cache nao regrava o JSON
+            self._write_info_cache(info_path, fingerprint, cached)
+
+        info = {
             "source": source,
             "filename": config["filename"],
             "description": config["description"],
             "filepath": str(filepath),
-            "actual_rows": line_count,
+            "actual_rows": cached["rows"],
             "file_size_mb": filepath.stat().st_size / (1024 * 1024),
         }
+        if profile:
+            info["profile"] = cached["profile"]
+        return info
+
+    @staticmethod
+    def _count_rows(filepath: Path, block_size: int = FINGERPRINT_SAMPLE_BYTES) -> int:
+        """
+        Conta as linhas de dados (sem o header) contando bytes "\n".
+
+        Le o arquivo em binario, em blocos: nao decodifica texto nem
+        cria uma string por linha.
+        """
+        newlines = 0
+        last = b"\n"
+        with open(filepath, 'rb') as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                newlines += block.count(b"\n")
+                last = block[-1:]
+
+        # Ultima linha sem "\n" no final tambem conta
+        lines = newlines + (last != b"\n")
+        return max(lines - 1, 0)  # -1 pelo header
+
+    def _profile(self, source: str) -> Dict:
+        """
+        Perfil do arquivo em uma unica passada (chunk a chunk).
+
+        Returns:
+            Dicionario com rows, distinct_locations, date_min, date_max
+            e null_pct (por coluna)
+        """
+        rows = 0
+        nulls: Dict[str, int] = {}
+        date_min, date_max = None, None
+        locations = []
+        location_cols: List[str] = []
+
+        for chunk in self.extract(source, chunksize=CHUNK_SIZE):
+            if not location_cols:
+                location_cols = [c for c in ['City', 'State', 'Country'] if c in chunk.columns]
+
+            rows += len(chunk)
+            for col, count in chunk.isna().sum().items():
+                nulls[col] = nulls.get(col, 0) + int(count)
+
+            if 'dt' in chunk.columns and chunk['dt'].notna().any():
+                low, high = chunk['dt'].min(), chunk['dt'].max()
+                date_min = low if date_min is None else min(date_min, low)
+                date_max = high if date_max is None else max(date_max, high)
+
+            if location_cols:
+                # Guarda so os locais distintos do chunk (poucos milhares)
+                locations.append(
+                    chunk[location_cols].astype(str).drop_duplicates()
+                )
+
+        distinct_locations = (
+            len(pd.concat(locations, ignore_index=True).drop_duplicates())
+            if locations else 1  # global: um unico "local"
+        )
+
+        return {
+            "rows": rows,
+            "distinct_locations": distinct_locations,
+            "date_min": date_min.date().isoformat() if date_min is not None else None,
+            "date_max": date_max.date().isoformat() if date_max is not None else None,
+            "null_pct": {
+                col: round(100 * count / rows, 2) if rows else 0.0
+                for col, count in nulls.items()
+            },
+        }
+
+    @staticmethod
+    def _read_info_cache(info_path: Path, fingerprint: Dict) -> Dict:
+        """Le o JSON de get_file_info se ele for do arquivo atual."""
+        try:
+            cached = json.loads(info_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+        if cached.get("fingerprint") != fingerprint:
+            return {}
+        return {k: v for k, v in cached.items() if k != "fingerprint"}
+
+    @staticmethod
+    def _write_info_cache(info_path: Path, fingerprint: Dict, info: Dict) -> None:
+        """Grava o JSON de get_file_info (falhas de escrita sao ignoradas)."""
+        try:
+            info_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = info_path.with_suffix(f".tmp{os.getpid()}")
+            tmp_path.write_text(json.dumps({"fingerprint": fingerprint, **info}))
+            os.replace(tmp_path, info_path)
+        except OSError as e:
+            logger.warning(f"Nao foi possivel gravar {info_path}: {e}")
 
     def preview(self, source: str, rows: int = 5) -> pd.DataFrame:
         """
@@ -159,4 +643,4 @@ class CSVExtractor:
         Util para verificar a estrutura sem carregar tudo.
         """
         filepath = self._get_filepath(source)
-        return pd.read_csv(filepath, nrows=rows)
\ No newline at end of file
+        return pd.read_csv(filepath, nrows=rows, dtype=RAW_DTYPES)
\ No newline at end of file
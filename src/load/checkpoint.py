@@ -0,0 +1,233 @@
+"""
+Checkpoints da carga da tabela fato, para retomar cargas interrompidas.
+
+A carga do arquivo de cidades leva horas. Sem checkpoint, se o
+processo morre no meio, rodar de novo duplica linhas (ou exige apagar
+a fonte e recomecar do zero).
+
+Cada chunk da tabela fato e gravado numa unica transacao junto com uma
+linha em climate.etl_checkpoint:
+
+    - chunk_index:          posicao do chunk no arquivo
+    - row_start, row_end:   faixa de linhas da tabela fato gerada
+    - row_count, content_hash: conteudo do chunk (soma dos hashes das
+                            linhas, como em src.load.incremental)
+    - fingerprint:          arquivo (tamanho + hash amostrado) e
+                            divisao em chunks usados na carga
+
+Como fato e checkpoint sao confirmados juntos, um chunk esta no banco
+se e somente se tem checkpoint. Com resume=True, os chunks ja gravados
+sao conferidos (faixa e hash) e pulados; o resto e carregado.
+
+Uso:
+    checkpoint = LoadCheckpoint(loader, 'city', fingerprint)
+    checkpoint.start(resume=True)
+    for fact, statements in checkpoint.pending(chunks):
+        loader.load_chunk(fact, 'fact_temperature', statements=statements)
+"""
+
+import logging
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from src.load.database_loader import DatabaseLoader, Statement
+from src.load.incremental import row_hashes
+
+logger = logging.getLogger(__name__)
+
+
+CHECKPOINT_TABLE = 'etl_checkpoint'
+
+CHECKPOINT_DDL = f"""
+CREATE TABLE IF NOT EXISTS {{schema}}.{CHECKPOINT_TABLE} (
+    source_file   VARCHAR(100) NOT NULL,
+    chunk_index   INTEGER NOT NULL,
+    row_start     BIGINT NOT NULL,
+    row_end       BIGINT NOT NULL,
+    row_count     BIGINT NOT NULL,
+    content_hash  BIGINT NOT NULL,
+    fingerprint   VARCHAR(200) NOT NULL,
+    loaded_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source_file, chunk_index)
+)
+"""
+
+
+def chunk_hash(fact: pd.DataFrame) -> int:
+    """Soma (mod 2^64) dos hashes das linhas, como BIGINT com sinal."""
+    total = row_hashes(fact).sum(dtype='uint64') if len(fact) else np.uint64(0)
+    return int(np.array([total], dtype='uint64').view('int64')[0])
+
+
+def load_fingerprint(file_fingerprint: str, chunk_size: int, layout: str) -> str:
+    """
+    Identifica uma carga: mesmo arquivo cortado nos mesmos chunks.
+
+    Args:
+        file_fingerprint: CSVExtractor.content_fingerprint da fonte
+        chunk_size: Linhas por chunk
+        layout: Como os chunks sao cortados ('rows' no extrator
+            sequencial, 'bytes' nas faixas de src.pipeline.parallel)
+    """
+    return f"{file_fingerprint}:{layout}:{chunk_size}"
+
+
+class LoadCheckpoint:
+    """
+    Registra os chunks ja gravados de uma fonte e pula os concluidos.
+
+    Nao carrega nada sozinho: pending() devolve, para cada chunk que
+    falta, o comando do checkpoint que deve ir na mesma transacao
+    (DatabaseLoader.load_chunk ou load_chunks_parallel).
+    """
+
+    def __init__(self, loader: DatabaseLoader, source_file: str, fingerprint: str):
+        """
+        Args:
+            loader: DatabaseLoader ja configurado
+            source_file: Valor de source_file das linhas desta fonte
+            fingerprint: Identificacao da carga (ver load_fingerprint)
+        """
+        self.loader = loader
+        self.source_file = source_file
+        self.fingerprint = fingerprint
+
+        # chunk_index -> (row_start, row_end, content_hash) ja gravados
+        self.completed: Dict[int, Tuple[int, int, int]] = {}
+        self.skipped_chunks = 0
+        self.skipped_rows = 0
+
+    @property
+    def _table(self) -> str:
+        return f"{self.loader.schema}.{CHECKPOINT_TABLE}"
+
+    def ensure_table(self) -> None:
+        """Cria climate.etl_checkpoint se ainda nao existir."""
+        self.loader.run_statements([CHECKPOINT_DDL.format(schema=self.loader.schema)])
+
+    def read(self) -> pd.DataFrame:
+        """Le os checkpoints da fonte (um por chunk gravado)."""
+        with self.loader.engine.connect() as conn:
+            return pd.read_sql(
+                text(
+                    f"SELECT chunk_index, row_start, row_end, row_count, "
+                    f"content_hash, fingerprint FROM {self._table} "
+                    f"WHERE source_file = :source ORDER BY chunk_index"
+                ),
+                conn,
+                params={'source': self.source_file},
+            )
+
+    def start(self, resume: bool = False) -> int:
+        """
+        Prepara a carga.
+
+        Sem resume, apaga os checkpoints anteriores da fonte (a carga
+        comeca do zero). Com resume, le os chunks ja gravados.
+
+        Returns:
+            Numero de chunks que serao pulados
+
+        Raises:
+            ValueError: Se os checkpoints foram gravados com outro
+                arquivo ou outra divisao em chunks (retomar misturaria
+                cargas diferentes; recarregue a fonte sem resume)
+        """
+        self.ensure_table()
+        self.completed = {}
+        self.skipped_chunks = 0
+        self.skipped_rows = 0
+
+        if not resume:
+            with self.loader.engine.begin() as conn:
+                conn.execute(
+                    text(f"DELETE FROM {self._table} WHERE source_file = :source"),
+                    {'source': self.source_file}
+                )
+            return 0
+
+        done = self.read()
+        other = set(done['fingerprint']) - {self.fingerprint}
+        if other:
+            raise ValueError(
+                f"Checkpoints de {self.source_file} sao de outra carga "
+                f"({sorted(other)[0]} != {self.fingerprint}); "
+                f"o arquivo ou o chunk_size mudou, recarregue sem resume"
+            )
+
+        self.completed = {
+            int(row.chunk_index): (int(row.row_start), int(row.row_end), int(row.content_hash))
+            for row in done.itertuples(index=False)
+        }
+        logger.info(
+            f"Retomando {self.source_file}: {len(self.completed)} chunks ja gravados"
+        )
+        return len(self.completed)
+
+    def statements(
+        self,
+        chunk_index: int,
+        row_start: int,
+        fact: pd.DataFrame,
+        content_hash: int
+    ) -> List[Statement]:
+        """Comando que grava o checkpoint de um chunk."""
+        return [(
+            f"INSERT INTO {self._table} "
+            f"(source_file, chunk_index, row_start, row_end, row_count, "
+            f"content_hash, fingerprint) VALUES "
+            f"(:source, :chunk, :row_start, :row_end, :row_count, :content_hash, :fingerprint)",
+            {
+                'source': self.source_file,
+                'chunk': chunk_index,
+                'row_start': row_start,
+                'row_end': row_start + len(fact),
+                'row_count': len(fact),
+                'content_hash': content_hash,
+                'fingerprint': self.fingerprint,
+            },
+        )]
+
+    def pending(
+        self,
+        chunks: Iterable[pd.DataFrame]
+    ) -> Iterator[Tuple[pd.DataFrame, List[Statement]]]:
+        """
+        Filtra os chunks ja gravados.
+
+        Args:
+            chunks: Chunks da tabela fato, sempre na ordem do arquivo
+
+        Yields:
+            (chunk, comandos do checkpoint) para cada chunk que falta
+
+        Raises:
+            ValueError: Se um chunk ja gravado nao bate com o checkpoint
+                (mesma posicao, conteudo diferente)
+        """
+        row_start = 0
+        for chunk_index, fact in enumerate(chunks):
+            content_hash = chunk_hash(fact)
+            done = self.completed.get(chunk_index)
+
+            if done is None:
+                yield fact, self.statements(chunk_index, row_start, fact, content_hash)
+            elif done == (row_start, row_start + len(fact), content_hash):
+                self.skipped_chunks += 1
+                self.skipped_rows += len(fact)
+            else:
+                raise ValueError(
+                    f"Chunk {chunk_index} de {self.source_file} difere do checkpoint "
+                    f"(linhas {done[0]}-{done[1]}); recarregue sem resume"
+                )
+
+            row_start += len(fact)
+
+        if self.skipped_chunks:
+            logger.info(
+                f"{self.skipped_chunks} chunks ({self.skipped_rows} linhas) de "
+                f"{self.source_file} ja estavam gravados"
+            )
@@ -1,12 +1,34 @@
+import heapq
+import io
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 from sqlalchemy import create_engine, text
-from typing import Literal, Optional
+from typing import Dict, Iterable, List, Literal, Optional, Tuple
 import logging
 
-from src.config import POSTGRES_CONNECTION_STRING, BATCH_SIZE
+from src.config import (
+    POSTGRES_CONNECTION_STRING,
+    BATCH_SIZE,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    LOAD_WORKERS,
+    LOAD_MAX_RETRIES,
+)
+from src.utils.instrumentation import instrumented
 
 logger = logging.getLogger(__name__)
 
+# Comando SQL extra gravado junto com um chunk: (sql, parametros)
+Statement = Tuple[str, Dict]
+
 
 class DatabaseLoader:
     """
@@ -30,7 +52,18 @@ class DatabaseLoader:
         """
         self.connection_string = connection_string or POSTGRES_CONNECTION_STRING
         self.schema = schema
-        self.engine = create_engine(self.connection_string)
+        self.engine = create_engine(
+            self.connection_string,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+
+        # Chunks que falharam mesmo apos as tentativas (carga paralela).
+        # As linhas ficam gravadas em Parquet no disco, nao em memoria
+        self.failed_chunks: List[Dict] = []
+        self._spill_dir: Optional[str] = None
 
         logger.info(f"Conexao configurada para schema '{schema}'")
 
@@ -50,12 +83,34 @@ class DatabaseLoader:
             logger.error(f"Erro ao conectar: {e}")
             return False
 
+    def read_table(self, table_name: str) -> pd.DataFrame:
+        """Le uma tabela inteira do schema."""
+        return pd.read_sql_table(table_name, self.engine, schema=self.schema)
+
+    def query(self, sql: str) -> pd.DataFrame:
+        """Executa uma query e retorna o resultado como DataFrame."""
+        with self.engine.connect() as conn:
+            return pd.read_sql(text(sql), conn)
+
+    def run_statements(self, statements: List[str]) -> None:
+        """Executa varios comandos SQL numa unica transacao."""
+        with self.engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+
+    @instrumented('load')
     def load_dataframe(
         self,
         df: pd.DataFrame,
         table_name: str,
         if_exists: Literal['fail', 'replace', 'append'] = 'append',
-        chunk_size: Optional[int] = None
+        chunk_size: Optional[int] = None,
+        method: Literal['multi', 'copy'] = 'multi',
+        staging: bool = False,
+        conflict_columns: Optional[List[str]] = None,
+        on_conflict: Literal['nothing', 'update'] = 'nothing',
+        workers: Optional[int] = None,
+        statements: Optional[List[Statement]] = None
     ) -> int:
         """
         Carrega um DataFrame em uma tabela.
@@ -68,16 +123,52 @@ class DatabaseLoader:
                 - 'replace': Apaga e recria
                 - 'append': Adiciona aos dados existentes
             chunk_size: Tamanho do batch (util para tabelas grandes)
+            method: Como enviar as linhas
+                - 'multi': INSERT com varias linhas (to_sql)
+                - 'copy': COPY do PostgreSQL a partir de um buffer em
+                  memoria (muito mais rapido para tabelas grandes)
+            staging: Apenas com method='copy'. Copia tudo para uma
+                tabela UNLOGGED temporaria e depois faz um unico
+                INSERT ... SELECT ... ON CONFLICT no destino.
+            conflict_columns: Colunas do ON CONFLICT (ex: a UNIQUE
+                da tabela). Se nao informado, qualquer conflito e ignorado.
+            on_conflict: Com staging, o que fazer com linhas que ja existem
+                - 'nothing': Mantem a linha do banco
+                - 'update': Sobrescreve com a nova (upsert; exige
+                  conflict_columns)
+            workers: Se maior que 1, envia os chunks em paralelo por
+                varias conexoes do pool (ver load_chunks_parallel).
+            statements: Com staging, comandos (sql, parametros)
+                executados na transacao do INSERT ... SELECT, antes dele
+                (ex: apagar as linhas que o upsert vai substituir)
 
         Returns:
             Numero de linhas carregadas
         """
         chunk_size = chunk_size or BATCH_SIZE
 
+        if statements and not (method == 'copy' and staging):
+            raise ValueError("statements exige method='copy' e staging=True")
+
         logger.info(f"Carregando {len(df)} linhas em {self.schema}.{table_name}")
 
         total_rows = len(df)
 
+        if method == 'copy':
+            return self._load_with_copy(
+                df, table_name, if_exists, chunk_size, staging,
+                conflict_columns, on_conflict, workers, statements
+            )
+
+        if workers and workers > 1:
+            self._prepare_table(df, table_name, if_exists)
+            self._load_parallel(
+                self._iter_chunks(df, chunk_size), f"{self.schema}.{table_name}",
+                method, workers, total_rows=total_rows
+            )
+            logger.info(f"Carregamento concluido: {total_rows} linhas")
+            return total_rows
+
         # Para DataFrames grandes, processa em chunks
         if total_rows > chunk_size:
             loaded = 0
@@ -109,4 +200,443 @@ class DatabaseLoader:
             )
 
         logger.info(f"Carregamento concluido: {total_rows} linhas")
-        return total_rows
\ No newline at end of file
+        return total_rows
+
+    def load_chunks_parallel(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        table_name: str,
+        method: Literal['multi', 'copy'] = 'copy',
+        workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        max_retries: int = LOAD_MAX_RETRIES
+    ) -> int:
+        """
+        Carrega chunks em paralelo, cada um por uma conexao do pool.
+
+        Como funciona:
+        - Ate `workers` chunks sao enviados ao mesmo tempo
+        - No maximo `max_in_flight` chunks ficam em memoria esperando;
+          o proximo chunk so e lido do iterable quando um termina
+          (backpressure: funciona com os generators do pipeline)
+        - Cada chunk roda em sua propria transacao; se falhar, e
+          reenviado sozinho ate `max_retries` vezes. A espera entre
+          tentativas acontece no loop principal, sem ocupar conexao
+        - Chunks que falharem todas as tentativas sao gravados em
+          Parquet (self.failed_chunks guarda so o caminho) e podem ser
+          reenviados depois com retry_failed_chunks(), sem recarregar
+          a tabela inteira
+        - O progresso e reportado em ordem (chunks 0..N concluidos)
+
+        Args:
+            chunks: Iterable de DataFrames (lista ou generator). Cada
+                item tambem pode ser um par (DataFrame, comandos): os
+                comandos rodam na transacao do chunk (ver load_chunk)
+            table_name: Nome da tabela destino (ja existente)
+            method: 'copy' ou 'multi'
+            workers: Conexoes simultaneas (padrao: LOAD_WORKERS)
+            max_in_flight: Chunks em memoria (padrao: 2 x workers)
+            max_retries: Tentativas extras por chunk
+
+        Returns:
+            Numero de linhas carregadas
+
+        Raises:
+            RuntimeError: Se algum chunk falhou todas as tentativas
+                (os demais chunks sao carregados normalmente)
+        """
+        loaded = self._load_parallel(
+            chunks, f"{self.schema}.{table_name}", method,
+            workers, max_in_flight, max_retries
+        )
+        logger.info(f"Carregamento concluido: {loaded} linhas")
+        return loaded
+
+    def retry_failed_chunks(
+        self,
+        table_name: str,
+        method: Literal['multi', 'copy'] = 'copy'
+    ) -> int:
+        """
+        Reenvia os chunks que falharam na ultima carga paralela.
+
+        Returns:
+            Numero de linhas carregadas nesta tentativa
+        """
+        pending, self.failed_chunks = self.failed_chunks, []
+
+        logger.info(f"Reenviando {len(pending)} chunks para {self.schema}.{table_name}")
+        loaded = 0
+        for failure in pending:
+            chunk = pd.read_parquet(failure['path'])
+            try:
+                loaded += self._load_chunk(
+                    chunk, f"{self.schema}.{table_name}", method,
+                    statements=failure.get('statements')
+                )
+            except Exception as e:
+                logger.error(f"Chunk falhou novamente: {e}")
+                self.failed_chunks.append({**failure, 'error': str(e)})
+            else:
+                os.remove(failure['path'])
+
+        return loaded
+
+    def _spill_chunk(self, index: int, chunk: pd.DataFrame) -> str:
+        """
+        Grava um chunk que falhou em Parquet e retorna o caminho.
+
+        Assim self.failed_chunks nao segura DataFrames inteiros em
+        memoria pelo resto da carga.
+        """
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix='failed_chunks_')
+        path = os.path.join(self._spill_dir, f"chunk_{index:06d}_{time.time_ns()}.parquet")
+        chunk.to_parquet(path, index=False)
+        return path
+
+    def _load_parallel(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        qualified_table: str,
+        method: Literal['multi', 'copy'],
+        workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        max_retries: int = LOAD_MAX_RETRIES,
+        total_rows: Optional[int] = None
+    ) -> int:
+        """Implementacao de load_chunks_parallel (ver docstring de la)."""
+        workers = workers or LOAD_WORKERS
+        max_in_flight = max(max_in_flight or 2 * workers, workers)
+
+        pool_capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+        if workers > pool_capacity:
+            logger.warning(
+                f"{workers} workers mas o pool tem no maximo {pool_capacity} conexoes "
+                f"(DB_POOL_SIZE + DB_MAX_OVERFLOW); workers extras vao esperar"
+            )
+
+        self.failed_chunks = []
+        # future -> (indice do chunk, chunk, comandos extras, tentativa atual)
+        in_flight: Dict[Future, Tuple[int, pd.DataFrame, Optional[List[Statement]], int]] = {}
+        # Heap de reenvios aguardando o backoff:
+        # (horario de envio, indice, chunk, comandos extras, tentativa)
+        retries: List[Tuple[float, int, pd.DataFrame, Optional[List[Statement]], int]] = []
+        finished: Dict[int, int] = {}  # indice -> linhas (0 se falhou)
+        next_to_report = 0
+        loaded = 0
+
+        source = enumerate(chunks)
+        exhausted = False
+        start_time = time.perf_counter()
+
+        logger.info(f"Carga paralela em {qualified_table}: {workers} conexoes")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='loader') as executor:
+            while True:
+                # Reenvia os chunks cujo backoff ja terminou
+                now = time.monotonic()
+                while retries and retries[0][0] <= now:
+                    _, index, chunk, statements, attempt = heapq.heappop(retries)
+                    future = executor.submit(
+                        self._load_chunk, chunk, qualified_table, method, statements
+                    )
+                    in_flight[future] = (index, chunk, statements, attempt)
+
+                # Le novos chunks apenas se houver espaco (backpressure);
+                # chunks esperando reenvio tambem ocupam memoria
+                while not exhausted and len(in_flight) + len(retries) < max_in_flight:
+                    try:
+                        index, item = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    chunk, statements = item if isinstance(item, tuple) else (item, None)
+                    future = executor.submit(
+                        self._load_chunk, chunk, qualified_table, method, statements
+                    )
+                    in_flight[future] = (index, chunk, statements, 1)
+
+                if not in_flight and not retries:
+                    break
+
+                # Acorda no proximo reenvio mesmo que nada termine antes
+                timeout = max(retries[0][0] - time.monotonic(), 0) if retries else None
+                if not in_flight:
+                    time.sleep(timeout)
+                    continue
+
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, chunk, statements, attempt = in_flight.pop(future)
+                    try:
+                        finished[index] = future.result()
+                    except Exception as e:
+                        if attempt <= max_retries:
+                            delay = min(2 ** (attempt - 1), 30)
+                            logger.warning(
+                                f"Chunk {index} falhou (tentativa {attempt}): {e}. "
+                                f"Reenviando em {delay}s"
+                            )
+                            heapq.heappush(retries, (
+                                time.monotonic() + delay, index, chunk, statements, attempt + 1
+                            ))
+                        else:
+                            logger.error(f"Chunk {index} falhou apos {attempt} tentativas: {e}")
+                            self.failed_chunks.append({
+                                'index': index, 'rows': len(chunk), 'error': str(e),
+                                'path': self._spill_chunk(index, chunk),
+                                'statements': statements,
+                            })
+                            finished[index] = 0
+
+                # Progresso em ordem: so avanca quando o proximo chunk terminou
+                while next_to_report in finished:
+                    loaded += finished.pop(next_to_report)
+                    next_to_report += 1
+
+                    elapsed = time.perf_counter() - start_time
+                    rate = loaded / elapsed if elapsed > 0 else float('inf')
+                    progress = (
+                        f"{loaded}/{total_rows} ({loaded / total_rows * 100:.1f}%)"
+                        if total_rows else f"{loaded} linhas"
+                    )
+                    logger.info(
+                        f"Progresso: chunks 0-{next_to_report - 1} concluidos, "
+                        f"{progress} - {rate:,.0f} linhas/s"
+                    )
+
+        if self.failed_chunks:
+            failed_rows = sum(f['rows'] for f in self.failed_chunks)
+            raise RuntimeError(
+                f"{len(self.failed_chunks)} chunks ({failed_rows} linhas) falharam em "
+                f"{qualified_table}; use retry_failed_chunks() para reenviar"
+            )
+
+        return loaded
+
+    @staticmethod
+    def _iter_chunks(df: pd.DataFrame, chunk_size: int) -> Iterable[pd.DataFrame]:
+        """Fatia o DataFrame em pedacos de chunk_size linhas."""
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+
+    def _load_with_copy(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        if_exists: Literal['fail', 'replace', 'append'],
+        chunk_size: int,
+        staging: bool,
+        conflict_columns: Optional[List[str]],
+        on_conflict: Literal['nothing', 'update'] = 'nothing',
+        workers: Optional[int] = None,
+        statements: Optional[List[Statement]] = None
+    ) -> int:
+        """
+        Carrega usando COPY ... FROM STDIN (ver load_dataframe).
+
+        Cada chunk e serializado em CSV num buffer em memoria (sem
+        arquivos temporarios) e enviado com copy_expert do psycopg2.
+        """
+        total_rows = len(df)
+        target = f"{self.schema}.{table_name}"
+        columns = list(df.columns)
+
+        if on_conflict == 'update' and not conflict_columns:
+            raise ValueError("on_conflict='update' exige conflict_columns")
+
+        self._prepare_table(df, table_name, if_exists)
+
+        copy_target = target
+        if staging:
+            # Sufixo aleatorio: cargas simultaneas na mesma tabela (threads do
+            # mesmo processo ou containers com o mesmo pid) nao dividem a staging
+            copy_target = f"{self.schema}.{table_name}_staging_{uuid.uuid4().hex[:8]}"
+            column_list = ", ".join(f'"{c}"' for c in columns)
+            with self.engine.begin() as conn:
+                conn.execute(text(
+                    f"CREATE UNLOGGED TABLE {copy_target} AS "
+                    f"SELECT {column_list} FROM {target} WITH NO DATA"
+                ))
+
+        try:
+            if workers and workers > 1:
+                self._load_parallel(
+                    self._iter_chunks(df, chunk_size), copy_target, 'copy',
+                    workers, total_rows=total_rows
+                )
+            else:
+                loaded = 0
+                for chunk in self._iter_chunks(df, chunk_size):
+                    chunk_start = time.perf_counter()
+                    self._load_chunk(chunk, copy_target, 'copy')
+                    elapsed = time.perf_counter() - chunk_start
+
+                    loaded += len(chunk)
+                    progress = (loaded / total_rows) * 100
+                    rate = len(chunk) / elapsed if elapsed > 0 else float('inf')
+                    logger.info(
+                        f"Progresso: {loaded}/{total_rows} ({progress:.1f}%) "
+                        f"- {rate:,.0f} linhas/s"
+                    )
+
+            if staging:
+                self._merge_staging(
+                    copy_target, target, columns, conflict_columns, on_conflict, statements
+                )
+        finally:
+            if staging:
+                # Apaga mesmo se o COPY ou o merge falharem: o nome e unico
+                # por carga, entao o DROP da proxima carga nao a alcancaria
+                with self.engine.begin() as conn:
+                    conn.execute(text(f"DROP TABLE IF EXISTS {copy_target}"))
+
+        logger.info(f"Carregamento concluido: {total_rows} linhas")
+        return total_rows
+
+    def _prepare_table(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        if_exists: Literal['fail', 'replace', 'append']
+    ) -> None:
+        """COPY nao cria tabelas: usa o to_sql so para o DDL (0 linhas)."""
+        if if_exists != 'append':
+            df.head(0).to_sql(
+                table_name, self.engine, schema=self.schema,
+                if_exists=if_exists, index=False
+            )
+
+    @instrumented('load')
+    def load_chunk(
+        self,
+        chunk: pd.DataFrame,
+        table_name: str,
+        method: Literal['multi', 'copy'] = 'copy',
+        statements: Optional[List[Statement]] = None
+    ) -> int:
+        """
+        Carrega um DataFrame inteiro numa unica transacao.
+
+        Diferente de load_dataframe, nao fatia em batches: ou o chunk
+        inteiro (e os comandos extras) fica gravado, ou nada fica.
+
+        Args:
+            chunk: Linhas a carregar
+            table_name: Tabela destino (ja existente, sem schema)
+            method: 'copy' ou 'multi'
+            statements: Comandos (sql, parametros) executados na mesma
+                transacao depois das linhas, por exemplo o checkpoint
+                do chunk (ver src.load.checkpoint)
+
+        Returns:
+            Numero de linhas carregadas
+        """
+        return self._load_chunk(
+            chunk, f"{self.schema}.{table_name}", method, statements=statements
+        )
+
+    def _load_chunk(
+        self,
+        chunk: pd.DataFrame,
+        qualified_table: str,
+        method: Literal['multi', 'copy'],
+        statements: Optional[List[Statement]] = None
+    ) -> int:
+        """
+        Carrega um chunk em uma transacao propria.
+
+        Cada chamada pega sua propria conexao do pool, entao pode rodar
+        em paralelo com outras. Se falhar, nada do chunk fica gravado e
+        ele pode ser reenviado com seguranca.
+
+        Args:
+            chunk: Linhas a carregar
+            qualified_table: Tabela destino no formato "schema.tabela"
+            method: 'multi' (INSERT) ou 'copy' (COPY)
+            statements: Comandos (sql, parametros) da mesma transacao
+
+        Returns:
+            Numero de linhas carregadas
+        """
+        with self.engine.begin() as conn:
+            if method == 'copy':
+                # Cursor do psycopg2 na mesma conexao/transacao
+                cursor = conn.connection.cursor()
+                try:
+                    self._copy_chunk(cursor, chunk, qualified_table)
+                finally:
+                    cursor.close()
+            else:
+                schema, table_name = qualified_table.split('.', 1)
+                chunk.to_sql(
+                    table_name, conn, schema=schema,
+                    if_exists='append', index=False, method='multi'
+                )
+
+            for sql, params in statements or []:
+                conn.execute(text(sql), params)
+
+        return len(chunk)
+
+    @staticmethod
+    def _copy_chunk(cursor, chunk: pd.DataFrame, qualified_table: str) -> None:
+        """
+        Envia um chunk via COPY a partir de um buffer CSV em memoria.
+
+        O CSV e gerado pelo pyarrow (bem mais rapido que to_csv para
+        colunas float). Ele escreve nulos como campo vazio sem aspas e
+        strings vazias como "", que e exatamente o que o COPY em
+        FORMAT csv espera.
+        """
+        buffer = io.BytesIO()
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        pa_csv.write_csv(table, buffer, pa_csv.WriteOptions(include_header=False))
+        buffer.seek(0)
+
+        column_list = ", ".join(f'"{c}"' for c in chunk.columns)
+        cursor.copy_expert(
+            f"COPY {qualified_table} ({column_list}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+
+    def _merge_staging(
+        self,
+        staging_table: str,
+        target: str,
+        columns: List[str],
+        conflict_columns: Optional[List[str]],
+        on_conflict: Literal['nothing', 'update'] = 'nothing',
+        statements: Optional[List[Statement]] = None
+    ) -> None:
+        """
+        Move a staging para o destino com um unico INSERT ... SELECT.
+
+        Os comandos em `statements` rodam antes, na mesma transacao.
+        """
+        column_list = ", ".join(f'"{c}"' for c in columns)
+        conflict_target = (
+            "(" + ", ".join(f'"{c}"' for c in conflict_columns) + ") "
+            if conflict_columns else ""
+        )
+
+        action = "DO NOTHING"
+        if on_conflict == 'update':
+            updates = [c for c in columns if c not in conflict_columns]
+            action = "DO UPDATE SET " + ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in updates)
+
+        start = time.perf_counter()
+        with self.engine.begin() as conn:
+            for sql, params in statements or []:
+                conn.execute(text(sql), params)
+            result = conn.execute(text(
+                f"INSERT INTO {target} ({column_list}) "
+                f"SELECT {column_list} FROM {staging_table} "
+                f"ON CONFLICT {conflict_target}{action}"
+            ))
+
+        logger.info(
+            f"Staging -> {target}: {result.rowcount} linhas gravadas "
+            f"em {time.perf_counter() - start:.1f}s"
+        )
@@ -0,0 +1,297 @@
+"""
+Backend DuckDB: o mesmo star schema num arquivo local.
+
+Alternativa ao PostgreSQL para analise em um notebook/laptop e para
+testar o pipeline de ponta a ponta sem servidor. As tabelas
+dim_date, dim_location e fact_temperature tem as mesmas colunas do
+schema climate do PostgreSQL (docker/init-db.sql), entao as queries de
+sql/analytics rodam sem alteracao.
+
+Uso:
+    # Monta o banco a partir dos CSVs (ou do cache Parquet)
+    python -m src.load.duckdb_loader build global country city
+
+    # Roda as queries de um arquivo .sql
+    python -m src.load.duckdb_loader query sql/analytics/warming_trends.sql
+"""
+
+import argparse
+import logging
+from pathlib import Path
+from typing import Iterator, List, Literal, Optional, Union
+
+import duckdb
+import pandas as pd
+
+from src.config import CHUNK_SIZE, CSV_FILES, DUCKDB_PATH, SQL_DIR
+from src.utils.instrumentation import instrumented
+
+logger = logging.getLogger(__name__)
+
+
+# Linhas por vetor do DuckDB (unidade de fetch_df_chunk)
+DUCKDB_VECTOR_SIZE = 2048
+
+# Mesmo schema de docker/init-db.sql, com tipos do DuckDB. A tabela
+# fato nao tem UNIQUE/PRIMARY KEY: indices do DuckDB deixam a carga
+# em massa bem mais lenta e nao ajudam nas agregacoes.
+DUCKDB_DDL = """
+CREATE SCHEMA IF NOT EXISTS {schema};
+
+CREATE TABLE IF NOT EXISTS {schema}.dim_date (
+    date_id         INTEGER PRIMARY KEY,
+    full_date       DATE NOT NULL UNIQUE,
+    year            INTEGER NOT NULL,
+    month           INTEGER NOT NULL,
+    month_name      VARCHAR NOT NULL,
+    quarter         INTEGER NOT NULL,
+    decade          INTEGER NOT NULL,
+    century         INTEGER NOT NULL,
+    is_modern_era   BOOLEAN NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS {schema}.dim_location (
+    location_id     INTEGER PRIMARY KEY,
+    granularity     VARCHAR NOT NULL,
+    city            VARCHAR,
+    state           VARCHAR,
+    country         VARCHAR,
+    latitude        DECIMAL(9,6),
+    longitude       DECIMAL(9,6),
+    latitude_raw    VARCHAR,
+    longitude_raw   VARCHAR,
+    hemisphere_ns   VARCHAR,
+    hemisphere_ew   VARCHAR
+);
+
+CREATE SEQUENCE IF NOT EXISTS {schema}.fact_temperature_seq;
+
+CREATE TABLE IF NOT EXISTS {schema}.fact_temperature (
+    temperature_id              BIGINT DEFAULT nextval('{schema}.fact_temperature_seq'),
+    date_id                     INTEGER,
+    location_id                 INTEGER,
+    avg_temperature             DECIMAL(10,4),
+    avg_temperature_uncertainty DECIMAL(10,4),
+    land_max_temperature        DECIMAL(10,4),
+    land_max_temp_uncertainty   DECIMAL(10,4),
+    land_min_temperature        DECIMAL(10,4),
+    land_min_temp_uncertainty   DECIMAL(10,4),
+    land_ocean_avg_temperature  DECIMAL(10,4),
+    land_ocean_avg_temp_uncertainty DECIMAL(10,4),
+    source_file                 VARCHAR NOT NULL,
+    loaded_at                   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+class DuckDBLoader:
+    """
+    Carrega dados num arquivo DuckDB.
+
+    Tem a mesma interface basica do DatabaseLoader (load_dataframe,
+    read_table), entao pode ser usado pelo pipeline em streaming
+    (--backend duckdb).
+
+    Uso:
+        loader = DuckDBLoader()
+        loader.load_dataframe(df, 'dim_date')
+        results = loader.run_sql_file('sql/analytics/warming_trends.sql')
+    """
+
+    def __init__(
+        self,
+        database_path: Optional[Union[str, Path]] = None,
+        schema: str = 'climate'
+    ):
+        """
+        Abre (ou cria) o arquivo DuckDB e garante o schema.
+
+        Args:
+            database_path: Caminho do arquivo. Se nao informado, usa
+                DUCKDB_PATH da config. ":memory:" cria um banco em memoria.
+            schema: Schema onde ficam as tabelas.
+        """
+        self.database_path = str(database_path or DUCKDB_PATH)
+        self.schema = schema
+
+        if self.database_path != ':memory:':
+            if Path(self.database_path).stem == schema:
+                # O DuckDB usa o nome do arquivo como catalogo
+                raise ValueError(
+                    f"O arquivo DuckDB nao pode se chamar '{schema}.*' "
+                    f"(conflita com o schema '{schema}')"
+                )
+            Path(self.database_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = duckdb.connect(self.database_path)
+        self.conn.execute(DUCKDB_DDL.format(schema=schema))
+
+        logger.info(f"DuckDB aberto em '{self.database_path}' (schema '{schema}')")
+
+    def close(self) -> None:
+        """Fecha a conexao (grava tudo no arquivo)."""
+        self.conn.close()
+
+    @instrumented('load')
+    def load_dataframe(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        if_exists: Literal['fail', 'replace', 'append'] = 'append',
+        **kwargs
+    ) -> int:
+        """
+        Insere um DataFrame numa tabela do schema.
+
+        O DuckDB le o DataFrame direto da memoria (sem converter linha
+        a linha), entao nao ha chunks nem metodos de insercao:
+        argumentos como method/chunk_size do DatabaseLoader sao aceitos
+        e ignorados.
+
+        Args:
+            df: DataFrame com colunas iguais (ou subconjunto) as da tabela
+            table_name: Nome da tabela (sem schema)
+            if_exists: 'append' adiciona; 'replace' apaga as linhas
+                atuais antes (mantendo os tipos da tabela); 'fail' so
+                carrega se a tabela estiver vazia
+
+        Returns:
+            Numero de linhas inseridas
+        """
+        target = f"{self.schema}.{table_name}"
+
+        if if_exists == 'replace':
+            self.conn.execute(f"DELETE FROM {target}")
+        elif if_exists == 'fail':
+            existing = self.conn.execute(f"SELECT COUNT(*) FROM {target}").fetchone()[0]
+            if existing:
+                raise ValueError(f"Tabela {target} ja tem {existing} linhas")
+
+        columns = ", ".join(f'"{c}"' for c in df.columns)
+        self.conn.register('_incoming', df)
+        try:
+            self.conn.execute(
+                f"INSERT INTO {target} ({columns}) SELECT {columns} FROM _incoming"
+            )
+        finally:
+            self.conn.unregister('_incoming')
+
+        logger.info(f"{len(df)} linhas carregadas em {target}")
+        return len(df)
+
+    def delete_source(self, source_file: str) -> int:
+        """
+        Apaga as linhas de uma fonte da tabela fato.
+
+        A tabela fato do DuckDB nao tem UNIQUE, entao recarregar uma
+        fonte sem isso duplicaria as linhas.
+
+        Returns:
+            Numero de linhas apagadas
+        """
+        deleted = self.conn.execute(
+            f"DELETE FROM {self.schema}.fact_temperature WHERE source_file = ?",
+            [source_file]
+        ).fetchone()[0]
+        if deleted:
+            logger.info(f"{deleted} linhas antigas de {source_file} apagadas")
+        return deleted
+
+    def run_statements(self, statements: List[str]) -> None:
+        """Executa varios comandos SQL numa unica transacao."""
+        self.conn.begin()
+        try:
+            for statement in statements:
+                self.conn.execute(statement)
+        except Exception:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    def read_table(self, table_name: str) -> pd.DataFrame:
+        """Le uma tabela inteira do schema."""
+        return self.query(f"SELECT * FROM {self.schema}.{table_name}")
+
+    def query(self, sql: str) -> pd.DataFrame:
+        """Executa uma query e retorna o resultado como DataFrame."""
+        return self.conn.sql(sql).df()
+
+    def iter_query(self, sql: str, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """
+        Executa uma query e devolve o resultado em DataFrames de ate
+        ~chunk_size linhas, sem materializar o resultado inteiro.
+
+        Args:
+            sql: Query
+            chunk_size: Linhas por DataFrame (arredondado para multiplos
+                de 2048, o tamanho de vetor do DuckDB)
+        """
+        result = self.conn.execute(sql)
+        vectors = max(1, chunk_size // DUCKDB_VECTOR_SIZE)
+        while True:
+            chunk = result.fetch_df_chunk(vectors)
+            if chunk.empty:
+                return
+            yield chunk
+
+    def run_sql_file(self, path: Union[str, Path]) -> List[pd.DataFrame]:
+        """
+        Executa todas as queries de um arquivo .sql.
+
+        Args:
+            path: Caminho do arquivo (ex: sql/analytics/warming_trends.sql)
+
+        Returns:
+            Um DataFrame por comando que retorna linhas, na ordem do arquivo
+        """
+        sql = Path(path).read_text()
+        results = []
+        for statement in self.conn.extract_statements(sql):
+            relation = self.conn.sql(statement.query)
+            if relation is not None:
+                results.append(relation.df())
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Star schema climate em DuckDB.")
+    parser.add_argument("--database", help=f"Arquivo DuckDB (padrao: {DUCKDB_PATH})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Carrega fontes pelo pipeline em streaming")
+    build.add_argument("sources", nargs="+", choices=list(CSV_FILES.keys()))
+    build.add_argument("--data-dir", help="Diretorio dos CSVs")
+    build.add_argument("--chunk-size", type=int, help="Forca um tamanho de chunk")
+
+    query = subparsers.add_parser("query", help="Roda as queries de um arquivo .sql")
+    query.add_argument(
+        "path", nargs="?", default=str(SQL_DIR / "analytics" / "warming_trends.sql")
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from src.pipeline.streaming import run_streaming_pipeline
+
+        for source in args.sources:
+            run_streaming_pipeline(
+                source,
+                chunk_size=args.chunk_size,
+                data_dir=args.data_dir,
+                backend='duckdb',
+                duckdb_path=args.database,
+            )
+        return
+
+    loader = DuckDBLoader(args.database)
+    try:
+        for result in loader.run_sql_file(args.path):
+            print(result.to_string(index=False))
+            print()
+    finally:
+        loader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Layout fisico da tabela fato no PostgreSQL: particoes e indices.
+
+Dois recursos independentes:
+
+1. Particionamento (opcional): fact_temperature vira uma tabela
+   particionada por LIST (source_file), com uma particao por fonte
+   (fact_temperature_city, fact_temperature_global, ...). Recarregar
+   uma fonte vira um TRUNCATE da particao, e consultas por fonte/
+   granularidade leem so a particao dela.
+
+2. Indices fora da carga em massa: cada linha inserida atualiza todos
+   os indices e confere as chaves estrangeiras. Numa carga completa e
+   mais rapido apagar indices/constraints antes e recria-los no final
+   (um build ordenado por indice em vez de milhoes de insercoes).
+
+Indices da tabela fato:
+
+    - uq_fact_location_date_source: UNIQUE (location_id, date_id,
+      source_file). Chave natural (ON CONFLICT da carga incremental)
+      e, por comecar com (location_id, date_id), tambem o indice
+      composto do acesso mais comum: serie de uma localizacao por data.
+    - idx_fact_date: B-tree (date_id), para filtros por periodo. Nao e
+      BRIN: cidades e estados chegam em ordem de localizacao (cada uma
+      com sua serie inteira), entao cada faixa de blocos cobre quase
+      todas as datas e um BRIN nao descartaria quase nada.
+
+Uso:
+    python -m src.load.fact_layout partition        # migra para particoes
+    python -m src.load.fact_layout drop-indexes     # antes da carga
+    python -m src.load.fact_layout create-indexes --workers 4
+
+    # Ou direto no pipeline:
+    python -m src.pipeline.streaming city --bulk --workers 4
+"""
+
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from src.config import CSV_FILES, LOAD_WORKERS
+from src.load.database_loader import DatabaseLoader
+
+logger = logging.getLogger(__name__)
+
+
+FACT_TABLE = 'fact_temperature'
+
+# Chave natural: (location_id, date_id) na frente serve de indice composto
+FACT_UNIQUE = 'uq_fact_location_date_source'
+FACT_UNIQUE_COLUMNS = '(location_id, date_id, source_file)'
+
+# Nome -> definicao (sem o nome da tabela)
+FACT_INDEXES = {
+    'idx_fact_date': '(date_id)',
+}
+
+FACT_FOREIGN_KEYS = {
+    'fact_temperature_date_id_fkey':
+        'FOREIGN KEY (date_id) REFERENCES {schema}.dim_date(date_id)',
+    'fact_temperature_location_id_fkey':
+        'FOREIGN KEY (location_id) REFERENCES {schema}.dim_location(location_id)',
+}
+
+# Nomes usados antes deste layout (docker/init-db.sql antigo)
+LEGACY_INDEXES = ['idx_fact_location', 'idx_fact_date_brin']
+LEGACY_UNIQUE = 'fact_temperature_date_id_location_id_source_file_key'
+
+# Memoria por build de indice (cada worker usa a sua)
+INDEX_MAINTENANCE_WORK_MEM = '256MB'
+
+PARTITIONED_FACT_DDL = """
+CREATE TABLE {schema}.{table} (
+    temperature_id              SERIAL,
+    date_id                     INTEGER,
+    location_id                 INTEGER,
+    avg_temperature             DECIMAL(10,4),
+    avg_temperature_uncertainty DECIMAL(10,4),
+    land_max_temperature        DECIMAL(10,4),
+    land_max_temp_uncertainty   DECIMAL(10,4),
+    land_min_temperature        DECIMAL(10,4),
+    land_min_temp_uncertainty   DECIMAL(10,4),
+    land_ocean_avg_temperature  DECIMAL(10,4),
+    land_ocean_avg_temp_uncertainty DECIMAL(10,4),
+    source_file                 VARCHAR(100) NOT NULL,
+    loaded_at                   TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (temperature_id, source_file)
+) PARTITION BY LIST (source_file)
+"""
+
+
+def partition_name(source_file: Optional[str] = None) -> str:
+    """Nome da particao de uma fonte (None = particao DEFAULT)."""
+    return f"{FACT_TABLE}_{source_file or 'default'}"
+
+
+def fact_partitions(loader: DatabaseLoader) -> List[str]:
+    """
+    Particoes da tabela fato.
+
+    Returns:
+        Nomes das particoes (sem schema). Lista vazia se a tabela nao
+        for particionada.
+    """
+    with loader.engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:parent) "
+            "ORDER BY c.relname"
+        ), {'parent': f"{loader.schema}.{FACT_TABLE}"}).scalars().all()
+    return list(rows)
+
+
+def fact_constraints(loader: DatabaseLoader) -> List[str]:
+    """
+    Constraints da tabela fato e das particoes dela.
+
+    Returns:
+        Nomes das constraints (sem schema)
+    """
+    with loader.engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = to_regclass(:parent) "
+            "OR conrelid IN (SELECT inhrelid FROM pg_inherits "
+            "WHERE inhparent = to_regclass(:parent)) "
+            "ORDER BY conname"
+        ), {'parent': f"{loader.schema}.{FACT_TABLE}"}).scalars().all()
+    return list(rows)
+
+
+def drop_fact_indexes(loader: DatabaseLoader) -> None:
+    """
+    Remove indices secundarios, chave natural e chaves estrangeiras.
+
+    A chave primaria (temperature_id) fica: o valor vem de uma
+    sequencia, entao a insercao sempre cai no fim da arvore.
+    """
+    schema = loader.schema
+    target = f"{schema}.{FACT_TABLE}"
+
+    statements = [
+        f"ALTER TABLE {target} DROP CONSTRAINT IF EXISTS {name}"
+        for name in [FACT_UNIQUE, LEGACY_UNIQUE, *FACT_FOREIGN_KEYS]
+    ]
+    statements += [
+        f"DROP INDEX IF EXISTS {schema}.{name}"
+        for name in [*FACT_INDEXES, *LEGACY_INDEXES]
+    ]
+
+    loader.run_statements(statements)
+    logger.info(f"Indices e constraints de {target} removidos para a carga")
+
+
+def _build_index(loader: DatabaseLoader, statement: str) -> None:
+    """Roda um CREATE INDEX numa conexao propria."""
+    with loader.engine.begin() as conn:
+        conn.execute(text(f"SET LOCAL maintenance_work_mem = '{INDEX_MAINTENANCE_WORK_MEM}'"))
+        conn.execute(text(statement))
+
+
+def create_fact_indexes(loader: DatabaseLoader, workers: int = 1) -> None:
+    """
+    Recria indices, chave natural e chaves estrangeiras da tabela fato.
+
+    Os indices sao construidos em paralelo (uma conexao por indice, ate
+    `workers` ao mesmo tempo). Numa tabela particionada, cada particao
+    ganha seus indices em paralelo; depois o indice da tabela mae apenas
+    anexa os das particoes, sem reconstruir nada.
+
+    Indices e constraints que ja existem sao mantidos, entao da para
+    rodar de novo depois de uma recriacao interrompida.
+
+    Args:
+        loader: DatabaseLoader conectado ao PostgreSQL
+        workers: Builds de indice simultaneos
+    """
+    schema = loader.schema
+    target = f"{schema}.{FACT_TABLE}"
+    partitions = fact_partitions(loader)
+
+    # Um build por (tabela fisica, indice)
+    tables = partitions or [FACT_TABLE]
+    builds = []
+    for table in tables:
+        prefix = f"{table}_" if partitions else ""
+        builds.append(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {prefix}{FACT_UNIQUE} "
+            f"ON {schema}.{table} {FACT_UNIQUE_COLUMNS}"
+        )
+        builds += [
+            f"CREATE INDEX IF NOT EXISTS {prefix}{name} ON {schema}.{table} {definition}"
+            for name, definition in FACT_INDEXES.items()
+        ]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(lambda statement: _build_index(loader, statement), builds))
+    logger.info(
+        f"{len(builds)} indices construidos em {time.perf_counter() - start:.1f}s "
+        f"({workers} em paralelo)"
+    )
+
+    # Constraints e indices da tabela mae (rapido: reaproveita os de cima).
+    # A UNIQUE da mae so anexa indices que ja sejam constraints.
+    # ADD CONSTRAINT nao tem IF NOT EXISTS: as que ja existem sao puladas.
+    existing = set(fact_constraints(loader))
+    if partitions:
+        statements = [
+            f"ALTER TABLE {schema}.{table} ADD CONSTRAINT {table}_{FACT_UNIQUE} "
+            f"UNIQUE USING INDEX {table}_{FACT_UNIQUE}"
+            for table in partitions
+            if f"{table}_{FACT_UNIQUE}" not in existing
+        ]
+        if FACT_UNIQUE not in existing:
+            statements.append(
+                f"ALTER TABLE {target} ADD CONSTRAINT {FACT_UNIQUE} UNIQUE {FACT_UNIQUE_COLUMNS}"
+            )
+        statements += [
+            f"CREATE INDEX IF NOT EXISTS {name} ON {target} {definition}"
+            for name, definition in FACT_INDEXES.items()
+        ]
+    else:
+        statements = []
+        if FACT_UNIQUE not in existing:
+            statements.append(
+                f"ALTER TABLE {target} ADD CONSTRAINT {FACT_UNIQUE} UNIQUE USING INDEX {FACT_UNIQUE}"
+            )
+    statements += [
+        f"ALTER TABLE {target} ADD CONSTRAINT {name} {definition.format(schema=schema)}"
+        for name, definition in FACT_FOREIGN_KEYS.items()
+        if name not in existing
+    ]
+
+    start = time.perf_counter()
+    loader.run_statements(statements)
+    logger.info(f"Constraints de {target} recriadas em {time.perf_counter() - start:.1f}s")
+
+
+def clear_source(loader: DatabaseLoader, source_file: str) -> None:
+    """
+    Apaga as linhas de uma fonte da tabela fato.
+
+    Com particoes e um TRUNCATE da particao (instantaneo); sem, um DELETE.
+    """
+    partition = partition_name(source_file)
+    if partition in fact_partitions(loader):
+        loader.run_statements([f"TRUNCATE {loader.schema}.{partition}"])
+    else:
+        with loader.engine.begin() as conn:
+            conn.execute(
+                text(f"DELETE FROM {loader.schema}.{FACT_TABLE} WHERE source_file = :source"),
+                {'source': source_file}
+            )
+    logger.info(f"Linhas antigas de {source_file} apagadas")
+
+
+def partition_fact_table(loader: DatabaseLoader, workers: int = 1) -> None:
+    """
+    Converte fact_temperature numa tabela particionada por source_file.
+
+    As linhas existentes sao copiadas (mantendo temperature_id) e a
+    tabela antiga e apagada. Nao faz nada se ja estiver particionada.
+
+    Args:
+        loader: DatabaseLoader conectado ao PostgreSQL
+        workers: Builds de indice simultaneos no final
+    """
+    if fact_partitions(loader):
+        logger.info("Tabela fato ja esta particionada")
+        return
+
+    schema = loader.schema
+    target = f"{schema}.{FACT_TABLE}"
+    old = f"{FACT_TABLE}_unpartitioned"
+
+    # Sem indices/constraints os nomes ficam livres para a tabela nova
+    drop_fact_indexes(loader)
+
+    partitions = [
+        f"CREATE TABLE {schema}.{partition_name(source)} "
+        f"PARTITION OF {target} FOR VALUES IN ('{source}')"
+        for source in CSV_FILES
+    ]
+    partitions.append(f"CREATE TABLE {schema}.{partition_name()} PARTITION OF {target} DEFAULT")
+
+    start = time.perf_counter()
+    loader.run_statements([
+        f"ALTER TABLE {target} RENAME TO {old}",
+        f"ALTER TABLE {schema}.{old} RENAME CONSTRAINT {FACT_TABLE}_pkey TO {old}_pkey",
+        f"ALTER SEQUENCE {schema}.{FACT_TABLE}_temperature_id_seq "
+        f"RENAME TO {old}_temperature_id_seq",
+        PARTITIONED_FACT_DDL.format(schema=schema, table=FACT_TABLE),
+        *partitions,
+        f"INSERT INTO {target} SELECT * FROM {schema}.{old}",
+        f"SELECT setval('{schema}.{FACT_TABLE}_temperature_id_seq', "
+        f"COALESCE((SELECT MAX(temperature_id) FROM {target}), 0) + 1, false)",
+        f"DROP TABLE {schema}.{old}",
+    ])
+    logger.info(
+        f"{target} particionada por source_file ({len(partitions)} particoes) "
+        f"em {time.perf_counter() - start:.1f}s"
+    )
+
+    create_fact_indexes(loader, workers)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Particoes e indices da tabela fato.")
+    parser.add_argument("command", choices=["partition", "drop-indexes", "create-indexes"])
+    parser.add_argument(
+        "--workers", type=int, default=LOAD_WORKERS,
+        help=f"Builds de indice simultaneos (padrao: {LOAD_WORKERS})"
+    )
+    args = parser.parse_args(argv)
+
+    loader = DatabaseLoader()
+    if args.command == "partition":
+        partition_fact_table(loader, args.workers)
+    elif args.command == "drop-indexes":
+        drop_fact_indexes(loader)
+    else:
+        create_fact_indexes(loader, args.workers)
+
+
+if __name__ == "__main__":
+    main()
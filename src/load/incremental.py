@@ -0,0 +1,415 @@
+"""
+Carga incremental (delta) da tabela fato.
+
+Em vez de recarregar tudo a cada execucao, guarda em climate.etl_state
+uma "marca d'agua" por particao (fonte + localizacao):
+
+    - max_date:     ultima data ja carregada
+    - content_hash: soma dos hashes de todas as linhas carregadas
+    - row_count:    quantas linhas foram carregadas
+
+Como o hash e uma soma (ordem nao importa), ele pode ser acumulado
+chunk a chunk. Na execucao seguinte cada particao cai em um caso:
+
+    - new:     localizacao nunca carregada -> carrega tudo
+    - skip:    nada mudou -> nao carrega nada
+    - append:  historico igual, so ha meses novos -> carrega apos max_date
+    - reload:  historico mudou (revisao de dados) -> regrava a particao
+
+As linhas selecionadas sao gravadas com upsert (ON CONFLICT DO UPDATE),
+entao uma atualizacao mensal toca milhares de linhas, nao milhoes. Nas
+particoes em reload as linhas antigas sao apagadas antes, na transacao
+do primeiro upsert: linhas que sairam da fonte nao ficam no banco.
+"""
+
+import logging
+from typing import Callable, Iterable, List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from src.load.database_loader import DatabaseLoader, Statement
+from src.transform.transformers import FACT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+STATE_TABLE = 'etl_state'
+
+# Chave natural da tabela fato (UNIQUE no banco)
+FACT_CONFLICT_COLUMNS = ['date_id', 'location_id', 'source_file']
+
+# Colunas que entram no hash de cada linha. source_file fica de fora
+# porque ja faz parte da chave da particao.
+HASH_COLUMNS = [c for c in FACT_COLUMNS if c != 'source_file']
+
+# Mesma precisao das colunas DECIMAL(10,4) do banco
+HASH_DECIMALS = 4
+
+SUMMARY_COLUMNS = [
+    'location_id', 'max_date', 'row_count', 'content_hash',
+    'prefix_count', 'prefix_hash',
+]
+
+STATE_DDL = f"""
+CREATE TABLE IF NOT EXISTS {{schema}}.{STATE_TABLE} (
+    source_file   VARCHAR(100) NOT NULL,
+    location_id   INTEGER NOT NULL,
+    max_date      DATE NOT NULL,
+    content_hash  BIGINT NOT NULL,
+    row_count     BIGINT NOT NULL,
+    updated_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source_file, location_id)
+)
+"""
+
+
+def row_hashes(fact: pd.DataFrame) -> np.ndarray:
+    """
+    Calcula um hash (uint64) por linha da tabela fato.
+
+    Os valores sao normalizados antes (IDs em int64, medidas em float64
+    arredondadas), entao o hash nao muda se o dtype do chunk mudar.
+
+    Args:
+        fact: DataFrame com as colunas de FACT_COLUMNS
+
+    Returns:
+        Array uint64 com um hash por linha
+    """
+    normalized = pd.DataFrame({
+        col: (
+            fact[col].to_numpy(dtype='int64')
+            if col.endswith('_id')
+            else np.round(fact[col].to_numpy(dtype='float64'), HASH_DECIMALS)
+        )
+        for col in HASH_COLUMNS
+    })
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+def _fact_dates(fact: pd.DataFrame, dim_date: pd.DataFrame) -> np.ndarray:
+    """Converte date_id de cada linha na data (datetime64) de dim_date."""
+    date_index = pd.Index(dim_date['date_id'].to_numpy(dtype='int64'))
+    positions = date_index.get_indexer(fact['date_id'].to_numpy(dtype='int64'))
+    if (positions < 0).any():
+        raise ValueError("date_id da tabela fato ausente em dim_date")
+    return pd.to_datetime(dim_date['full_date']).to_numpy()[positions]
+
+
+def _watermark_per_row(location_ids: np.ndarray, state: pd.DataFrame) -> np.ndarray:
+    """Marca d'agua (max_date do estado) de cada linha; NaT se nao houver."""
+    if state.empty:
+        return np.full(len(location_ids), np.datetime64('NaT'), dtype='datetime64[ns]')
+
+    index = pd.Index(state['location_id'].to_numpy(dtype='int64'))
+    positions = index.get_indexer(location_ids)
+    watermarks = pd.to_datetime(state['max_date']).to_numpy(dtype='datetime64[ns]')
+
+    result = watermarks[np.maximum(positions, 0)]
+    result[positions < 0] = np.datetime64('NaT')
+    return result
+
+
+def summarize_partitions(
+    fact: pd.DataFrame,
+    dim_date: pd.DataFrame,
+    state: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Resume um chunk da tabela fato por localizacao.
+
+    Alem do resumo completo (max_date, row_count, content_hash), calcula
+    o "prefixo": as mesmas somas apenas para linhas ate a marca d'agua
+    do estado anterior. Se o prefixo bate com o estado, o historico ja
+    carregado nao mudou.
+
+    Args:
+        fact: Chunk da tabela fato (de uma unica fonte)
+        dim_date: Dimensao de datas (date_id -> full_date)
+        state: Estado anterior da fonte (ver IncrementalLoader.read_state)
+
+    Returns:
+        DataFrame com SUMMARY_COLUMNS. Os hashes sao uint64 e podem ser
+        somados entre chunks com merge_summaries.
+    """
+    if fact.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    location_ids = fact['location_id'].to_numpy(dtype='int64')
+    dates = _fact_dates(fact, dim_date)
+    hashes = row_hashes(fact)
+
+    watermarks = _watermark_per_row(location_ids, state)
+    in_prefix = dates <= watermarks  # NaT -> False
+
+    parts = pd.DataFrame({
+        'location_id': location_ids,
+        'max_date': dates,
+        'row_count': np.ones(len(fact), dtype='int64'),
+        'content_hash': hashes,
+        'prefix_count': in_prefix.astype('int64'),
+        'prefix_hash': np.where(in_prefix, hashes, np.uint64(0)),
+    })
+    return _aggregate(parts)
+
+
+def _aggregate(parts: pd.DataFrame) -> pd.DataFrame:
+    """Soma contagens/hashes (mod 2^64) e pega a maior data por localizacao."""
+    return parts.groupby('location_id', sort=True).agg(
+        max_date=('max_date', 'max'),
+        row_count=('row_count', 'sum'),
+        content_hash=('content_hash', 'sum'),
+        prefix_count=('prefix_count', 'sum'),
+        prefix_hash=('prefix_hash', 'sum'),
+    ).reset_index()[SUMMARY_COLUMNS]
+
+
+def merge_summaries(summaries: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Junta os resumos de varios chunks em um so."""
+    frames = [s for s in summaries if not s.empty]
+    if not frames:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    return _aggregate(pd.concat(frames, ignore_index=True))
+
+
+def plan_partitions(summary: pd.DataFrame, state: pd.DataFrame) -> pd.DataFrame:
+    """
+    Decide o que carregar em cada particao (localizacao).
+
+    Args:
+        summary: Resumo da fonte atual (merge_summaries)
+        state: Estado anterior da fonte
+
+    Returns:
+        DataFrame com location_id, action ('new', 'skip', 'append' ou
+        'reload') e cutoff: carrega linhas com data > cutoff
+        (NaT = carrega a particao inteira).
+    """
+    # Tipos nullable: no merge com localizacoes novas um uint64 comum
+    # viraria float64 e perderia os bits baixos do hash
+    if state.empty:
+        previous = pd.DataFrame({
+            'location_id': pd.Series(dtype='int64'),
+            'state_date': pd.Series(dtype='datetime64[ns]'),
+            'state_hash': pd.Series(dtype='UInt64'),
+            'state_count': pd.Series(dtype='Int64'),
+        })
+    else:
+        previous = pd.DataFrame({
+            'location_id': state['location_id'].to_numpy(dtype='int64'),
+            'state_date': pd.to_datetime(state['max_date']).to_numpy(dtype='datetime64[ns]'),
+            # BIGINT do banco -> mesmos bits em uint64
+            'state_hash': pd.array(
+                state['content_hash'].to_numpy(dtype='int64').view('uint64'), dtype='UInt64'
+            ),
+            'state_count': pd.array(state['row_count'].to_numpy(dtype='int64'), dtype='Int64'),
+        })
+
+    plan = summary[['location_id', 'row_count', 'prefix_count', 'prefix_hash']].astype({
+        'location_id': 'int64', 'row_count': 'int64',
+        'prefix_count': 'int64', 'prefix_hash': 'uint64',
+    }).merge(previous, on='location_id', how='left')
+
+    known = plan['state_count'].notna().to_numpy()
+    history_same = known & (
+        (plan['prefix_count'] == plan['state_count'])
+        & (plan['prefix_hash'] == plan['state_hash'])
+    ).fillna(False).to_numpy(dtype=bool)
+    has_new_rows = (plan['row_count'] > plan['prefix_count']).to_numpy()
+
+    plan['action'] = np.select(
+        [~known, history_same & ~has_new_rows, history_same],
+        ['new', 'skip', 'append'],
+        default='reload'
+    )
+    plan['cutoff'] = plan['state_date'].where(plan['action'] == 'append')
+
+    return plan[['location_id', 'action', 'cutoff']]
+
+
+def select_rows(
+    fact: pd.DataFrame,
+    dim_date: pd.DataFrame,
+    plan: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Filtra um chunk da tabela fato de acordo com o plano.
+
+    Returns:
+        Apenas as linhas que precisam ser gravadas
+    """
+    if fact.empty:
+        return fact
+
+    location_ids = fact['location_id'].to_numpy(dtype='int64')
+    positions = pd.Index(plan['location_id'].to_numpy(dtype='int64')).get_indexer(location_ids)
+
+    load_partition = (plan['action'] != 'skip').to_numpy()
+    cutoffs = plan['cutoff'].to_numpy(dtype='datetime64[ns]')
+
+    # Localizacao fora do plano: nao estava no resumo, nao carrega
+    found = positions >= 0
+    safe = np.maximum(positions, 0)
+
+    keep = found & load_partition[safe]
+    row_cutoff = cutoffs[safe]
+    limited = ~np.isnat(row_cutoff)
+    if limited.any():
+        dates = _fact_dates(fact, dim_date)
+        keep &= ~limited | (dates > row_cutoff)
+
+    return fact[keep]
+
+
+class IncrementalLoader:
+    """
+    Carrega a tabela fato de forma incremental usando climate.etl_state.
+
+    Uso:
+        incremental = IncrementalLoader(loader, dim_date, 'city')
+        incremental.load(lambda: gerar_chunks_da_tabela_fato())
+
+    A funcao passada para load() e chamada duas vezes: uma para resumir
+    as particoes e outra para carregar apenas as linhas selecionadas.
+    """
+
+    def __init__(
+        self,
+        loader: DatabaseLoader,
+        dim_date: pd.DataFrame,
+        source_file: str
+    ):
+        """
+        Args:
+            loader: DatabaseLoader ja configurado
+            dim_date: Dimensao de datas completa (incluindo a do banco)
+            source_file: Valor de source_file das linhas desta fonte
+        """
+        self.loader = loader
+        self.dim_date = dim_date
+        self.source_file = source_file
+
+        # Localizacoes que receberam linhas na ultima chamada de load()
+        self.touched_locations: List[int] = []
+
+    @property
+    def _state_table(self) -> str:
+        return f"{self.loader.schema}.{STATE_TABLE}"
+
+    def ensure_state_table(self) -> None:
+        """Cria climate.etl_state se ainda nao existir."""
+        with self.loader.engine.begin() as conn:
+            conn.execute(text(STATE_DDL.format(schema=self.loader.schema)))
+
+    def read_state(self) -> pd.DataFrame:
+        """Le o estado da fonte (uma linha por localizacao ja carregada)."""
+        with self.loader.engine.connect() as conn:
+            return pd.read_sql(
+                text(
+                    f"SELECT location_id, max_date, content_hash, row_count "
+                    f"FROM {self._state_table} WHERE source_file = :source"
+                ),
+                conn,
+                params={'source': self.source_file},
+            )
+
+    def load(self, chunk_factory: Callable[[], Iterable[pd.DataFrame]]) -> int:
+        """
+        Carrega apenas as linhas novas ou alteradas.
+
+        Args:
+            chunk_factory: Funcao sem argumentos que devolve um iteravel
+                de chunks da tabela fato (deve poder ser chamada 2 vezes)
+
+        Returns:
+            Numero de linhas gravadas na tabela fato
+        """
+        self.ensure_state_table()
+        state = self.read_state()
+
+        summary = merge_summaries(
+            summarize_partitions(fact, self.dim_date, state)
+            for fact in chunk_factory()
+        )
+        plan = plan_partitions(summary, state)
+        self.touched_locations = plan.loc[
+            plan['action'] != 'skip', 'location_id'
+        ].astype(int).tolist()
+
+        counts = plan['action'].value_counts().to_dict()
+        logger.info(
+            f"Plano incremental de {self.source_file}: "
+            + ", ".join(f"{action}={counts.get(action, 0)}"
+                        for action in ('new', 'append', 'reload', 'skip'))
+        )
+
+        if (plan['action'] == 'skip').all():
+            logger.info("Nenhuma particao mudou, nada a carregar")
+            return 0
+
+        # Particoes em reload: as linhas antigas saem junto com o
+        # primeiro upsert (mesma transacao), senao linhas removidas da
+        # fonte ficariam no banco com o estado novo dizendo o contrario.
+        # Toda particao em reload tem linhas, entao ha um primeiro upsert.
+        pending_deletes = self._reload_statements(plan)
+
+        total = 0
+        for fact in chunk_factory():
+            rows = select_rows(fact, self.dim_date, plan)
+            if rows.empty:
+                continue
+
+            rows = rows.assign(loaded_at=pd.Timestamp.now())
+            self.loader.load_dataframe(
+                rows, 'fact_temperature',
+                method='copy',
+                staging=True,
+                conflict_columns=FACT_CONFLICT_COLUMNS,
+                on_conflict='update',
+                statements=pending_deletes,
+            )
+            pending_deletes = []
+            total += len(rows)
+
+        # O estado so e gravado depois dos fatos: se algo falhar no meio,
+        # a proxima execucao refaz o plano e o upsert torna a carga idempotente
+        self._save_state(summary, plan)
+
+        logger.info(f"Carga incremental de {self.source_file}: {total} linhas gravadas")
+        return total
+
+    def _reload_statements(self, plan: pd.DataFrame) -> List[Statement]:
+        """DELETE das linhas ja carregadas das particoes em reload."""
+        reload_ids = plan.loc[plan['action'] == 'reload', 'location_id'].astype(int).tolist()
+        if not reload_ids:
+            return []
+        return [(
+            f"DELETE FROM {self.loader.schema}.fact_temperature "
+            f"WHERE source_file = :source AND location_id = ANY(:location_ids)",
+            {'source': self.source_file, 'location_ids': reload_ids},
+        )]
+
+    def _save_state(self, summary: pd.DataFrame, plan: pd.DataFrame) -> None:
+        """Grava o novo estado das particoes que mudaram."""
+        changed = summary[(plan['action'] != 'skip').to_numpy()]
+        if changed.empty:
+            return
+
+        new_state = pd.DataFrame({
+            'source_file': self.source_file,
+            'location_id': changed['location_id'].to_numpy(dtype='int64'),
+            'max_date': pd.to_datetime(changed['max_date']).dt.date.to_numpy(),
+            # uint64 -> BIGINT com os mesmos bits
+            'content_hash': changed['content_hash'].to_numpy(dtype='uint64').view('int64'),
+            'row_count': changed['row_count'].to_numpy(dtype='int64'),
+            'updated_at': pd.Timestamp.now(),
+        })
+        self.loader.load_dataframe(
+            new_state, STATE_TABLE,
+            method='copy',
+            staging=True,
+            conflict_columns=['source_file', 'location_id'],
+            on_conflict='update',
+        )
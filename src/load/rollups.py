@@ -0,0 +1,301 @@
+"""
+Tabelas de agregados (rollups) da tabela fato.
+
+As queries de tendencia agregam a tabela fato inteira (milhoes de
+linhas) a cada execucao. Os rollups guardam o resultado pronto por
+localizacao:
+
+    - agg_location_year:   localizacao x ano
+    - agg_location_decade: localizacao x decada
+    - agg_location_month:  localizacao x mes do ano (climatologia)
+
+Cada linha tem media, minimo, maximo e numero de medicoes de
+avg_temperature, e a incerteza media. Linhas com avg_temperature nulo
+ficam de fora (como nas queries de sql/analytics).
+
+Uma localizacao pode receber a mesma data de duas fontes: major_city
+vira granularidade 'city' (GRANULARITY_MAP), entao uma cidade grande
+carregada de city e major_city tem um unico location_id. Para nao
+contar essas medicoes duas vezes, cada (location_id, date_id) entra uma
+vez so, da fonte preferida em ROLLUP_SOURCE_PRIORITY.
+
+Depois de uma carga, apenas as localizacoes que receberam linhas sao
+recalculadas (DELETE + INSERT ... SELECT dentro do banco).
+
+A partir de agg_location_year tambem e mantida climate.location_trend:
+a reta de tendencia (OLS) de cada localizacao, calculada em NumPy por
+src.transform.trends. A rota de tendencia da API le uma linha dessa
+tabela em vez de baixar a serie mensal e ajustar a reta a cada request.
+
+Uso:
+    refresh_rollups(loader, location_ids=[1, 2, 3])  # so esses locais
+    refresh_rollups(loader)                          # tudo
+    refresh_location_trends(loader, location_ids=[1, 2, 3])
+
+    python -m src.load.rollups                       # tudo, PostgreSQL
+    python -m src.load.rollups --backend duckdb
+"""
+
+import argparse
+import logging
+import time
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.load.database_loader import DatabaseLoader
+from src.load.duckdb_loader import DuckDBLoader
+from src.transform.trends import compute_location_trends
+
+logger = logging.getLogger(__name__)
+
+
+# Tabela de rollup -> coluna de dim_date usada no agrupamento
+ROLLUPS = {
+    'agg_location_year': 'year',
+    'agg_location_decade': 'decade',
+    'agg_location_month': 'month',
+}
+
+# Acima disso, recalcula tudo em vez de filtrar por localizacao
+MAX_TOUCHED_LOCATIONS = 50_000
+
+ROLLUP_DDL = """
+CREATE TABLE IF NOT EXISTS {schema}.{table} (
+    location_id       INTEGER NOT NULL,
+    {period}          INTEGER NOT NULL,
+    measurement_count INTEGER NOT NULL,
+    avg_temperature   {number},
+    min_temperature   {number},
+    max_temperature   {number},
+    avg_uncertainty   {number},
+    PRIMARY KEY (location_id, {period})
+)
+"""
+
+# Fonte usada quando a mesma (localizacao, data) vem de mais de uma.
+# city primeiro: e o arquivo completo, major_city e um recorte dele.
+ROLLUP_SOURCE_PRIORITY = ['city', 'major_city', 'state', 'country', 'global']
+
+ROLLUP_INSERT = """
+INSERT INTO {schema}.{table}
+    (location_id, {period}, measurement_count,
+     avg_temperature, min_temperature, max_temperature, avg_uncertainty)
+SELECT
+    f.location_id,
+    d.{period},
+    COUNT(*),
+    AVG(f.avg_temperature),
+    MIN(f.avg_temperature),
+    MAX(f.avg_temperature),
+    AVG(f.avg_temperature_uncertainty)
+FROM (
+    -- Uma linha por (localizacao, data), da fonte preferida.
+    -- ROW_NUMBER em vez de DISTINCT ON: no DuckDB < 1.5 a ordem do
+    -- DISTINCT ON se perde quando a subconsulta entra no JOIN/GROUP BY.
+    SELECT
+        f.location_id, f.date_id, f.avg_temperature, f.avg_temperature_uncertainty,
+        ROW_NUMBER() OVER (
+            PARTITION BY f.location_id, f.date_id ORDER BY {source_rank}
+        ) AS rn
+    FROM {schema}.fact_temperature f
+    WHERE f.avg_temperature IS NOT NULL {location_filter}
+) f
+JOIN {schema}.dim_date d ON f.date_id = d.date_id
+WHERE f.rn = 1
+GROUP BY f.location_id, d.{period}
+"""
+
+
+TREND_TABLE = 'location_trend'
+
+LOCATION_TREND_DDL = """
+CREATE TABLE IF NOT EXISTS {schema}.location_trend (
+    location_id             INTEGER PRIMARY KEY,
+    year_start              INTEGER NOT NULL,
+    year_end                INTEGER NOT NULL,
+    n_years                 INTEGER NOT NULL,
+    data_points             INTEGER NOT NULL,
+    slope                   DOUBLE PRECISION NOT NULL,
+    intercept               DOUBLE PRECISION NOT NULL,
+    r_squared               DOUBLE PRECISION NOT NULL,
+    warming_rate_per_decade DOUBLE PRECISION NOT NULL,
+    slope_stderr            DOUBLE PRECISION,
+    mean_temperature        DOUBLE PRECISION,
+    min_temperature         DOUBLE PRECISION,
+    max_temperature         DOUBLE PRECISION
+)
+"""
+
+
+Loader = Union[DatabaseLoader, DuckDBLoader]
+
+
+def _source_rank() -> str:
+    """Expressao SQL com a posicao de f.source_file em ROLLUP_SOURCE_PRIORITY."""
+    cases = " ".join(
+        f"WHEN '{source}' THEN {rank}" for rank, source in enumerate(ROLLUP_SOURCE_PRIORITY)
+    )
+    return f"CASE f.source_file {cases} ELSE {len(ROLLUP_SOURCE_PRIORITY)} END"
+
+
+def _number_type(loader: Loader) -> str:
+    """NUMERIC guarda a media exata no PostgreSQL; DOUBLE no DuckDB."""
+    return 'DOUBLE' if isinstance(loader, DuckDBLoader) else 'NUMERIC'
+
+
+def rollup_statements(
+    schema: str,
+    location_ids: Optional[Iterable[int]] = None,
+    number_type: str = 'NUMERIC'
+) -> List[str]:
+    """
+    Comandos SQL que (re)criam os rollups.
+
+    Args:
+        schema: Schema das tabelas
+        location_ids: Localizacoes a recalcular. None = todas.
+        number_type: Tipo das colunas de temperatura
+
+    Returns:
+        Lista de comandos, para rodar numa unica transacao
+    """
+    if location_ids is None:
+        location_filter = ""
+        delete_filter = ""
+    else:
+        ids = ", ".join(str(int(i)) for i in location_ids)
+        location_filter = f"AND f.location_id IN ({ids})"
+        delete_filter = f" WHERE location_id IN ({ids})"
+
+    statements = []
+    for table, period in ROLLUPS.items():
+        names = dict(schema=schema, table=table, period=period)
+        statements.append(ROLLUP_DDL.format(number=number_type, **names))
+        statements.append(f"DELETE FROM {schema}.{table}{delete_filter}")
+        statements.append(ROLLUP_INSERT.format(
+            location_filter=location_filter, source_rank=_source_rank(), **names
+        ))
+    return statements
+
+
+def refresh_rollups(
+    loader: Loader,
+    location_ids: Optional[Iterable[int]] = None
+) -> None:
+    """
+    Atualiza os rollups depois de uma carga.
+
+    Args:
+        loader: DatabaseLoader (PostgreSQL) ou DuckDBLoader
+        location_ids: Localizacoes que receberam linhas na carga.
+            None recalcula tudo; vazio nao faz nada.
+    """
+    location_ids = _normalize_ids(location_ids)
+    if location_ids is not None and len(location_ids) == 0:
+        logger.info("Nenhuma localizacao alterada, rollups mantidos")
+        return
+
+    scope = "todas" if location_ids is None else f"{len(location_ids)}"
+    start = time.perf_counter()
+
+    loader.run_statements(
+        rollup_statements(loader.schema, location_ids, _number_type(loader))
+    )
+
+    logger.info(
+        f"Rollups atualizados ({scope} localizacoes) "
+        f"em {time.perf_counter() - start:.1f}s"
+    )
+
+
+def _normalize_ids(location_ids: Optional[Iterable[int]]) -> Optional[np.ndarray]:
+    """IDs unicos; None (tudo) se forem muitos para um IN (...)."""
+    if location_ids is None:
+        return None
+    location_ids = np.unique(np.fromiter(location_ids, dtype='int64'))
+    if len(location_ids) > MAX_TOUCHED_LOCATIONS:
+        return None
+    return location_ids
+
+
+def refresh_location_trends(
+    loader: Loader,
+    location_ids: Optional[Iterable[int]] = None
+) -> None:
+    """
+    Recalcula climate.location_trend a partir de agg_location_year.
+
+    Deve rodar depois de refresh_rollups.
+
+    Args:
+        loader: DatabaseLoader (PostgreSQL) ou DuckDBLoader
+        location_ids: Localizacoes a recalcular. None recalcula tudo;
+            vazio nao faz nada.
+    """
+    location_ids = _normalize_ids(location_ids)
+    if location_ids is not None and len(location_ids) == 0:
+        return
+
+    start = time.perf_counter()
+    where = ""
+    if location_ids is not None:
+        where = f" WHERE location_id IN ({', '.join(str(i) for i in location_ids)})"
+
+    yearly = loader.query(
+        f"SELECT location_id, year, measurement_count, avg_temperature, "
+        f"min_temperature, max_temperature "
+        f"FROM {loader.schema}.agg_location_year{where}"
+    )
+    trends = compute_location_trends(yearly)
+
+    loader.run_statements([
+        LOCATION_TREND_DDL.format(schema=loader.schema),
+        f"DELETE FROM {loader.schema}.{TREND_TABLE}{where}",
+    ])
+    if len(trends):
+        loader.load_dataframe(trends, TREND_TABLE)
+
+    logger.info(
+        f"{TREND_TABLE} atualizada ({len(trends)} localizacoes) "
+        f"em {time.perf_counter() - start:.1f}s"
+    )
+
+
+def location_coverage(loader: Loader) -> pd.Series:
+    """
+    Numero de medicoes (nao nulas) de cada localizacao, lido do rollup anual.
+
+    Returns:
+        Series indexada por location_id
+    """
+    coverage = loader.query(
+        f"SELECT location_id, SUM(measurement_count) AS measurements "
+        f"FROM {loader.schema}.agg_location_year GROUP BY location_id"
+    )
+    return coverage.set_index('location_id')['measurements'].astype('int64')
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Recalcula todos os rollups e a tabela de tendencias."""
+    parser = argparse.ArgumentParser(description="Recalcula as tabelas de rollup.")
+    parser.add_argument("--backend", choices=["postgres", "duckdb"], default="postgres")
+    parser.add_argument("--duckdb-path", help="Arquivo DuckDB (com --backend duckdb)")
+    args = parser.parse_args(argv)
+
+    if args.backend == 'duckdb':
+        loader = DuckDBLoader(args.duckdb_path)
+        try:
+            refresh_rollups(loader)
+            refresh_location_trends(loader)
+        finally:
+            loader.close()
+    else:
+        loader = DatabaseLoader()
+        refresh_rollups(loader)
+        refresh_location_trends(loader)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+"""
+Upload concorrente de tabelas para o Supabase (API REST do PostgREST).
+
+O script climate-web/scripts/migrate-to-supabase.py enviava batches de
+500 linhas um de cada vez e so imprimia o erro quando um batch falhava:
+a migracao completa levava horas e perdia dados sem avisar.
+
+SupabaseUploader envia os batches com asyncio + httpx:
+
+- Concorrencia: ate `concurrency` batches em voo ao mesmo tempo, numa
+  unica conexao HTTP/1.1 keep-alive por worker.
+- Tamanho adaptativo: cada batch bem-sucedido ajusta o tamanho dos
+  proximos para que a requisicao leve cerca de `target_latency_s`
+  (no maximo dobra ou cai pela metade de uma vez). Timeout, 5xx e 413
+  (payload grande demais) reduzem o tamanho.
+- Retentativas: erros de rede, 408, 429 e 5xx sao reenviados com
+  backoff exponencial com jitter (respeitando Retry-After).
+- Journal: batches que esgotam as tentativas ou recebem um erro
+  definitivo (4xx) sao gravados em JSON lines (UPLOAD_JOURNAL_PATH) com
+  as linhas e o erro, e podem ser reenviados depois com replay().
+
+Os batches vao como upsert (Prefer: resolution=merge-duplicates):
+todas as tabelas do schema do Supabase tem chave unica, entao reenviar
+um batch que chegou a ser gravado (timeout depois do commit) nao
+duplica linhas.
+
+Uso:
+    uploader = SupabaseUploader(concurrency=8)
+    asyncio.run(uploader.upload('dim_date', frame_records(dim_date)))
+    asyncio.run(uploader.upload(
+        'fact_temperature', records, on_conflict='date_id,location_id,source_file'
+    ))
+
+    python -m src.load.supabase_uploader replay   # reenvia o journal
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import date, datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    SUPABASE_SERVICE_ROLE_KEY,
+    SUPABASE_URL,
+    UPLOAD_BATCH_SIZE,
+    UPLOAD_CONCURRENCY,
+    UPLOAD_JOURNAL_PATH,
+    UPLOAD_MAX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Respostas que valem nova tentativa (o resto dos 4xx e erro nos dados)
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Batch enviado: (tabela, colunas do on_conflict, linhas)
+Batch = Tuple[str, Optional[str], List[Dict]]
+
+
+def frame_records(df: pd.DataFrame) -> List[Dict]:
+    """
+    Converte um DataFrame em linhas prontas para JSON.
+
+    NaN/NaT viram None (null) e datas viram texto ISO; os tipos NumPy
+    viram tipos Python.
+    """
+    out = df.copy()
+    for column in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[column]):
+            out[column] = out[column].dt.strftime('%Y-%m-%d')
+    out = out.astype(object).where(out.notna(), None)
+    return out.to_dict('records')
+
+
+def _json_default(value):
+    """Tipos que json.dumps nao conhece (numpy, datas)."""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return value.isoformat()
+    raise TypeError(f"Tipo nao serializavel: {type(value).__name__}")
+
+
+def _dump_batch(batch: List[Dict]) -> str:
+    """
+    Serializa um batch para o corpo da requisicao.
+
+    Linhas vindas de frame_records ja trazem None no lugar de NaN; nas
+    demais (dicts montados a mao) os NaN viram null aqui, ja que JSON
+    nao tem NaN.
+    """
+    try:
+        return json.dumps(batch, default=_json_default, allow_nan=False)
+    except ValueError:
+        batch = [
+            {key: None if isinstance(value, float) and value != value else value
+             for key, value in row.items()}
+            for row in batch
+        ]
+        return json.dumps(batch, default=_json_default, allow_nan=False)
+
+
+class SupabaseUploader:
+    """
+    Envia linhas para tabelas do Supabase em batches concorrentes.
+
+    Acompanha o que foi enviado em `uploaded_rows` e as falhas em
+    `failed_batches` (tambem gravadas no journal).
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = SUPABASE_URL,
+        key: Optional[str] = SUPABASE_SERVICE_ROLE_KEY,
+        concurrency: int = UPLOAD_CONCURRENCY,
+        batch_size: int = UPLOAD_BATCH_SIZE,
+        min_batch_size: int = 50,
+        max_batch_size: int = 5_000,
+        target_latency_s: float = 2.0,
+        max_retries: int = UPLOAD_MAX_RETRIES,
+        backoff_s: float = 0.5,
+        max_backoff_s: float = 30.0,
+        timeout_s: float = 60.0,
+        journal_path: Optional[Union[str, Path]] = UPLOAD_JOURNAL_PATH
+    ):
+        """
+        Args:
+            url: URL do projeto (https://<id>.supabase.co)
+            key: Chave service_role (ignora RLS)
+            concurrency: Batches em voo ao mesmo tempo
+            batch_size: Tamanho inicial dos batches
+            min_batch_size: Menor tamanho no ajuste adaptativo
+            max_batch_size: Maior tamanho no ajuste adaptativo
+            target_latency_s: Duracao desejada de cada requisicao
+            max_retries: Tentativas extras por batch
+            backoff_s: Espera antes da primeira retentativa (dobra a cada uma)
+            max_backoff_s: Teto da espera entre tentativas
+            timeout_s: Timeout de cada requisicao
+            journal_path: Onde gravar os batches que falharam; None desliga
+
+        Raises:
+            ValueError: Se url ou key nao foram informadas
+        """
+        if not url or not key:
+            raise ValueError(
+                "Credenciais do Supabase ausentes: defina SUPABASE_URL e "
+                "SUPABASE_SERVICE_ROLE_KEY"
+            )
+
+        self.url = url.rstrip('/')
+        self.key = key
+        self.concurrency = concurrency
+        self.batch_size = min(max(batch_size, min_batch_size), max_batch_size)
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.target_latency_s = target_latency_s
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.timeout_s = timeout_s
+        self.journal_path = Path(journal_path) if journal_path else None
+
+        self.uploaded_rows = 0
+        self.retries = 0
+        self.failed_batches: List[Dict] = []
+
+    def _client(self):
+        # Import tardio: httpx so e necessario para a migracao
+        import httpx
+
+        return httpx.AsyncClient(
+            base_url=f"{self.url}/rest/v1",
+            headers={
+                'apikey': self.key,
+                'Authorization': f"Bearer {self.key}",
+                'Content-Type': 'application/json',
+                'Prefer': 'resolution=merge-duplicates,return=minimal',
+            },
+            timeout=self.timeout_s,
+            limits=httpx.Limits(max_connections=self.concurrency),
+        )
+
+    async def upload(
+        self,
+        table: str,
+        records: Union[pd.DataFrame, Iterable[Dict]],
+        on_conflict: Optional[str] = None
+    ) -> int:
+        """
+        Envia todas as linhas de uma tabela.
+
+        As linhas sao lidas do iteravel sob demanda, entao um gerador
+        nao precisa caber inteiro em memoria.
+
+        Args:
+            table: Tabela de destino (schema public do Supabase)
+            records: DataFrame ou linhas (dicts com as mesmas chaves)
+            on_conflict: Colunas da chave unica usada no upsert, quando
+                a linha nao traz a chave primaria (ex.: a fato, cujo
+                temperature_id e gerado pelo banco)
+
+        Returns:
+            Linhas gravadas (as que falharam vao para o journal)
+        """
+        if isinstance(records, pd.DataFrame):
+            records = frame_records(records)
+
+        start = time.perf_counter()
+        before_rows, before_failed = self.uploaded_rows, len(self.failed_batches)
+        await self._run(self._batches(table, iter(records), on_conflict))
+
+        rows = self.uploaded_rows - before_rows
+        failed = self.failed_batches[before_failed:]
+        logger.info(
+            f"{table}: {rows} linhas em {time.perf_counter() - start:.1f}s "
+            f"(batch final de {self.batch_size} linhas)"
+        )
+        if failed:
+            logger.error(
+                f"{table}: {len(failed)} batches ({sum(f['rows'] for f in failed)} linhas) "
+                f"falharam; reenvie com replay() / python -m src.load.supabase_uploader replay"
+            )
+        return rows
+
+    def _batches(
+        self,
+        table: str,
+        records: Iterator[Dict],
+        on_conflict: Optional[str]
+    ) -> Iterator[Batch]:
+        """Corta o proximo batch so quando um worker pede (tamanho atual)."""
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                return
+            yield table, on_conflict, batch
+
+    async def _run(self, batches: Iterator[Batch]) -> None:
+        """Workers que consomem batches do mesmo iterador ate acabar."""
+        async def worker(client) -> None:
+            # next() roda sem await no meio: dois workers nunca leem juntos
+            for table, on_conflict, batch in batches:
+                await self._send(client, table, on_conflict, batch)
+
+        async with self._client() as client:
+            await asyncio.gather(*(worker(client) for _ in range(self.concurrency)))
+
+    async def _send(
+        self,
+        client,
+        table: str,
+        on_conflict: Optional[str],
+        batch: List[Dict]
+    ) -> None:
+        """Envia um batch com retentativas; se nao der, grava no journal."""
+        import httpx
+
+        try:
+            body = _dump_batch(batch)
+        except (TypeError, ValueError) as e:
+            # Erro nos dados (infinito, tipo desconhecido): nao adianta
+            # reenviar, mas o batch nao pode derrubar os outros workers
+            self._journal(table, on_conflict, batch, f"JSON invalido: {e}", 0)
+            return
+        params = {'on_conflict': on_conflict} if on_conflict else None
+        error = None
+        attempt = 0
+
+        for attempt in range(1, self.max_retries + 2):
+            retry_after = None
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"/{table}", content=body, params=params)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+                self._shrink()
+            else:
+                if response.status_code < 300:
+                    self._adapt(len(batch), time.perf_counter() - start)
+                    self.uploaded_rows += len(batch)
+                    return
+
+                error = f"HTTP {response.status_code}: {response.text[:500]}"
+                if response.status_code == 413 and len(batch) > 1:
+                    # Grande demais: os proximos batches ficam menores e
+                    # este vai em duas metades
+                    self._shrink()
+                    middle = len(batch) // 2
+                    await self._send(client, table, on_conflict, batch[:middle])
+                    await self._send(client, table, on_conflict, batch[middle:])
+                    return
+                if response.status_code not in RETRYABLE_STATUS:
+                    break
+                if response.status_code != 429:
+                    self._shrink()
+                retry_after = response.headers.get('Retry-After')
+
+            if attempt <= self.max_retries:
+                self.retries += 1
+                delay = self._backoff(attempt, retry_after)
+                logger.warning(
+                    f"Batch de {len(batch)} linhas em {table} falhou (tentativa "
+                    f"{attempt}): {error}; nova tentativa em {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+
+        self._journal(table, on_conflict, batch, error, attempt)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Espera exponencial com jitter; Retry-After do servidor tem prioridade."""
+        delay = min(self.max_backoff_s, self.backoff_s * 2 ** (attempt - 1))
+        delay = random.uniform(delay / 2, delay)
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.max_backoff_s))
+            except ValueError:
+                pass
+        return delay
+
+    def _adapt(self, rows: int, elapsed: float) -> None:
+        """Aproxima a duracao das requisicoes de target_latency_s."""
+        factor = self.target_latency_s / max(elapsed, 1e-3)
+        size = int(rows * min(max(factor, 0.5), 2.0))
+        self.batch_size = min(max(size, self.min_batch_size), self.max_batch_size)
+
+    def _shrink(self) -> None:
+        self.batch_size = max(self.batch_size // 2, self.min_batch_size)
+
+    def _journal(
+        self,
+        table: str,
+        on_conflict: Optional[str],
+        batch: List[Dict],
+        error: Optional[str],
+        attempts: int
+    ) -> None:
+        """Registra um batch perdido (memoria e arquivo JSON lines)."""
+        logger.error(f"Batch de {len(batch)} linhas em {table} desistido: {error}")
+        self.failed_batches.append({
+            'table': table,
+            'rows': len(batch),
+            'error': error,
+            'attempts': attempts,
+        })
+        if self.journal_path is None:
+            return
+
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            'table': table,
+            'on_conflict': on_conflict,
+            'error': error,
+            'attempts': attempts,
+            'failed_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'records': batch,
+        }
+        try:
+            line = json.dumps(entry, default=_json_default)
+        except TypeError:
+            # Tipo desconhecido: grava como texto para nao perder o batch
+            line = json.dumps(entry, default=str)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+    async def replay(self, journal_path: Optional[Union[str, Path]] = None) -> int:
+        """
+        Reenvia os batches do journal.
+
+        O journal e renomeado para <journal>.replaying antes do envio;
+        o que falhar de novo volta para o journal original, e o arquivo
+        renomeado so e apagado no fim. Se o processo morrer no meio, o
+        proximo replay inclui o .replaying de novo (upsert: reenviar o
+        que ja foi gravado e inofensivo).
+
+        Returns:
+            Linhas gravadas
+        """
+        path = Path(journal_path) if journal_path else self.journal_path
+        if path is None:
+            raise ValueError("Nenhum journal informado")
+
+        replaying = path.with_name(path.name + '.replaying')
+        if path.exists():
+            with open(replaying, 'a', encoding='utf-8') as out, open(path, encoding='utf-8') as f:
+                out.write(f.read())
+            path.unlink()
+        if not replaying.exists():
+            logger.info(f"Journal {path} vazio: nada a reenviar")
+            return 0
+
+        self.journal_path = path
+        with open(replaying, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        logger.info(
+            f"Reenviando {len(entries)} batches "
+            f"({sum(len(e['records']) for e in entries)} linhas) de {path}"
+        )
+
+        before_rows, before_failed = self.uploaded_rows, len(self.failed_batches)
+        await self._run(
+            (entry['table'], entry.get('on_conflict'), entry['records']) for entry in entries
+        )
+        replaying.unlink()
+
+        still_failed = len(self.failed_batches) - before_failed
+        if still_failed:
+            logger.error(f"{still_failed} batches falharam de novo e voltaram para {path}")
+        return self.uploaded_rows - before_rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Linha de comando: replay do journal."""
+    parser = argparse.ArgumentParser(description="Upload concorrente para o Supabase.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay = commands.add_parser("replay", help="Reenvia os batches do journal")
+    replay.add_argument("--journal", default=str(UPLOAD_JOURNAL_PATH))
+    replay.add_argument("--concurrency", type=int, default=UPLOAD_CONCURRENCY)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    uploader = SupabaseUploader(concurrency=args.concurrency, journal_path=args.journal)
+    asyncio.run(uploader.replay())
+    if uploader.failed_batches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
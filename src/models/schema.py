@@ -0,0 +1,108 @@
+"""
+Plano de tipos (dtypes) compactos para os DataFrames do pipeline.
+
+Por padrao o pandas guarda textos repetidos milhoes de vezes (cidade,
+pais, coordenadas...) e numeros em 64 bits. Com tipos menores:
+
+    - category: cada texto distinto e guardado uma vez; as linhas so
+      guardam um codigo inteiro (ideal para baixa cardinalidade)
+    - float32: 4 bytes por valor; sobra precisao para temperaturas
+      com 3 casas decimais
+    - int16: anos (1743-2013) e meses cabem com folga
+
+Os planos sao declarativos (coluna -> dtype) e aplicados com
+apply_dtypes, que ignora colunas ausentes.
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+
+# Medidas de temperatura e incerteza dos CSVs brutos
+_RAW_MEASURES = [
+    'AverageTemperature', 'AverageTemperatureUncertainty',
+    'LandAverageTemperature', 'LandAverageTemperatureUncertainty',
+    'LandMaxTemperature', 'LandMaxTemperatureUncertainty',
+    'LandMinTemperature', 'LandMinTemperatureUncertainty',
+    'LandAndOceanAverageTemperature', 'LandAndOceanAverageTemperatureUncertainty',
+]
+
+# Textos de baixa cardinalidade dos CSVs brutos
+_RAW_CATEGORIES = ['City', 'State', 'Country', 'Latitude', 'Longitude']
+
+# Plano aplicado na leitura dos CSVs (nomes originais das colunas)
+RAW_DTYPES: Dict[str, str] = {
+    **{col: 'float32' for col in _RAW_MEASURES},
+    **{col: 'category' for col in _RAW_CATEGORIES},
+}
+
+# Unidade que o pandas usa ao converter textos em datas ('ns' no
+# pandas 2, 'us' no pandas 3) - o leitor Arrow precisa devolver a mesma
+_DATETIME_UNIT = np.datetime_data(pd.to_datetime(pd.Series(['2000-01-01'])).dtype)[0]
+
+# Mesmo plano de RAW_DTYPES, em tipos Arrow (leitor CSV do pyarrow)
+RAW_ARROW_TYPES: Dict[str, pa.DataType] = {
+    'dt': pa.timestamp(_DATETIME_UNIT),
+    **{col: pa.float32() for col in _RAW_MEASURES},
+    **{col: pa.dictionary(pa.int32(), pa.string()) for col in _RAW_CATEGORIES},
+}
+
+# Plano dos DataFrames ja limpos (nomes padronizados)
+CLEAN_DTYPES: Dict[str, str] = {
+    **{col.lower(): 'float32' for col in _RAW_MEASURES},
+    **{col.lower(): 'category' for col in _RAW_CATEGORIES},
+    'latitude_parsed': 'float32',
+    'longitude_parsed': 'float32',
+    'hemisphere_ns': 'category',
+    'hemisphere_ew': 'category',
+    'source_file': 'category',
+    'granularity': 'category',
+}
+
+# Plano de dim_date
+DATE_DIMENSION_DTYPES: Dict[str, str] = {
+    'year': 'int16',
+    'month': 'int16',
+    'quarter': 'int16',
+    'decade': 'int16',
+    'century': 'int16',
+}
+
+# Plano de dim_location. Todo bloco (global, pais, estado, cidade) sai
+# com os mesmos tipos, mesmo quando a coluna e toda nula nele: assim o
+# concat dos blocos nao depende de o pandas ignorar colunas so com NA
+LOCATION_DIMENSION_DTYPES: Dict[str, str] = {
+    'granularity': 'object',
+    'city': 'object',
+    'state': 'object',
+    'country': 'object',
+    'latitude': 'float64',
+    'longitude': 'float64',
+    'latitude_raw': 'object',
+    'longitude_raw': 'object',
+    'hemisphere_ns': 'object',
+    'hemisphere_ew': 'object',
+}
+
+
+def apply_dtypes(df: pd.DataFrame, plan: Dict[str, str]) -> pd.DataFrame:
+    """
+    Converte as colunas de `df` segundo o plano (altera o proprio df).
+
+    Colunas fora do plano, ausentes no DataFrame ou que ja estao no
+    tipo certo nao sao tocadas.
+
+    Args:
+        df: DataFrame a converter
+        plan: Dicionario {coluna: dtype}
+
+    Returns:
+        O mesmo DataFrame, para encadear chamadas
+    """
+    for col, dtype in plan.items():
+        if col in df.columns and df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
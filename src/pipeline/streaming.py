@@ -0,0 +1,533 @@
+"""
+Pipeline ETL em streaming para arquivos grandes.
+
+Processa um arquivo CSV em chunks (pedacos), sem nunca carregar o
+arquivo inteiro na memoria:
+
+    extract (chunk) -> clean -> lookup de chaves -> load
+
+Cada etapa e um generator, entao apenas um chunk "vive" por vez.
+O tamanho do chunk e calculado a partir de um alvo de memoria
+(MEMORY_TARGET_MB), medindo quanto ocupa uma amostra ja limpa.
+
+Uso:
+    python -m src.pipeline.streaming city
+    python -m src.pipeline.streaming city --memory-target-mb 3072
+    python -m src.pipeline.streaming city --dry-run   # sem banco
+    python -m src.pipeline.streaming city --method copy --workers 4
+    python -m src.pipeline.streaming city --incremental  # so o que mudou
+    python -m src.pipeline.streaming city --processes 8  # limpeza em 8 nucleos
+    python -m src.pipeline.streaming city --backend duckdb  # sem PostgreSQL
+    python -m src.pipeline.streaming city --skip-rollups  # sem atualizar agregados
+    python -m src.pipeline.streaming city --bulk --workers 4  # recarga sem indices
+    python -m src.pipeline.streaming city --resume  # continua uma carga interrompida
+"""
+
+import argparse
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    CHUNK_SIZE,
+    CLEAN_PROCESSES,
+    CSV_FILES,
+    LOAD_WORKERS,
+    LOCATION_INDEX_PATH,
+    MEMORY_TARGET_MB,
+    METRICS_PATH,
+    PROMETHEUS_TEXTFILE,
+    SEARCH_INDEX_PATH,
+)
+from src.extract.csv_extractor import CSVExtractor
+from src.transform.cleaners import clean_temperature_data
+from src.transform.transformers import (
+    DateCollector,
+    LocationCollector,
+    create_date_dimension,
+    create_fact_temperature,
+    create_location_dimension,
+    merge_date_dimension,
+)
+from src.utils.instrumentation import Instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+# Quantas vezes o chunk limpo "cabe" na memoria ao mesmo tempo:
+# chunk bruto + chunk limpo + tabela fato + buffers do driver do banco
+MEMORY_OVERHEAD_FACTOR = 4
+
+# Limites para o tamanho de chunk calculado: abaixo do minimo o custo
+# fixo por chunk domina; acima do maximo, um alvo de memoria grande
+# faria um unico chunk com o arquivo inteiro
+MIN_CHUNK_SIZE = 10_000
+MAX_CHUNK_SIZE = CHUNK_SIZE
+
+# Colunas do CSV bruto necessarias para montar as dimensoes
+DIMENSION_SOURCE_COLUMNS = ['dt', 'City', 'State', 'Country', 'Latitude', 'Longitude']
+
+
+def estimate_chunk_size(
+    extractor: CSVExtractor,
+    source: str,
+    memory_target_mb: int = MEMORY_TARGET_MB,
+    sample_rows: int = 20_000
+) -> int:
+    """
+    Calcula quantas linhas por chunk cabem no alvo de memoria.
+
+    Le uma amostra do arquivo, limpa e mede quantos bytes cada linha
+    ocupa depois da limpeza (a fase que mais cresce o DataFrame).
+
+    Args:
+        extractor: Extrator configurado
+        source: Nome da fonte
+        memory_target_mb: Pico de memoria desejado para o processo
+        sample_rows: Linhas usadas na medicao
+
+    Returns:
+        Tamanho de chunk entre MIN_CHUNK_SIZE e MAX_CHUNK_SIZE
+    """
+    sample = extractor.preview(source, rows=sample_rows)
+    cleaned = clean_temperature_data(sample, source)
+
+    bytes_per_row = (
+        sample.memory_usage(deep=True).sum() + cleaned.memory_usage(deep=True).sum()
+    ) / max(len(sample), 1)
+
+    # Metade do alvo fica reservada para o interpretador, dimensoes, etc.
+    budget = memory_target_mb * 1024 * 1024 / 2
+    chunk_size = int(budget / (bytes_per_row * MEMORY_OVERHEAD_FACTOR))
+    chunk_size = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, chunk_size))
+
+    logger.info(
+        f"~{bytes_per_row:.0f} bytes/linha -> chunk de {chunk_size} linhas "
+        f"para alvo de {memory_target_mb} MB"
+    )
+    return chunk_size
+
+
+def collect_dimension_members(
+    source: str,
+    cleaned_chunks: Iterable[pd.DataFrame],
+) -> Tuple[pd.Series, Dict[str, pd.DataFrame]]:
+    """
+    Primeira passada: coleta datas e localizacoes distintas.
+
+    Guarda apenas os valores unicos de cada chunk, entao a memoria
+    usada e proporcional ao numero de meses/locais, nao de linhas.
+
+    Returns:
+        Tupla (datas unicas, {fonte: localizacoes unicas})
+    """
+    dates = DateCollector()
+    locations = LocationCollector()
+
+    for chunk in cleaned_chunks:
+        dates.update(chunk['dt'])
+        locations.update(source, chunk)
+
+    return dates.dates(), locations.frames()
+
+
+def _append_new_members(
+    existing: pd.DataFrame,
+    new: pd.DataFrame,
+    key_cols: List[str],
+    id_col: str
+) -> pd.DataFrame:
+    """
+    Retorna as linhas de `new` que nao existem em `existing`.
+
+    Os IDs das novas linhas continuam a partir do maior ID existente,
+    para nunca renumerar chaves ja usadas na tabela fato.
+    """
+    if existing.empty:
+        return new
+
+    merged = new.merge(existing[key_cols], on=key_cols, how='left', indicator=True)
+    missing = new[(merged['_merge'] == 'left_only').to_numpy()].copy()
+
+    start = int(existing[id_col].max()) + 1
+    missing[id_col] = range(start, start + len(missing))
+    return missing
+
+
+def _concat_members(existing: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """
+    Junta os membros novos aos existentes com os dtypes de `existing`.
+
+    Sem alinhar, colunas vazias ou so com NA em um dos lados fazem o
+    pandas inferir o dtype do resultado (e avisar que isso vai mudar).
+    """
+    if existing.empty:
+        return new.reset_index(drop=True)
+
+    new = new[existing.columns].astype(existing.dtypes.to_dict())
+    return pd.concat([existing, new], ignore_index=True)
+
+
+def run_streaming_pipeline(
+    source: str,
+    memory_target_mb: int = MEMORY_TARGET_MB,
+    chunk_size: Optional[int] = None,
+    dry_run: bool = False,
+    data_dir: Optional[str] = None,
+    load_method: Literal['multi', 'copy'] = 'copy',
+    load_workers: int = 1,
+    incremental: bool = False,
+    processes: int = 1,
+    backend: Literal['postgres', 'duckdb'] = 'postgres',
+    duckdb_path: Optional[str] = None,
+    refresh_aggregates: bool = True,
+    bulk: bool = False,
+    resume: bool = False,
+    location_index_path: Optional[str] = LOCATION_INDEX_PATH,
+    search_index_path: Optional[str] = SEARCH_INDEX_PATH,
+    metrics_path: Optional[str] = METRICS_PATH,
+    prometheus_path: Optional[str] = PROMETHEUS_TEXTFILE,
+) -> int:
+    """
+    Executa o ETL completo de uma fonte em streaming.
+
+    Passos:
+    1. Primeira passada: coleta datas/locais distintos e monta dimensoes
+    2. Carrega apenas os membros novos das dimensoes
+    3. Segunda passada: limpa, resolve chaves e carrega a tabela fato
+    4. Recalcula rollups e tendencias das localizacoes que receberam linhas
+
+    Args:
+        source: Nome da fonte ("city", "state", etc.)
+        memory_target_mb: Pico de memoria desejado
+        chunk_size: Forca um tamanho de chunk (ignora o alvo de memoria)
+        dry_run: Se True, nao escreve no banco
+        data_dir: Diretorio dos CSVs (padrao da config)
+        load_method: 'copy' (COPY do PostgreSQL) ou 'multi' (INSERT)
+        load_workers: Conexoes simultaneas na carga da tabela fato.
+            Com mais de 1, a carga roda em paralelo enquanto o proximo
+            chunk e lido e limpo (no maximo 2 x workers em memoria).
+        incremental: Carrega apenas linhas novas/alteradas, comparando
+            com climate.etl_state (ver src.load.incremental). Faz uma
+            passada extra no arquivo para resumir as particoes.
+        processes: Processos para ler, limpar e resolver chaves da
+            tabela fato (ver src.pipeline.parallel). Com mais de 1, o
+            CSV e dividido em faixas de bytes e o cache Parquet nao e usado.
+        backend: Onde carregar: 'postgres' (DatabaseLoader) ou 'duckdb'
+            (DuckDBLoader, arquivo local). Com duckdb, load_method,
+            load_workers e incremental nao se aplicam.
+        duckdb_path: Arquivo DuckDB (padrao: DUCKDB_PATH da config)
+        refresh_aggregates: Se True, atualiza as tabelas agg_location_*
+            e location_trend (ver src.load.rollups) apos a carga
+        bulk: Recarga completa da fonte: apaga as linhas dela, remove
+            indices e constraints da tabela fato durante a carga e os
+            recria no final, em paralelo (ver src.load.fact_layout).
+            So no PostgreSQL e sem incremental.
+        resume: Continua uma carga interrompida: pula os chunks que ja
+            tem checkpoint em climate.etl_checkpoint (ver
+            src.load.checkpoint). Sem resume, os checkpoints da fonte
+            sao zerados e a carga comeca do inicio. So no PostgreSQL e
+            sem incremental.
+        location_index_path: Onde regravar o indice espacial das
+            localizacoes (src.utils.spatial) quando a carga adiciona
+            localizacoes novas ou o arquivo nao existe; None desliga
+        search_index_path: Onde regravar o indice de busca por nome
+            (src.utils.search), junto com os rollups, ja que a ordem dos
+            resultados depende da cobertura; None desliga
+        metrics_path: Arquivo JSON lines onde cada etapa/chunk medido e
+            acrescentado (ver src.utils.instrumentation)
+        prometheus_path: Arquivo .prom com os totais por etapa, gravado
+            no fim da execucao
+
+    Returns:
+        Numero de linhas de fato produzidas (ou gravadas, se incremental)
+    """
+    # Combinacoes invalidas falham antes de ler o arquivo
+    if incremental and backend == 'duckdb' and not dry_run:
+        raise ValueError("Carga incremental so e suportada no PostgreSQL")
+    if bulk and (backend == 'duckdb' or incremental):
+        raise ValueError("Carga em massa (bulk) so e suportada no PostgreSQL, sem incremental")
+    if resume and (backend == 'duckdb' or incremental):
+        raise ValueError("Retomar carga (resume) so e suportado no PostgreSQL, sem incremental")
+
+    extractor = CSVExtractor(data_dir)
+    stats = Instrumentation(source=source, jsonl_path=metrics_path)
+
+    chunk_size = chunk_size or estimate_chunk_size(extractor, source, memory_target_mb)
+
+    def clean(chunk: pd.DataFrame) -> pd.DataFrame:
+        # O chunk acabou de ser lido e nao e usado depois: limpa sem copiar
+        return clean_temperature_data(chunk, source, inplace=True)
+
+    # Funcoes com @instrumented (extract, clean, dimensoes, lookup,
+    # load) medem cada chamada/chunk nesta execucao
+    with stats.activate():
+        # 1. Dimensoes (primeira passada): so le as colunas de data/local
+        logger.info(f"Passada 1/2: coletando dimensoes de {source}")
+        header = extractor.preview(source, rows=0).columns
+        dimension_cols = [c for c in header if c in DIMENSION_SOURCE_COLUMNS]
+        chunks = extractor.extract(source, chunksize=chunk_size, columns=dimension_cols)
+        dates, locations = collect_dimension_members(source, map(clean, chunks))
+
+        dim_date = create_date_dimension(dates)
+        dim_location = create_location_dimension(locations)
+
+        # 2. Integra com as dimensoes que ja estao no banco
+        loader = None
+        if not dry_run and backend == 'duckdb':
+            from src.load.duckdb_loader import DuckDBLoader
+
+            loader = DuckDBLoader(duckdb_path)
+            load_workers = 1
+        elif not dry_run:
+            from src.load.database_loader import DatabaseLoader
+
+            loader = DatabaseLoader()
+
+        try:
+            if loader is not None:
+                existing_date = loader.read_table('dim_date')
+                existing_location = loader.read_table('dim_location')
+                existing_date['full_date'] = pd.to_datetime(existing_date['full_date'])
+
+                # IDs existentes nao mudam: a tabela fato ja aponta para eles
+                dim_date, new_dates = merge_date_dimension(existing_date, dim_date['full_date'])
+                new_locations = _append_new_members(
+                    existing_location, dim_location,
+                    ['granularity', 'city', 'state', 'country'], 'location_id'
+                )
+                with stats.stage("load_dimensions") as measurement:
+                    if len(new_dates):
+                        loader.load_dataframe(new_dates, 'dim_date')
+                    if len(new_locations):
+                        loader.load_dataframe(new_locations, 'dim_location')
+                    measurement.rows_out = len(new_dates) + len(new_locations)
+
+                if len(new_locations):
+                    dim_location = _concat_members(existing_location, new_locations)
+                else:
+                    dim_location = existing_location
+
+                if location_index_path and (
+                    len(new_locations) or not Path(location_index_path).exists()
+                ):
+                    from src.utils.spatial import build_location_index
+
+                    # Indice espacial das cidades (consultas de vizinho mais proximo)
+                    with stats.stage("location_index"):
+                        build_location_index(dim_location, location_index_path)
+
+            # 3. Tabela fato (segunda passada)
+            logger.info(f"Passada 2/2: carregando fatos de {source}")
+
+            if backend == 'duckdb' and loader is not None:
+                # Sem UNIQUE no DuckDB: recarregar a fonte substitui as linhas
+                loader.delete_source(source)
+            elif bulk and loader is not None:
+                from src.load.fact_layout import clear_source, drop_fact_indexes
+
+                if not resume:
+                    clear_source(loader, source)
+                drop_fact_indexes(loader)
+
+            # Checkpoint por chunk (gravado na mesma transacao do chunk)
+            checkpoint = None
+            if loader is not None and backend == 'postgres' and not incremental:
+                from src.load.checkpoint import LoadCheckpoint, load_fingerprint
+
+                checkpoint = LoadCheckpoint(loader, source, load_fingerprint(
+                    extractor.content_fingerprint(source), chunk_size,
+                    'bytes' if processes > 1 else 'rows'
+                ))
+                checkpoint.start(resume)
+
+            def fact_chunks() -> Iterator[pd.DataFrame]:
+                if processes > 1:
+                    from src.pipeline.parallel import parallel_fact_chunks
+
+                    # Os workers sao outros processos: mede cada chunk recebido
+                    return stats.iterate("transform", parallel_fact_chunks(
+                        source, dim_date, dim_location, processes,
+                        chunk_size=chunk_size, data_dir=data_dir
+                    ))
+
+                def transform(chunk: pd.DataFrame) -> pd.DataFrame:
+                    return create_fact_temperature(clean(chunk), dim_date, dim_location)
+
+                return map(transform, extractor.extract(source, chunksize=chunk_size))
+
+            # Localizacoes de cada chunk carregado, para atualizar os rollups
+            touched: List[np.ndarray] = []
+
+            def tracked(facts: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+                # Chunks pulados pelo checkpoint tambem contam: a carga
+                # interrompida pode nao ter chegado aos rollups
+                for fact in facts:
+                    touched.append(fact['location_id'].unique())
+                    yield fact
+
+            total = 0
+            try:
+                if loader is not None and incremental:
+                    from src.load.incremental import IncrementalLoader
+
+                    # Cada upsert e medido pelo load_dataframe
+                    incremental_loader = IncrementalLoader(loader, dim_date, source)
+                    total = incremental_loader.load(fact_chunks)
+                    touched.append(np.asarray(incremental_loader.touched_locations, dtype='int64'))
+                elif loader is not None and load_workers > 1:
+                    # Os chunks sao gravados em outras threads: mede a carga
+                    # inteira, sem abrir uma etapa (extract/clean/lookup
+                    # continuam medidos chunk a chunk). Inclui o tempo delas.
+                    wall_start, cpu_start = time.perf_counter(), time.process_time()
+                    total = loader.load_chunks_parallel(
+                        checkpoint.pending(tracked(fact_chunks())), 'fact_temperature',
+                        method=load_method, workers=load_workers
+                    )
+                    stats.record(
+                        "load", total, time.perf_counter() - wall_start,
+                        cpu_seconds=time.process_time() - cpu_start
+                    )
+                elif checkpoint is not None:
+                    for fact, statements in checkpoint.pending(tracked(fact_chunks())):
+                        loader.load_chunk(
+                            fact, 'fact_temperature', method=load_method, statements=statements
+                        )
+                        total += len(fact)
+                else:
+                    for fact in tracked(fact_chunks()):
+                        if loader is not None:
+                            loader.load_dataframe(fact, 'fact_temperature', method=load_method)
+                        total += len(fact)
+            except Exception:
+                if bulk and loader is not None:
+                    # Recriar a UNIQUE agora falharia se a carga trouxe duplicatas
+                    # e esconderia o erro original
+                    logger.error(
+                        "Carga em massa interrompida: indices e constraints da tabela fato "
+                        "continuam removidos. Rode de novo com --bulk --resume ou "
+                        "python -m src.load.fact_layout create-indexes"
+                    )
+                raise
+
+            if bulk and loader is not None:
+                from src.load.fact_layout import create_fact_indexes
+
+                with stats.stage("create_indexes"):
+                    create_fact_indexes(loader, workers=load_workers)
+
+            if loader is not None and refresh_aggregates:
+                # Import tardio: rollups importa os dois loaders
+                from src.load.rollups import (
+                    location_coverage,
+                    refresh_location_trends,
+                    refresh_rollups,
+                )
+
+                touched_ids = np.concatenate(touched) if touched else []
+                with stats.stage("rollups"):
+                    refresh_rollups(loader, touched_ids)
+                    refresh_location_trends(loader, touched_ids)
+
+                if search_index_path:
+                    from src.utils.search import build_search_index
+
+                    # Busca por nome, ordenada pelas medicoes de cada localizacao
+                    with stats.stage("search_index"):
+                        build_search_index(
+                            dim_location, location_coverage(loader), search_index_path
+                        )
+        finally:
+            if backend == 'duckdb' and loader is not None:
+                # Libera o arquivo mesmo se a carga falhar
+                loader.close()
+
+    stats.log_summary()
+    if prometheus_path:
+        stats.write_prometheus(prometheus_path)
+    logger.info(f"Pipeline de {source} concluido: {total} linhas de fato")
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Executa o ETL de uma fonte em streaming (memoria limitada)."
+    )
+    parser.add_argument("source", choices=list(CSV_FILES.keys()), help="Fonte a processar")
+    parser.add_argument(
+        "--memory-target-mb", type=int, default=MEMORY_TARGET_MB,
+        help=f"Pico de memoria desejado (padrao: {MEMORY_TARGET_MB})"
+    )
+    parser.add_argument("--chunk-size", type=int, help="Forca um tamanho de chunk")
+    parser.add_argument("--data-dir", help="Diretorio dos CSVs")
+    parser.add_argument("--dry-run", action="store_true", help="Nao escreve no banco")
+    parser.add_argument(
+        "--method", choices=["copy", "multi"], default="copy",
+        help="Como carregar a tabela fato (padrao: copy)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help=f"Conexoes simultaneas na carga (sugestao: {LOAD_WORKERS})"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Carrega apenas linhas novas ou alteradas (usa climate.etl_state)"
+    )
+    parser.add_argument(
+        "--processes", type=int, default=CLEAN_PROCESSES,
+        help="Processos para limpar os chunks em paralelo (padrao: CLEAN_PROCESSES)"
+    )
+    parser.add_argument(
+        "--backend", choices=["postgres", "duckdb"], default="postgres",
+        help="Banco de destino (padrao: postgres)"
+    )
+    parser.add_argument("--duckdb-path", help="Arquivo DuckDB (com --backend duckdb)")
+    parser.add_argument(
+        "--skip-rollups", action="store_true",
+        help="Nao atualiza as tabelas agg_location_* apos a carga"
+    )
+    parser.add_argument(
+        "--bulk", action="store_true",
+        help="Recarrega a fonte sem indices na tabela fato (recriados no final)"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Continua uma carga interrompida, pulando os chunks ja gravados"
+    )
+    parser.add_argument(
+        "--metrics-path", default=METRICS_PATH,
+        help="Acrescenta as metricas de cada etapa/chunk neste arquivo JSON lines"
+    )
+    parser.add_argument(
+        "--prometheus-path", default=PROMETHEUS_TEXTFILE,
+        help="Grava os totais por etapa neste textfile do Prometheus"
+    )
+    args = parser.parse_args(argv)
+
+    run_streaming_pipeline(
+        args.source,
+        memory_target_mb=args.memory_target_mb,
+        chunk_size=args.chunk_size,
+        dry_run=args.dry_run,
+        data_dir=args.data_dir,
+        load_method=args.method,
+        load_workers=args.workers,
+        incremental=args.incremental,
+        processes=args.processes,
+        backend=args.backend,
+        duckdb_path=args.duckdb_path,
+        refresh_aggregates=not args.skip_rollups,
+        bulk=args.bulk,
+        resume=args.resume,
+        metrics_path=args.metrics_path,
+        prometheus_path=args.prometheus_path,
+    )
+
+
+if __name__ == "__main__":
+    main()
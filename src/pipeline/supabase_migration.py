@@ -0,0 +1,214 @@
+"""
+Migracao do star schema completo para o Supabase.
+
+Em vez de ler os CSVs inteiros e reimplementar as dimensoes, a
+migracao usa o mesmo pipeline do warehouse:
+
+1. Monta (ou reaproveita) o warehouse DuckDB com
+   run_streaming_pipeline(backend='duckdb'): CSVExtractor em chunks,
+   clean_temperature_data, dimensoes de src.transform, rollups e
+   tendencias. A memoria fica limitada por MEMORY_TARGET_MB.
+2. Le cada tabela do DuckDB em chunks (DuckDBLoader.iter_query) e envia
+   pelo SupabaseUploader (batches concorrentes, retentativas, journal):
+   dim_date, dim_location, fact_temperature, agg_location_year e
+   location_trend.
+
+Subconjunto estratificado (per_country): em vez de amostrar linhas ao
+acaso, escolhe ate N cidades e N estados de cada pais, espalhados pela
+latitude, e envia as series completas dessas localizacoes (global e
+paises vao inteiros). Todo pais fica representado e as tendencias do
+subconjunto sao as mesmas do warehouse.
+
+Uso:
+    migrate_to_supabase(SupabaseUploader(), per_country=5)
+
+    python climate-web/scripts/migrate-to-supabase.py
+    python climate-web/scripts/migrate-to-supabase.py --per-country 5
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import CSV_FILES, DUCKDB_PATH, MEMORY_TARGET_MB, RAW_DATA_DIR
+from src.load.duckdb_loader import DuckDBLoader
+from src.load.supabase_uploader import SupabaseUploader, frame_records
+from src.transform.transformers import FACT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+# Fontes na ordem de carga
+MIGRATION_SOURCES = ['global', 'country', 'state', 'major_city', 'city']
+
+# Tabelas na ordem de envio (dimensoes antes da fato por causa das FKs)
+# e colunas lidas do DuckDB (sem temperature_id e loaded_at)
+MIGRATION_TABLES = {
+    'dim_date': None,
+    'dim_location': None,
+    'fact_temperature': FACT_COLUMNS,
+    'agg_location_year': None,
+    'location_trend': None,
+}
+
+# Chave unica do upsert nas tabelas cuja linha nao traz a chave primaria
+ON_CONFLICT = {
+    'fact_temperature': 'date_id,location_id,source_file',
+}
+
+# Granularidades reduzidas no subconjunto estratificado
+STRATIFIED_GRANULARITIES = ['state', 'city']
+
+# Linhas lidas do DuckDB por vez
+READ_CHUNK_SIZE = 100_000
+
+
+def stratified_locations(dim_location: pd.DataFrame, per_country: int) -> np.ndarray:
+    """
+    Escolhe as localizacoes do subconjunto.
+
+    Para cada pais e granularidade em STRATIFIED_GRANULARITIES, ordena
+    os locais por latitude (e nome) e pega per_country deles em
+    intervalos iguais: norte, sul e o meio do pais entram. As demais
+    granularidades (global, pais) entram inteiras. Deterministico.
+
+    Returns:
+        location_ids escolhidos, ordenados
+    """
+    stratified = dim_location['granularity'].isin(STRATIFIED_GRANULARITIES)
+    chosen = [dim_location.loc[~stratified, 'location_id'].to_numpy(dtype='int64')]
+
+    members = dim_location[stratified].sort_values(
+        ['latitude', 'city', 'state', 'location_id'], na_position='last'
+    )
+    for _, group in members.groupby(['granularity', 'country'], sort=True, dropna=False):
+        ids = group['location_id'].to_numpy(dtype='int64')
+        if len(ids) > per_country:
+            ids = ids[np.unique(np.linspace(0, len(ids) - 1, per_country).round().astype(int))]
+        chosen.append(ids)
+
+    return np.sort(np.concatenate(chosen))
+
+
+def build_warehouse(
+    duckdb_path: Union[str, Path] = DUCKDB_PATH,
+    sources: Iterable[str] = MIGRATION_SOURCES,
+    data_dir: Optional[Union[str, Path]] = None,
+    memory_target_mb: int = MEMORY_TARGET_MB,
+    chunk_size: Optional[int] = None
+) -> List[str]:
+    """
+    Carrega as fontes no DuckDB pelo pipeline em streaming.
+
+    Fontes sem arquivo sao puladas (com aviso).
+
+    Returns:
+        Fontes carregadas
+    """
+    # Import tardio: o pipeline importa os extratores e transformadores
+    from src.pipeline.streaming import run_streaming_pipeline
+
+    data_dir = Path(data_dir or RAW_DATA_DIR)
+    loaded = []
+    for source in sources:
+        if not (data_dir / CSV_FILES[source]['filename']).exists():
+            logger.warning(f"{CSV_FILES[source]['filename']} nao encontrado em {data_dir}")
+            continue
+        run_streaming_pipeline(
+            source,
+            memory_target_mb=memory_target_mb,
+            chunk_size=chunk_size,
+            data_dir=str(data_dir),
+            backend='duckdb',
+            duckdb_path=str(duckdb_path),
+            location_index_path=None,
+            search_index_path=None,
+        )
+        loaded.append(source)
+    return loaded
+
+
+def _table_query(
+    loader: DuckDBLoader,
+    table: str,
+    location_ids: Optional[np.ndarray]
+) -> str:
+    columns = MIGRATION_TABLES[table]
+    select = ', '.join(columns) if columns else '*'
+    sql = f"SELECT {select} FROM {loader.schema}.{table}"
+    if location_ids is not None and table != 'dim_date':
+        sql += f" WHERE location_id IN ({', '.join(str(i) for i in location_ids)})"
+    return sql
+
+
+def _progress(table: str, chunks: Iterable[pd.DataFrame], total: int) -> Iterator[Dict]:
+    """Linhas de cada chunk lido, com log de progresso e tempo estimado."""
+    start = time.perf_counter()
+    sent = 0
+    for chunk in chunks:
+        yield from frame_records(chunk)
+        sent += len(chunk)
+        elapsed = time.perf_counter() - start
+        rate = sent / elapsed if elapsed > 0 else 0
+        eta = (total - sent) / rate if rate > 0 else 0
+        logger.info(
+            f"{table}: {sent}/{total} linhas lidas ({rate:,.0f} linhas/s, "
+            f"faltam ~{eta:.0f}s)"
+        )
+
+
+def migrate_to_supabase(
+    uploader: SupabaseUploader,
+    duckdb_path: Union[str, Path] = DUCKDB_PATH,
+    per_country: Optional[int] = None,
+    tables: Iterable[str] = MIGRATION_TABLES,
+    chunk_size: int = READ_CHUNK_SIZE
+) -> Dict[str, int]:
+    """
+    Envia as tabelas do warehouse DuckDB para o Supabase.
+
+    Cada tabela e lida em chunks e enviada enquanto e lida, entao a
+    memoria nao depende do tamanho da tabela fato.
+
+    Args:
+        uploader: SupabaseUploader configurado
+        duckdb_path: Warehouse montado por build_warehouse
+        per_country: Subconjunto estratificado (ver
+            stratified_locations); None envia tudo
+        tables: Tabelas a enviar, na ordem de MIGRATION_TABLES
+        chunk_size: Linhas lidas do DuckDB por vez
+
+    Returns:
+        {tabela: linhas gravadas}
+    """
+    loader = DuckDBLoader(duckdb_path)
+    try:
+        location_ids = None
+        if per_country is not None:
+            location_ids = stratified_locations(loader.read_table('dim_location'), per_country)
+            logger.info(
+                f"Subconjunto estratificado: {len(location_ids)} localizacoes "
+                f"(ate {per_country} cidades/estados por pais)"
+            )
+
+        uploaded = {}
+        for table in MIGRATION_TABLES:
+            if table not in tables:
+                continue
+            sql = _table_query(loader, table, location_ids)
+            total = int(loader.query(f"SELECT COUNT(*) AS n FROM ({sql})")['n'].iloc[0])
+            logger.info(f"Enviando {table}: {total} linhas")
+
+            records = _progress(table, loader.iter_query(sql, chunk_size), total)
+            uploaded[table] = asyncio.run(
+                uploader.upload(table, records, on_conflict=ON_CONFLICT.get(table))
+            )
+    finally:
+        loader.close()
+
+    return uploaded
@@ -1,14 +1,29 @@
 import pandas as pd
-import numpy as np
 from typing import Optional, Literal
 import logging
 
-from src.utils.coordinates import parse_coordinate, get_hemisphere
+from src.models.schema import CLEAN_DTYPES, apply_dtypes
+from src.utils.coordinates import parse_coordinate_series, hemisphere_series
+from src.utils.instrumentation import instrumented
 
 logger = logging.getLogger(__name__)
 
 
-def standardize_column_names(df: pd.DataFrame) -> pd.DataFrame:
+# Mapeia source para granularidade
+GRANULARITY_MAP = {
+    "global": "global",
+    "country": "country",
+    "state": "state",
+    "major_city": "city",  # Major cities sao cidades tambem
+    "city": "city",
+}
+
+# Textos que representam valor ausente (o "nan" que um NaN vira quando
+# o CSV foi gerado com astype(str)). "Nan" fica: e uma cidade da Tailandia
+MISSING_TEXT = ['nan', 'NaN']
+
+
+def standardize_column_names(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
     """
     Padroniza nomes das colunas.
 
@@ -20,8 +35,11 @@ def standardize_column_names(df: pd.DataFrame) -> pd.DataFrame:
     Exemplo:
         "AverageTemperature" -> "averagetemperature"
         "Land Max Temperature" -> "land_max_temperature"
+
+    Com inplace=True altera o proprio df (sem copia).
     """
-    df = df.copy()
+    if not inplace:
+        df = df.copy()
     df.columns = [
         col.lower().replace(' ', '_').replace('-', '_')
         for col in df.columns
@@ -29,25 +47,51 @@ def standardize_column_names(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def clean_text_columns(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+def clean_text_columns(
+    df: pd.DataFrame,
+    columns: list,
+    inplace: bool = False
+) -> pd.DataFrame:
     """
     Limpa colunas de texto.
 
     - Remove espacos extras no inicio e fim
     - Mantem caracteres especiais (a, e, c, etc.) - sao validos em nomes
+    - Textos "nan"/"NaN" viram valor ausente (ver MISSING_TEXT)
+    - Colunas category continuam category (limpa so as categorias)
+
+    Com inplace=True altera o proprio df (sem copia).
     """
-    df = df.copy()
+    if not inplace:
+        df = df.copy()
 
     for col in columns:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
-            # Substitui 'nan' string por NaN real
-            df[col] = df[col].replace('nan', np.nan)
+        if col not in df.columns:
+            continue
+
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            categories = df[col].cat.categories
+            stripped = categories.astype(str).str.strip()
+            if not stripped.equals(categories):
+                if stripped.is_unique:
+                    df[col] = df[col].cat.rename_categories(stripped)
+                else:
+                    # " Paris" e "Paris" viram a mesma categoria (.str mantem os NA)
+                    df[col] = df[col].str.strip().astype('category')
+
+            missing = df[col].cat.categories.intersection(MISSING_TEXT)
+            if len(missing):
+                df[col] = df[col].cat.remove_categories(missing)
+        else:
+            # astype(str) transformaria NA em 'nan'/'None': os NA voltam
+            values = df[col]
+            stripped = values.astype(str).str.strip()
+            df[col] = stripped.where(values.notna() & ~stripped.isin(MISSING_TEXT))
 
     return df
 
 
-def parse_coordinates_columns(df: pd.DataFrame) -> pd.DataFrame:
+def parse_coordinates_columns(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
     """
     Converte colunas de latitude/longitude para valores numericos.
 
@@ -56,21 +100,20 @@ def parse_coordinates_columns(df: pd.DataFrame) -> pd.DataFrame:
     - longitude_parsed: valor numerico
     - hemisphere_ns: 'N' ou 'S'
     - hemisphere_ew: 'E' ou 'W'
+
+    Com inplace=True altera o proprio df (sem copia).
     """
-    df = df.copy()
+    if not inplace:
+        df = df.copy()
 
     if 'latitude' in df.columns and 'longitude' in df.columns:
-        # Parse para valores numericos
-        df['latitude_parsed'] = df['latitude'].apply(parse_coordinate)
-        df['longitude_parsed'] = df['longitude'].apply(parse_coordinate)
+        # Parse para valores numericos (vetorizado, so nos valores unicos)
+        df['latitude_parsed'] = parse_coordinate_series(df['latitude'])
+        df['longitude_parsed'] = parse_coordinate_series(df['longitude'])
 
         # Extrai hemisferios
-        hemispheres = df.apply(
-            lambda row: get_hemisphere(row['latitude'], row['longitude']),
-            axis=1
-        )
-        df['hemisphere_ns'] = hemispheres.apply(lambda x: x[0])
-        df['hemisphere_ew'] = hemispheres.apply(lambda x: x[1])
+        df['hemisphere_ns'] = hemisphere_series(df['latitude'], 'ns')
+        df['hemisphere_ew'] = hemisphere_series(df['longitude'], 'ew')
 
         logger.info("Coordenadas parseadas com sucesso")
 
@@ -79,7 +122,8 @@ def parse_coordinates_columns(df: pd.DataFrame) -> pd.DataFrame:
 
 def add_metadata_columns(
     df: pd.DataFrame,
-    source: str
+    source: str,
+    inplace: bool = False
 ) -> pd.DataFrame:
     """
     Adiciona colunas de metadados.
@@ -87,44 +131,50 @@ def add_metadata_columns(
     Metadados sao informacoes SOBRE os dados:
     - De qual arquivo veio
     - Qual a granularidade (nivel de detalhe)
-    """
-    df = df.copy()
 
-    # Mapeia source para granularidade
-    granularity_map = {
-        "global": "global",
-        "country": "country",
-        "state": "state",
-        "major_city": "city",  # Major cities sao cidades tambem
-        "city": "city",
-    }
+    Com inplace=True altera o proprio df (sem copia).
+    """
+    if not inplace:
+        df = df.copy()
 
     df['source_file'] = source
-    df['granularity'] = granularity_map.get(source, source)
+    df['granularity'] = GRANULARITY_MAP.get(source, source)
 
     return df
 
 
+@instrumented('clean')
 def clean_temperature_data(
     df: pd.DataFrame,
-    source: str
+    source: str,
+    inplace: bool = False
 ) -> pd.DataFrame:
     """
     Pipeline completa de limpeza para dados de temperatura.
 
-    Aplica todas as transformacoes de limpeza em sequencia.
+    Aplica todas as transformacoes de limpeza em sequencia, todas
+    sobre o mesmo DataFrame (sem uma copia por etapa).
 
     Args:
         df: DataFrame com dados brutos
         source: Nome da fonte ("global", "country", etc.)
+        inplace: Se True, o DataFrame recebido e alterado e devolvido.
+            Use quando quem chama nao precisa mais dos dados brutos
+            (ex: chunks lidos do extrator).
 
     Returns:
         DataFrame limpo e padronizado
     """
     logger.info(f"Iniciando limpeza de {source}...")
 
+    if not inplace:
+        # As etapas so trocam colunas inteiras (nunca escrevem dentro
+        # de uma coluna existente), entao uma copia rasa ja protege o
+        # DataFrame de quem chamou - sem duplicar os dados
+        df = df.copy(deep=False)
+
     # 1. Padroniza nomes das colunas
-    df = standardize_column_names(df)
+    standardize_column_names(df, inplace=True)
 
     # 2. Garante que 'dt' e datetime
     if 'dt' in df.columns:
@@ -132,13 +182,16 @@ def clean_temperature_data(
 
     # 3. Limpa colunas de texto
     text_cols = ['country', 'state', 'city']
-    df = clean_text_columns(df, text_cols)
+    clean_text_columns(df, text_cols, inplace=True)
 
     # 4. Parseia coordenadas (se existirem)
-    df = parse_coordinates_columns(df)
+    parse_coordinates_columns(df, inplace=True)
 
     # 5. Adiciona metadados
-    df = add_metadata_columns(df, source)
+    add_metadata_columns(df, source, inplace=True)
+
+    # 6. Tipos compactos (category, float32) - ver src/models/schema.py
+    apply_dtypes(df, CLEAN_DTYPES)
 
     # Log do resultado
     logger.info(f"Limpeza concluida: {len(df)} registros")
@@ -149,7 +202,8 @@ def clean_temperature_data(
 
 def handle_missing_values(
     df: pd.DataFrame,
-    strategy: Literal['keep', 'drop', 'flag'] = 'keep'
+    strategy: Literal['keep', 'drop', 'flag'] = 'keep',
+    inplace: bool = False
 ) -> pd.DataFrame:
     """
     Trata valores ausentes (missing values).
@@ -164,8 +218,11 @@ def handle_missing_values(
     - Periodos sem medicoes
     - Falhas em equipamentos
     - Regioes com dados esparsos
+
+    Com inplace=True altera o proprio df (sem copia).
     """
-    df = df.copy()
+    if not inplace:
+        df = df.copy()
 
     # Identifica coluna de temperatura principal
     temp_col = None
@@ -188,7 +245,7 @@ def handle_missing_values(
 
     elif strategy == 'drop':
         before = len(df)
-        df = df.dropna(subset=[temp_col])
+        df.dropna(subset=[temp_col], inplace=True)
         logger.info(f"Removidas {before - len(df)} linhas com temperatura ausente")
 
     elif strategy == 'flag':
@@ -1,12 +1,100 @@
+import numpy as np
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import logging
 
-from src.utils.coordinates import parse_coordinate
+from src.models.schema import (
+    DATE_DIMENSION_DTYPES,
+    LOCATION_DIMENSION_DTYPES,
+    apply_dtypes,
+)
+from src.utils.coordinates import parse_coordinate_series, hemisphere_series
+from src.utils.instrumentation import instrumented
 
 logger = logging.getLogger(__name__)
 
 
+# Mapeamento colunas limpas -> colunas de climate.fact_temperature
+FACT_COLUMN_MAP = {
+    'averagetemperature': 'avg_temperature',
+    'averagetemperatureuncertainty': 'avg_temperature_uncertainty',
+    'landaveragetemperature': 'avg_temperature',
+    'landaveragetemperatureuncertainty': 'avg_temperature_uncertainty',
+    'landmaxtemperature': 'land_max_temperature',
+    'landmaxtemperatureuncertainty': 'land_max_temp_uncertainty',
+    'landmintemperature': 'land_min_temperature',
+    'landmintemperatureuncertainty': 'land_min_temp_uncertainty',
+    'landandoceanaveragetemperature': 'land_ocean_avg_temperature',
+    'landandoceanaveragetemperatureuncertainty': 'land_ocean_avg_temp_uncertainty',
+}
+
+# Colunas de climate.fact_temperature preenchidas pelo pipeline
+# (temperature_id e loaded_at sao gerados pelo banco)
+FACT_COLUMNS = [
+    'date_id', 'location_id',
+    'avg_temperature', 'avg_temperature_uncertainty',
+    'land_max_temperature', 'land_max_temp_uncertainty',
+    'land_min_temperature', 'land_min_temp_uncertainty',
+    'land_ocean_avg_temperature', 'land_ocean_avg_temp_uncertainty',
+    'source_file',
+]
+
+# Chave natural de cada granularidade em dim_location
+LOCATION_KEYS = {
+    'global': [],
+    'country': ['country'],
+    'state': ['state', 'country'],
+    'city': ['city', 'country'],
+}
+
+
+# Colunas de dim_date, na ordem da tabela
+DATE_COLUMNS = [
+    'date_id', 'full_date', 'year', 'month', 'month_name',
+    'quarter', 'decade', 'century', 'is_modern_era',
+]
+
+
+def distinct_dates(dates: pd.Series) -> np.ndarray:
+    """
+    Datas distintas de uma coluna, ordenadas e sem nulos (datetime64).
+
+    Os valores repetidos saem por hash (pd.unique) antes da ordenacao,
+    entao o sort e sobre os meses distintos (milhares), nao sobre as
+    linhas (milhoes).
+    """
+    values = pd.unique(pd.to_datetime(dates).to_numpy())
+    return np.sort(values[~np.isnat(values)])
+
+
+def _date_rows(full_dates: np.ndarray, first_id: int = 1) -> pd.DataFrame:
+    """Linhas de dim_date para datas ja distintas e ordenadas."""
+    index = pd.DatetimeIndex(full_dates)
+
+    # Extrai componentes da data
+    year = index.year.to_numpy()
+    dim_date = pd.DataFrame({
+        # Adiciona ID (chave primaria)
+        'date_id': np.arange(first_id, first_id + len(index), dtype='int64'),
+        'full_date': index,
+        'year': year,
+        'month': index.month.to_numpy(),
+        'month_name': index.month_name(),
+        'quarter': index.quarter.to_numpy(),
+        # Decada arredondada para baixo. Exemplo: 1743 -> 1740, 2013 -> 2010
+        'decade': (year // 10) * 10,
+        # Seculo. Exemplo: 1743 -> 18, 2013 -> 21
+        'century': (year // 100) + 1,
+        # Flag para era moderna (pos-1900, dados mais confiaveis)
+        'is_modern_era': year >= 1900,
+    })
+
+    # Anos, meses etc. cabem em int16
+    apply_dtypes(dim_date, DATE_DIMENSION_DTYPES)
+    return dim_date
+
+
+@instrumented('dim_date')
 def create_date_dimension(all_dates: pd.Series) -> pd.DataFrame:
     """
     Cria a tabela de dimensao de datas.
@@ -17,51 +105,205 @@ def create_date_dimension(all_dates: pd.Series) -> pd.DataFrame:
     - Permite filtros faceis por periodo
 
     Args:
-        all_dates: Series com todas as datas de todos os arquivos
+        all_dates: Series com as datas (pode ter repetidas e nulos), ou
+            as datas ja distintas de DateCollector.dates()
 
     Returns:
         DataFrame representando dim_date
     """
     logger.info("Criando dimensao de data...")
 
-    # Remove duplicatas e valores nulos
-    unique_dates = all_dates.dropna().drop_duplicates()
-    unique_dates = pd.to_datetime(unique_dates)
-    unique_dates = sorted(unique_dates)
+    dim_date = _date_rows(distinct_dates(all_dates))
 
-    # Cria DataFrame
-    dim_date = pd.DataFrame({'full_date': unique_dates})
+    logger.info(f"Dimensao de data criada: {len(dim_date)} datas unicas")
+    return dim_date
 
-    # Extrai componentes da data
-    dim_date['year'] = dim_date['full_date'].dt.year
-    dim_date['month'] = dim_date['full_date'].dt.month
-    dim_date['month_name'] = dim_date['full_date'].dt.month_name()
-    dim_date['quarter'] = dim_date['full_date'].dt.quarter
 
-    # Calcula decada (arredonda para baixo para dezena)
-    # Exemplo: 1743 -> 1740, 2013 -> 2010
-    dim_date['decade'] = (dim_date['year'] // 10) * 10
+class DateCollector:
+    """
+    Acumula as datas distintas de varios chunks.
 
-    # Calcula seculo
-    # Exemplo: 1743 -> 18, 2013 -> 21
-    dim_date['century'] = (dim_date['year'] // 100) + 1
+    Como LocationCollector: cada chunk e reduzido aos seus meses
+    distintos antes de ser somado ao que ja foi visto, entao a memoria
+    e proporcional ao numero de meses (~3.200), nao de linhas.
 
-    # Flag para era moderna (pos-1900, dados mais confiaveis)
-    dim_date['is_modern_era'] = dim_date['year'] >= 1900
+    Uso:
+        collector = DateCollector()
+        for chunk in chunks:
+            collector.update(chunk['dt'])
+        dim_date = create_date_dimension(collector.dates())
+    """
 
-    # Adiciona ID (chave primaria)
-    dim_date['date_id'] = range(1, len(dim_date) + 1)
+    def __init__(self):
+        self._dates: Optional[np.ndarray] = None
+
+    def update(self, dates: pd.Series) -> None:
+        """Adiciona as datas distintas de um chunk."""
+        distinct = distinct_dates(dates)
+        if self._dates is None:
+            self._dates = distinct
+        else:
+            # Os dois lados ja sao distintos e ordenados
+            self._dates = np.union1d(self._dates, distinct)
+
+    def dates(self) -> pd.Series:
+        """Datas distintas vistas ate agora, em ordem."""
+        if self._dates is None:
+            return pd.Series([], dtype='datetime64[ns]')
+        return pd.Series(self._dates)
+
+
+def merge_date_dimension(
+    existing: pd.DataFrame,
+    dates: pd.Series
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Acrescenta a uma dim_date existente as datas que ainda nao estao nela.
 
-    # Reordena colunas
-    dim_date = dim_date[[
-        'date_id', 'full_date', 'year', 'month', 'month_name',
-        'quarter', 'decade', 'century', 'is_modern_era'
-    ]]
+    Os date_id existentes nunca mudam (a tabela fato ja aponta para
+    eles): as datas novas recebem IDs a partir do maior ID atual, em
+    ordem cronologica.
 
-    logger.info(f"Dimensao de data criada: {len(dim_date)} datas unicas")
-    return dim_date
+    Args:
+        existing: dim_date atual (por exemplo, lida do banco); pode
+            estar vazia
+        dates: Datas a incluir (repetidas e nulos sao ignorados)
+
+    Returns:
+        Tupla (dim_date completa, apenas as linhas novas)
+    """
+    incoming = distinct_dates(dates)
+
+    if existing.empty:
+        new_rows = _date_rows(incoming)
+        return new_rows, new_rows
+
+    # A resolucao de full_date depende do backend (us no DuckDB, ns no
+    # pandas); alinha com as datas novas antes do lookup e do concat
+    existing = existing[DATE_COLUMNS].copy()
+    existing['full_date'] = pd.to_datetime(existing['full_date']).astype(incoming.dtype)
+    incoming = incoming[~np.isin(incoming, existing['full_date'].to_numpy())]
+
+    next_id = int(existing['date_id'].max()) + 1
+    new_rows = _date_rows(incoming, first_id=next_id)
+    if len(new_rows):
+        logger.info(f"{len(new_rows)} datas novas em dim_date (IDs a partir de {next_id})")
+
+    merged = pd.concat([existing, new_rows], ignore_index=True)
+    return merged, new_rows
+
+
+# Colunas de dim_location (sem a chave location_id)
+LOCATION_COLUMNS = [
+    'granularity', 'city', 'state', 'country',
+    'latitude', 'longitude', 'latitude_raw', 'longitude_raw',
+    'hemisphere_ns', 'hemisphere_ew',
+]
+
+# Colunas que definem um local distinto, por fonte
+LOCATION_SOURCE_COLUMNS = {
+    'country': ['country'],
+    'state': ['state', 'country'],
+    'major_city': ['city', 'country', 'latitude', 'longitude'],
+    'city': ['city', 'country', 'latitude', 'longitude'],
+}
+
+
+def _distinct_rows(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
+    """
+    Equivalente a df[cols].drop_duplicates(), mais rapido em dados ordenados.
+
+    Os arquivos do Berkeley Earth vem ordenados por local, entao a
+    maioria das linhas repete a anterior. Primeiro fica so a linha onde
+    algum valor muda (comparacao vetorizada com a linha de cima) e o
+    drop_duplicates roda sobre essas poucas linhas. A ordem de
+    primeira aparicao e mantida.
+    """
+    subset = df[cols]
+    if len(subset) < 2:
+        return subset.drop_duplicates()
+
+    changed = np.zeros(len(subset), dtype=bool)
+    changed[0] = True
+    for col in cols:
+        current = subset[col].iloc[1:].reset_index(drop=True)
+        previous = subset[col].iloc[:-1].reset_index(drop=True)
+        changed[1:] |= (current != previous).fillna(True).to_numpy(dtype=bool)
+
+    return subset[changed].drop_duplicates()
+
+
+def _location_frame(granularity: str, members: pd.DataFrame) -> pd.DataFrame:
+    """
+    Monta linhas de dim_location para uma granularidade.
+
+    Colunas que nao existem em `members` ficam nulas. Os tipos seguem
+    LOCATION_DIMENSION_DTYPES em todos os blocos.
+    """
+    frame = pd.DataFrame(index=range(len(members)), columns=LOCATION_COLUMNS, dtype=object)
+    frame['granularity'] = granularity
+    frame['latitude'] = np.nan
+    frame['longitude'] = np.nan
 
+    for col in ['city', 'state', 'country']:
+        if col in members.columns:
+            frame[col] = members[col].to_numpy()
 
+    # Coordenadas (so cidades): parse vetorizado das strings brutas
+    if 'latitude' in members.columns:
+        lat_raw = members['latitude'].reset_index(drop=True)
+        lon_raw = members['longitude'].reset_index(drop=True)
+
+        frame['latitude'] = parse_coordinate_series(lat_raw)
+        frame['longitude'] = parse_coordinate_series(lon_raw)
+        frame['latitude_raw'] = lat_raw
+        frame['longitude_raw'] = lon_raw
+        frame['hemisphere_ns'] = hemisphere_series(lat_raw, 'ns')
+        frame['hemisphere_ew'] = hemisphere_series(lon_raw, 'ew')
+
+    return apply_dtypes(frame, LOCATION_DIMENSION_DTYPES)
+
+
+class LocationCollector:
+    """
+    Acumula as localizacoes distintas de varios chunks.
+
+    Permite montar dim_location a partir de um extrator em streaming,
+    sem concatenar os 8.6M de linhas do arquivo de cidades: cada chunk
+    e reduzido aos seus locais distintos (algumas centenas) antes de
+    ser somado ao que ja foi visto. A ordem de primeira aparicao e
+    mantida, entao o resultado e igual ao de processar o arquivo todo.
+
+    Uso:
+        collector = LocationCollector()
+        for chunk in chunks:
+            collector.update("city", chunk)
+        dim_location = create_location_dimension(collector.frames())
+    """
+
+    def __init__(self):
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    def update(self, source: str, df: pd.DataFrame) -> None:
+        """Adiciona os locais distintos de um chunk limpo."""
+        if source not in LOCATION_SOURCE_COLUMNS:
+            return
+
+        cols = [c for c in LOCATION_SOURCE_COLUMNS[source] if c in df.columns]
+        distinct = _distinct_rows(df, cols)
+
+        if source in self._frames:
+            distinct = pd.concat([self._frames[source], distinct], ignore_index=True)
+            distinct = distinct.drop_duplicates()
+
+        self._frames[source] = distinct.reset_index(drop=True)
+
+    def frames(self) -> Dict[str, pd.DataFrame]:
+        """Locais distintos por fonte, no formato de create_location_dimension."""
+        return dict(self._frames)
+
+
+@instrumented('dim_location')
 def create_location_dimension(dfs: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     """
     Cria a tabela de dimensao de localizacao.
@@ -72,64 +314,31 @@ def create_location_dimension(dfs: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     - Estado (241 estados)
     - Cidade (3.490+ cidades)
 
+    Cada nivel e montado como um bloco de colunas (sem loop por linha)
+    e os blocos sao concatenados no final.
+
     Args:
-        dfs: Dicionario {fonte: DataFrame limpo}
+        dfs: Dicionario {fonte: DataFrame limpo}. Tambem aceita os
+            locais ja distintos de LocationCollector.frames().
 
     Returns:
         DataFrame representando dim_location
     """
     logger.info("Criando dimensao de localizacao...")
 
-    locations = []
-
     # 1. Nivel Global (apenas 1 registro)
-    locations.append({
-        'granularity': 'global',
-        'city': None,
-        'state': None,
-        'country': None,
-        'latitude': None,
-        'longitude': None,
-        'latitude_raw': None,
-        'longitude_raw': None,
-        'hemisphere_ns': None,
-        'hemisphere_ew': None,
-    })
+    blocks = [_location_frame('global', pd.DataFrame(index=range(1)))]
 
     # 2. Nivel Pais
     if 'country' in dfs:
-        countries = dfs['country'][['country']].drop_duplicates()
-        for _, row in countries.iterrows():
-            locations.append({
-                'granularity': 'country',
-                'city': None,
-                'state': None,
-                'country': row['country'],
-                'latitude': None,
-                'longitude': None,
-                'latitude_raw': None,
-                'longitude_raw': None,
-                'hemisphere_ns': None,
-                'hemisphere_ew': None,
-            })
+        countries = _distinct_rows(dfs['country'], ['country'])
+        blocks.append(_location_frame('country', countries))
         logger.info(f"Adicionados {len(countries)} paises")
 
     # 3. Nivel Estado
     if 'state' in dfs:
-        states = dfs['state'][['state', 'country']].drop_duplicates()
-        for _, row in states.iterrows():
-            locations.append({
-                'granularity': 'state',
-                'city': None,
-                'state': row['state'],
-                'country': row['country'],
-                'latitude': None,
-                'longitude': None,
-                'latitude_raw': None,
-                'longitude_raw': None,
-                'hemisphere_ns': None,
-                'hemisphere_ew': None,
-            })
+        states = _distinct_rows(dfs['state'], ['state', 'country'])
+        blocks.append(_location_frame('state', states))
         logger.info(f"Adicionados {len(states)} estados")
 
     # 4. Nivel Cidade (major_city e city)
@@ -137,44 +346,14 @@ def create_location_dimension(dfs: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         if source in dfs:
             df = dfs[source]
             # Seleciona colunas relevantes
-            cols = ['city', 'country']
-            if 'latitude' in df.columns:
-                cols.extend(['latitude', 'longitude'])
-
-            cities = df[cols].drop_duplicates()
-
-            for _, row in cities.iterrows():
-                lat_raw = row.get('latitude')
-                lon_raw = row.get('longitude')
-
-                lat_parsed = parse_coordinate(lat_raw) if pd.notna(lat_raw) else None
-                lon_parsed = parse_coordinate(lon_raw) if pd.notna(lon_raw) else None
-
-                # Extrai hemisferios
-                hemisphere_ns = None
-                hemisphere_ew = None
-                if pd.notna(lat_raw):
-                    hemisphere_ns = str(lat_raw)[-1].upper()
-                if pd.notna(lon_raw):
-                    hemisphere_ew = str(lon_raw)[-1].upper()
-
-                locations.append({
-                    'granularity': 'city',
-                    'city': row['city'],
-                    'state': None,
-                    'country': row['country'],
-                    'latitude': lat_parsed,
-                    'longitude': lon_parsed,
-                    'latitude_raw': lat_raw,
-                    'longitude_raw': lon_raw,
-                    'hemisphere_ns': hemisphere_ns,
-                    'hemisphere_ew': hemisphere_ew,
-                })
+            cols = [c for c in LOCATION_SOURCE_COLUMNS[source] if c in df.columns]
+            cities = _distinct_rows(df, cols)
 
+            blocks.append(_location_frame('city', cities))
             logger.info(f"Adicionadas {len(cities)} cidades de {source}")
 
-    # Cria DataFrame e remove duplicatas
-    dim_location = pd.DataFrame(locations)
+    # Junta os blocos e remove duplicatas
+    dim_location = pd.concat(blocks, ignore_index=True)
     dim_location = dim_location.drop_duplicates(
         subset=['granularity', 'city', 'state', 'country']
     )
@@ -183,11 +362,123 @@ def create_location_dimension(dfs: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     dim_location['location_id'] = range(1, len(dim_location) + 1)
 
     # Reordena colunas
-    dim_location = dim_location[[
-        'location_id', 'granularity', 'city', 'state', 'country',
-        'latitude', 'longitude', 'latitude_raw', 'longitude_raw',
-        'hemisphere_ns', 'hemisphere_ew'
-    ]]
+    dim_location = dim_location[['location_id'] + LOCATION_COLUMNS]
 
     logger.info(f"Dimensao de localizacao criada: {len(dim_location)} locais unicos")
-    return dim_location
\ No newline at end of file
+    return dim_location
+
+
+def _lookup_positions(dim_keys: pd.DataFrame, keys: pd.DataFrame) -> np.ndarray:
+    """
+    Encontra a posicao de cada linha de `keys` em `dim_keys`.
+
+    E um hash join feito com codigos inteiros: cada coluna do chunk e
+    fatorizada (cada valor distinto aparece uma vez), os valores
+    distintos sao traduzidos para o codigo da dimensao (poucos
+    milhares), os codigos sao combinados num unico inteiro e so entao
+    buscados no indice da dimensao. Retorna -1 onde a chave nao existe.
+    """
+    dim_code = np.zeros(len(dim_keys), dtype=np.int64)
+    code = np.zeros(len(keys), dtype=np.int64)
+    missing = np.zeros(len(keys), dtype=bool)
+
+    for col in dim_keys.columns:
+        categories = pd.Index(dim_keys[col].dropna().unique())
+        # +1 para reservar o 0 para valores nulos
+        dim_col_code = categories.get_indexer(dim_keys[col]) + 1
+
+        row_codes, uniques = pd.factorize(keys[col])
+        unique_codes = categories.get_indexer(uniques) + 1
+        col_code = np.where(row_codes >= 0, unique_codes[row_codes], 0)
+
+        # Chave que nao existe na dimensao (mas nao e nula)
+        missing |= (col_code == 0) & (row_codes >= 0)
+
+        base = len(categories) + 1
+        dim_code = dim_code * base + dim_col_code
+        code = code * base + col_code
+
+    positions = pd.Index(dim_code).get_indexer(code)
+    positions[missing] = -1
+    return positions
+
+
+@instrumented('lookup')
+def create_fact_temperature(
+    df: pd.DataFrame,
+    dim_date: pd.DataFrame,
+    dim_location: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Cria a tabela fato de temperatura a partir de um DataFrame limpo.
+
+    Troca a data e a localizacao de cada linha pelas chaves
+    substitutas (date_id, location_id) das dimensoes, sem loops em
+    Python: as chaves sao resolvidas por hash join vetorizado.
+
+    Funciona em chunks: pode ser chamada para cada pedaco do arquivo
+    de cidades, sempre com as mesmas dimensoes.
+
+    Args:
+        df: DataFrame limpo (saida de clean_temperature_data)
+        dim_date: Dimensao de datas (create_date_dimension)
+        dim_location: Dimensao de localizacao (create_location_dimension)
+
+    Returns:
+        DataFrame com as colunas de climate.fact_temperature.
+        Linhas sem correspondencia nas dimensoes sao descartadas.
+    """
+    # 1. date_id
+    date_pos = pd.Index(pd.to_datetime(dim_date['full_date'])).get_indexer(df['dt'])
+    date_ids = dim_date['date_id'].to_numpy()
+
+    # 2. location_id (uma busca por granularidade presente no chunk)
+    location_pos = np.full(len(df), -1)
+    location_ids = dim_location['location_id'].to_numpy()
+
+    for granularity in df['granularity'].unique():
+        key_cols = LOCATION_KEYS[granularity]
+        mask = (df['granularity'] == granularity).to_numpy()
+
+        candidates = np.flatnonzero((dim_location['granularity'] == granularity).to_numpy())
+        if len(candidates) == 0:
+            continue
+
+        if not key_cols:
+            location_pos[mask] = candidates[0]
+            continue
+
+        dim_keys = dim_location.iloc[candidates][key_cols].reset_index(drop=True)
+        pos = _lookup_positions(dim_keys, df.loc[mask, key_cols])
+        location_pos[mask] = np.where(pos >= 0, candidates[pos], -1)
+
+    # 3. Descarta linhas sem chave
+    valid = (date_pos >= 0) & (location_pos >= 0)
+    dropped = len(df) - int(valid.sum())
+    if dropped:
+        logger.warning(f"{dropped} linhas sem chave nas dimensoes foram descartadas")
+
+    fact = pd.DataFrame({
+        'date_id': date_ids[date_pos[valid]],
+        'location_id': location_ids[location_pos[valid]],
+    })
+
+    # 4. Medidas, no layout da tabela fato (NaN para as ausentes).
+    # Usa .array para nao converter colunas de texto para objetos Python
+    all_valid = dropped == 0
+
+    def take(col: str):
+        values = df[col].array
+        return values if all_valid else values[valid]
+
+    for source_col, fact_col in FACT_COLUMN_MAP.items():
+        if source_col in df.columns:
+            fact[fact_col] = take(source_col)
+
+    for col in FACT_COLUMNS:
+        if col not in fact.columns and col != 'source_file':
+            fact[col] = np.full(len(fact), np.nan, dtype='float32')
+
+    fact['source_file'] = take('source_file')
+
+    return fact[FACT_COLUMNS]
@@ -0,0 +1,123 @@
+"""
+Tendencia linear (OLS) da temperatura anual de cada localizacao.
+
+Calcula, para todas as localizacoes de uma vez, a reta
+temperatura_anual = intercept + slope * ano, sem laco em Python:
+as somas de cada localizacao saem de np.bincount sobre o indice do
+grupo (uma passada por soma no array inteiro).
+
+Para estabilidade numerica, ano e temperatura sao centralizados na
+media da propria localizacao antes das somas (anos ~2000 ao quadrado
+perdem precisao nas formulas com somas brutas).
+
+Colunas do resultado (tabela climate.location_trend):
+
+    - slope / intercept: reta em graus por ano
+    - warming_rate_per_decade: slope * 10
+    - r_squared: fracao da variancia explicada pela reta
+    - slope_stderr: erro padrao do slope (NaN com menos de 3 anos)
+    - n_years, year_start, year_end: anos usados
+    - mean/min/max_temperature e data_points: resumo das medicoes mensais
+
+Mesmas convencoes de climate-web/lib/regression.ts: com menos de 2 anos
+(ou todos no mesmo ano) slope = 0, intercept = media e r_squared = 0;
+serie constante tem r_squared = 1.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+# Primeiro ano considerado (mesmo padrao da rota /api/temperatures/trend)
+TREND_START_YEAR = 1900
+
+TREND_COLUMNS = [
+    'location_id', 'year_start', 'year_end', 'n_years', 'data_points',
+    'slope', 'intercept', 'r_squared', 'warming_rate_per_decade', 'slope_stderr',
+    'mean_temperature', 'min_temperature', 'max_temperature',
+]
+
+
+def compute_location_trends(
+    yearly: pd.DataFrame,
+    start_year: int = TREND_START_YEAR
+) -> pd.DataFrame:
+    """
+    Ajusta uma reta por localizacao sobre as medias anuais.
+
+    Args:
+        yearly: Uma linha por localizacao x ano, com as colunas de
+            climate.agg_location_year: location_id, year,
+            avg_temperature (media do ano), measurement_count,
+            min_temperature e max_temperature (extremos mensais)
+        start_year: Ignora anos anteriores
+
+    Returns:
+        DataFrame com TREND_COLUMNS, uma linha por localizacao
+    """
+    yearly = yearly[
+        (yearly['year'].to_numpy() >= start_year) & yearly['avg_temperature'].notna().to_numpy()
+    ]
+    if yearly.empty:
+        return pd.DataFrame(columns=TREND_COLUMNS)
+
+    # NUMERIC do PostgreSQL chega como Decimal
+    x = yearly['year'].to_numpy(dtype='float64')
+    y = yearly['avg_temperature'].to_numpy(dtype='float64')
+
+    location_ids, group = np.unique(yearly['location_id'].to_numpy(dtype='int64'), return_inverse=True)
+    n_groups = len(location_ids)
+
+    def group_sum(values: np.ndarray) -> np.ndarray:
+        return np.bincount(group, weights=values, minlength=n_groups)
+
+    n = np.bincount(group, minlength=n_groups).astype('float64')
+    mean_x = group_sum(x) / n
+    mean_y = group_sum(y) / n
+
+    dx = x - mean_x[group]
+    dy = y - mean_y[group]
+    sxx = group_sum(dx * dx)
+    sxy = group_sum(dx * dy)
+    syy = group_sum(dy * dy)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fitted = sxx > 0
+        slope = np.where(fitted, sxy / sxx, 0.0)
+        intercept = mean_y - slope * mean_x
+
+        ss_residual = np.maximum(syy - slope * sxy, 0.0)
+        r_squared = np.where(syy > 0, 1.0 - ss_residual / syy, 1.0)
+        r_squared = np.where(fitted, np.clip(r_squared, 0.0, 1.0), 0.0)
+
+        slope_stderr = np.where(
+            fitted & (n > 2), np.sqrt(ss_residual / (n - 2) / sxx), np.nan
+        )
+
+    counts = yearly['measurement_count'].to_numpy(dtype='float64')
+    mins = pd.Series(yearly['min_temperature'].to_numpy(dtype='float64')).groupby(group).min()
+    maxs = pd.Series(yearly['max_temperature'].to_numpy(dtype='float64')).groupby(group).max()
+
+    trends = pd.DataFrame({
+        'location_id': location_ids,
+        'year_start': pd.Series(x).groupby(group).min().to_numpy(dtype='int64'),
+        'year_end': pd.Series(x).groupby(group).max().to_numpy(dtype='int64'),
+        'n_years': n.astype('int64'),
+        'data_points': group_sum(counts).astype('int64'),
+        'slope': slope,
+        'intercept': intercept,
+        'r_squared': r_squared,
+        'warming_rate_per_decade': slope * 10,
+        'slope_stderr': slope_stderr,
+        # Media das medicoes mensais (ponderada pelos meses de cada ano)
+        'mean_temperature': group_sum(y * counts) / group_sum(counts),
+        'min_temperature': mins.to_numpy(),
+        'max_temperature': maxs.to_numpy(),
+    })
+
+    logger.info(f"Tendencias calculadas para {n_groups} localizacoes ({len(yearly)} anos)")
+    return trends[TREND_COLUMNS]
@@ -17,10 +17,21 @@ Exemplos:
 """
 
 import re
-from typing import Optional, Tuple
+from typing import Dict, Literal, Optional, Tuple
+import numpy as np
 import pandas as pd
 
 
+# Regex compilado uma unica vez (usado pelas versoes vetorizadas)
+_COORDINATE_PATTERN = re.compile(r'^([\d.]+)([NSEW])$')
+
+# Cache {string bruta: valor numerico} compartilhado entre chamadas.
+# O arquivo de cidades tem ~3.5k pares de coordenadas distintos repetidos
+# milhares de vezes, entao chunks seguintes quase so acertam o cache.
+_COORDINATE_CACHE: Dict[str, float] = {}
+_COORDINATE_CACHE_MAX = 100_000
+
+
 def parse_coordinate(coord_str: str) -> Optional[float]:
     """
     Converte uma string de coordenada para valor numerico.
@@ -99,4 +110,96 @@ def get_hemisphere(lat_str: str, lon_str: str) -> Tuple[Optional[str], Optional[
         if last_char in ('E', 'W'):
             ew = last_char
 
-    return ns, ew
\ No newline at end of file
+    return ns, ew
+
+
+def clear_coordinate_cache() -> None:
+    """Limpa o cache de coordenadas ja parseadas."""
+    _COORDINATE_CACHE.clear()
+
+
+def _parse_unique_coordinates(uniques: pd.Series) -> np.ndarray:
+    """
+    Parseia um conjunto de strings distintas de uma vez.
+
+    Usa o cache para as strings ja conhecidas e a extracao de regex
+    do pandas (vetorizada) apenas para as novas.
+    """
+    keys = uniques.astype(str)
+    values = keys.map(_COORDINATE_CACHE).to_numpy(dtype=float, na_value=np.nan, copy=True)
+
+    missing = ~keys.isin(_COORDINATE_CACHE.keys()).to_numpy()
+    if missing.any():
+        new_keys = keys[missing]
+        parts = new_keys.str.strip().str.upper().str.extract(_COORDINATE_PATTERN)
+
+        # Numeros invalidos (ex: "1.2.3N") viram NaN em vez de erro
+        parsed = pd.to_numeric(parts[0], errors='coerce').to_numpy(dtype=float)
+        negative = parts[1].isin(['S', 'W']).to_numpy()
+        parsed = np.where(negative, -parsed, parsed)
+
+        values[missing] = parsed
+
+        if len(_COORDINATE_CACHE) + len(new_keys) > _COORDINATE_CACHE_MAX:
+            _COORDINATE_CACHE.clear()
+        # Nunca passa do limite, mesmo se a chamada trouxer mais chaves
+        _COORDINATE_CACHE.update(
+            zip(new_keys.iloc[:_COORDINATE_CACHE_MAX], parsed[:_COORDINATE_CACHE_MAX])
+        )
+
+    return values
+
+
+def parse_coordinate_series(coords: pd.Series) -> pd.Series:
+    """
+    Versao vetorizada de parse_coordinate para uma coluna inteira.
+
+    Em vez de rodar o regex linha a linha, fatoriza a coluna (cada
+    string distinta aparece uma vez) e parseia so os valores unicos.
+
+    Args:
+        coords: Series com strings como "57.05N", "10.33W"
+
+    Returns:
+        Series float com o mesmo indice (NaN onde o parse falhar)
+    """
+    codes, uniques = pd.factorize(coords)
+    unique_values = _parse_unique_coordinates(pd.Series(uniques, dtype=object))
+
+    result = np.full(len(codes), np.nan)
+    valid = codes >= 0
+    result[valid] = unique_values[codes[valid]]
+
+    return pd.Series(result, index=coords.index, name=coords.name)
+
+
+def hemisphere_series(
+    coords: pd.Series,
+    kind: Literal['ns', 'ew']
+) -> pd.Series:
+    """
+    Versao vetorizada de get_hemisphere para uma coluna inteira.
+
+    Args:
+        coords: Series com strings de latitude (kind='ns')
+                ou longitude (kind='ew')
+        kind: Quais letras sao validas ('ns' -> N/S, 'ew' -> E/W)
+
+    Returns:
+        Series com 'N'/'S' (ou 'E'/'W') e None onde nao for valido
+    """
+    valid_letters = ['N', 'S'] if kind == 'ns' else ['E', 'W']
+
+    codes, uniques = pd.factorize(coords)
+    last_chars = pd.Series(uniques, dtype=object).astype(str).str.strip().str.upper().str[-1]
+    unique_values = np.where(
+        last_chars.isin(valid_letters).to_numpy(),
+        last_chars.to_numpy(dtype=object),
+        None
+    )
+
+    result = np.full(len(codes), None, dtype=object)
+    valid = codes >= 0
+    result[valid] = unique_values[codes[valid]]
+
+    return pd.Series(result, index=coords.index, name=coords.name, dtype=object)
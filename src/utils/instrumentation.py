@@ -0,0 +1,390 @@
+"""
+Instrumentacao das etapas do pipeline: tempo, CPU, linhas e memoria.
+
+Cada medicao (uma etapa inteira ou um chunk) vira um registro:
+
+    {"run_id": "...", "source": "city", "stage": "clean", "chunk": 3,
+     "rows_in": 500000, "rows_out": 498211, "wall_s": 0.41, "cpu_s": 0.40,
+     "rows_per_s": 1215148.8, "memory_mb": 15.7, "rss_mb": 310.2,
+     "peak_rss_mb": 402.0, "timestamp": "2026-01-01T12:00:00+00:00"}
+
+Os registros vao para o log e, se configurado, para um arquivo JSON
+lines (METRICS_PATH) que acumula as execucoes: da para comparar uma
+execucao com a anterior e achar regressoes. No fim, os totais por etapa
+podem ser gravados num textfile do Prometheus (PROMETHEUS_TEXTFILE),
+lido pelo textfile collector do node_exporter.
+
+cpu_s e o tempo de CPU do processo inteiro no intervalo (todas as
+threads); peak_rss_mb e o pico do processo ate o fim da etapa.
+memory_mb e raso por padrao (nao conta o conteudo de textos object);
+Instrumentation(deep_memory=True) mede tudo, ao custo de uma passada
+pelos dados de cada resultado.
+
+Uso:
+    metrics = Instrumentation(source='city', jsonl_path='metrics.jsonl')
+
+    with metrics.stage('clean', rows_in=len(df)) as m:
+        df = clean_temperature_data(df, 'city')
+        m.set_result(df)
+
+    for chunk in metrics.iterate('extract', extractor.extract('city', chunksize=100_000)):
+        ...                               # um registro por chunk
+
+    @instrumented('clean')                # mede so com uma Instrumentation ativa
+    def clean(df): ...
+
+    with metrics.activate():
+        clean(df)
+
+    metrics.log_summary()
+    metrics.write_prometheus('/var/lib/node_exporter/climate_etl_city.prom')
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from src.utils.memory import current_rss_mb, frame_memory_mb, peak_rss_mb
+
+logger = logging.getLogger(__name__)
+
+
+# Prefixo das metricas no Prometheus
+PROMETHEUS_PREFIX = 'climate_etl'
+
+# Instrumentation ativa para o decorator @instrumented (ver activate).
+# ContextVar e nao global: threads de outros contextos (ex: workers de
+# carga em paralelo) nao gravam nas metricas desta execucao.
+_active: contextvars.ContextVar[Optional['Instrumentation']] = contextvars.ContextVar(
+    'instrumentation_active', default=None
+)
+
+# Etapas abertas na thread atual: medicoes automaticas (decorator)
+# dentro de uma etapa ja medida nao contam duas vezes
+_local = threading.local()
+
+
+def _depth() -> int:
+    return getattr(_local, 'depth', 0)
+
+
+class StageMeasurement:
+    """
+    Medicao em andamento, devolvida por Instrumentation.stage.
+
+    Quem mede informa o resultado com set_result (ou preenche
+    rows_out/memory_mb direto), ou descarta a medicao com discard.
+    """
+
+    def __init__(self, stage: str, rows_in: Optional[int] = None, deep_memory: bool = False):
+        self.stage = stage
+        self.rows_in = rows_in
+        self.deep_memory = deep_memory
+        self.rows_out: Optional[int] = None
+        self.memory_mb: Optional[float] = None
+        self.discarded = False
+
+    def discard(self) -> None:
+        """Nao registra esta medicao (ex: fim de um iterador)."""
+        self.discarded = True
+
+    def set_result(self, result: Any) -> None:
+        """Linhas (e MB, se for DataFrame) do resultado da etapa."""
+        if isinstance(result, pd.DataFrame):
+            self.rows_out = len(result)
+            self.memory_mb = frame_memory_mb(result, deep=self.deep_memory)
+        elif isinstance(result, int) and not isinstance(result, bool):
+            self.rows_out = result
+
+
+class Instrumentation:
+    """
+    Acumula medicoes por etapa e por chunk de uma execucao.
+
+    Args:
+        source: Fonte processada (vira campo/label das metricas)
+        jsonl_path: Arquivo JSON lines onde cada medicao e acrescentada
+        run_id: Identificador da execucao (padrao: aleatorio)
+        deep_memory: Se True, memory_mb conta o conteudo dos textos
+            (memory_usage(deep=True)); percorre os dados de cada resultado
+    """
+
+    def __init__(
+        self,
+        source: Optional[str] = None,
+        jsonl_path: Optional[Union[str, Path]] = None,
+        run_id: Optional[str] = None,
+        deep_memory: bool = False
+    ):
+        self.source = source
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.deep_memory = deep_memory
+
+        # Totais por etapa: rows, wall_s, cpu_s, chunks e maior chunk em MB
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+        if self.jsonl_path is not None:
+            self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def record(
+        self,
+        stage: str,
+        rows: Optional[int],
+        seconds: float,
+        memory_mb: Optional[float] = None,
+        cpu_seconds: Optional[float] = None,
+        rows_in: Optional[int] = None,
+        error: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Registra uma medicao ja feita.
+
+        Args:
+            stage: Nome da etapa
+            rows: Linhas produzidas (rows_out)
+            seconds: Tempo de parede
+            memory_mb: Tamanho do resultado
+            cpu_seconds: Tempo de CPU do processo no intervalo
+            rows_in: Linhas recebidas
+            error: Nome da excecao, se a etapa falhou
+
+        Returns:
+            O registro gravado
+        """
+        rate = rows / seconds if rows is not None and seconds > 0 else None
+
+        with self._lock:
+            totals = self.totals.setdefault(
+                stage, {'rows': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'chunks': 0, 'memory_mb': 0.0}
+            )
+            chunk = int(totals['chunks'])
+            totals['chunks'] += 1
+            totals['rows'] += rows or 0
+            totals['wall_s'] += seconds
+            totals['cpu_s'] += cpu_seconds or 0.0
+            if memory_mb is not None:
+                totals['memory_mb'] = max(totals['memory_mb'], memory_mb)
+
+            record = {
+                'run_id': self.run_id,
+                'source': self.source,
+                'stage': stage,
+                'chunk': chunk,
+                'rows_in': rows_in,
+                'rows_out': rows,
+                'wall_s': round(seconds, 6),
+                'cpu_s': None if cpu_seconds is None else round(cpu_seconds, 6),
+                'rows_per_s': None if rate is None else round(rate, 1),
+                'memory_mb': None if memory_mb is None else round(memory_mb, 3),
+                'rss_mb': current_rss_mb(),
+                'peak_rss_mb': peak_rss_mb(),
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            }
+            if error is not None:
+                record['error'] = error
+
+            if self.jsonl_path is not None:
+                with open(self.jsonl_path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+
+        message = f"[{stage}] {rows or 0} linhas em {seconds:.2f}s"
+        if rate is not None:
+            message += f" ({rate:,.0f} linhas/s)"
+        if memory_mb is not None:
+            message += f", {memory_mb:.1f} MB"
+        if error is not None:
+            message += f", erro: {error}"
+        logger.info(message)
+
+        return record
+
+    @contextmanager
+    def stage(self, stage: str, rows_in: Optional[int] = None) -> Iterator[StageMeasurement]:
+        """
+        Mede o bloco como uma etapa (ou um chunk dela).
+
+        Medicoes automaticas (@instrumented) feitas dentro do bloco sao
+        ignoradas, para nao contar o mesmo trabalho duas vezes.
+        """
+        measurement = StageMeasurement(stage, rows_in, self.deep_memory)
+        error = None
+        _local.depth = _depth() + 1
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield measurement
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            _local.depth -= 1
+            if not measurement.discarded:
+                self.record(
+                    stage,
+                    measurement.rows_out,
+                    time.perf_counter() - wall_start,
+                    memory_mb=measurement.memory_mb,
+                    cpu_seconds=time.process_time() - cpu_start,
+                    rows_in=measurement.rows_in,
+                    error=error,
+                )
+
+    def iterate(
+        self,
+        stage: str,
+        chunks: Iterable[Any],
+        skip_nested: bool = False
+    ) -> Iterator[Any]:
+        """
+        Repassa os itens de um iterador, medindo cada next() como um chunk.
+
+        Util para generators (ex: extract em chunks), onde o trabalho
+        acontece quando o proximo item e pedido.
+
+        Args:
+            stage: Nome da etapa
+            chunks: Iteravel a medir
+            skip_nested: Nao mede os next() feitos dentro de outra etapa
+                (usado pelo decorator @instrumented)
+        """
+        iterator = iter(chunks)
+        while True:
+            if skip_nested and _depth() > 0:
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                yield chunk
+                continue
+
+            with self.stage(stage) as measurement:
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    measurement.discard()
+                    return
+                measurement.set_result(chunk)
+            yield chunk
+
+    @contextmanager
+    def activate(self) -> Iterator['Instrumentation']:
+        """Torna esta Instrumentation o destino do decorator @instrumented."""
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    def log_summary(self) -> None:
+        """Loga os totais de cada etapa e o pico de memoria do processo."""
+        for stage, totals in self.totals.items():
+            rows, seconds = int(totals['rows']), totals['wall_s']
+            rate = rows / seconds if seconds > 0 else float('inf')
+            message = (
+                f"Resumo [{stage}]: {rows} linhas, {seconds:.1f}s "
+                f"(CPU {totals['cpu_s']:.1f}s), {rate:,.0f} linhas/s"
+            )
+            if totals['memory_mb']:
+                message += f", maior chunk {totals['memory_mb']:.1f} MB"
+            logger.info(message)
+
+        peak = peak_rss_mb()
+        if peak is not None:
+            logger.info(f"Pico de memoria do processo: {peak:.0f} MB")
+
+    def prometheus_text(self) -> str:
+        """Totais por etapa no formato texto do Prometheus."""
+        labels = {'source': self.source} if self.source else {}
+
+        def label_text(**extra: str) -> str:
+            items = {**labels, **extra}
+            inner = ",".join(f'{k}="{v}"' for k, v in sorted(items.items()))
+            return "{" + inner + "}" if inner else ""
+
+        metrics = [
+            ('stage_seconds', 'Tempo de parede por etapa na ultima execucao', 'wall_s'),
+            ('stage_cpu_seconds', 'Tempo de CPU por etapa na ultima execucao', 'cpu_s'),
+            ('stage_rows', 'Linhas produzidas por etapa na ultima execucao', 'rows'),
+            ('stage_chunks', 'Chunks medidos por etapa na ultima execucao', 'chunks'),
+        ]
+        lines: List[str] = []
+        for name, help_text, key in metrics:
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} gauge")
+            for stage, totals in sorted(self.totals.items()):
+                lines.append(f"{PROMETHEUS_PREFIX}_{name}{label_text(stage=stage)} {totals[key]:g}")
+
+        peak = peak_rss_mb()
+        if peak is not None:
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_peak_rss_bytes Pico de memoria do processo")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_peak_rss_bytes gauge")
+            lines.append(f"{PROMETHEUS_PREFIX}_peak_rss_bytes{label_text()} {peak * 1024 * 1024:.0f}")
+
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_last_run_timestamp_seconds Fim da ultima execucao")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_last_run_timestamp_seconds gauge")
+        lines.append(f"{PROMETHEUS_PREFIX}_last_run_timestamp_seconds{label_text()} {time.time():.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Union[str, Path]) -> None:
+        """
+        Grava prometheus_text() em `path` de forma atomica.
+
+        O node_exporter pode ler o arquivo a qualquer momento, entao o
+        conteudo vai para um temporario e so depois substitui o antigo.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(self.prometheus_text())
+        os.replace(tmp_path, path)
+        logger.info(f"Metricas Prometheus gravadas em {path}")
+
+
+def instrumented(stage: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator que mede cada chamada da funcao como uma etapa.
+
+    So mede quando ha uma Instrumentation ativa (activate) e a chamada
+    nao esta dentro de outra etapa medida; fora disso o custo e uma
+    checagem. rows_in e o tamanho do primeiro DataFrame dos argumentos;
+    rows_out vem do retorno (DataFrame ou numero de linhas). Se a
+    funcao retornar um iterador de chunks, cada chunk e medido.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = _active.get()
+            if metrics is None or _depth() > 0:
+                return func(*args, **kwargs)
+
+            rows_in = next(
+                (len(a) for a in (*args, *kwargs.values()) if isinstance(a, pd.DataFrame)),
+                None
+            )
+            with metrics.stage(stage, rows_in=rows_in) as measurement:
+                result = func(*args, **kwargs)
+                if isinstance(result, Iterator):
+                    # Generator: o trabalho acontece a cada chunk
+                    measurement.discard()
+                else:
+                    measurement.set_result(result)
+
+            if isinstance(result, Iterator):
+                return metrics.iterate(stage, result, skip_nested=True)
+            return result
+        return wrapper
+    return decorator
+
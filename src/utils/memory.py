@@ -0,0 +1,61 @@
+"""
+Medicao de memoria de DataFrames e do processo.
+
+Uso:
+    from src.utils.memory import frame_memory_mb, memory_report
+
+    print(frame_memory_mb(df))   # MB ocupados pelo DataFrame
+    print(memory_report(df))     # MB e dtype por coluna
+"""
+
+import os
+from typing import Optional
+
+import pandas as pd
+
+
+def frame_memory_mb(df: pd.DataFrame, deep: bool = True) -> float:
+    """
+    Memoria ocupada pelo DataFrame, em MB.
+
+    Com deep=True conta o conteudo dos textos, nao so os ponteiros
+    (sem isso colunas object parecem muito menores). deep=False nao
+    percorre os dados: serve para medicoes frequentes.
+    """
+    return df.memory_usage(deep=deep, index=False).sum() / (1024 * 1024)
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Relatorio de memoria por coluna, da maior para a menor.
+
+    Returns:
+        DataFrame com dtype e mb de cada coluna, mais uma linha 'TOTAL'
+    """
+    usage = df.memory_usage(deep=True, index=False) / (1024 * 1024)
+    report = pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'mb': usage,
+    }).sort_values('mb', ascending=False)
+    report.loc['TOTAL'] = ['', usage.sum()]
+    return report
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de memoria residente do processo (MB), se disponivel."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # No Linux ru_maxrss vem em KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    """Memoria residente atual do processo (MB); so no Linux."""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
@@ -0,0 +1,431 @@
+"""
+Indice de busca por nome das localizacoes (autocomplete).
+
+A busca de cidades da API faz uma query ILIKE no banco a cada tecla.
+Este indice e montado pelo pipeline a partir de dim_location e salvo
+em .npz (SEARCH_INDEX_PATH); as consultas rodam em memoria, em
+fracoes de milissegundo.
+
+Como funciona:
+- Nomes normalizados: sem acento, minusculos, pontuacao vira espaco
+  ("São Paulo" -> "sao paulo"), e a consulta passa pela mesma funcao.
+- Prefixo: um array ordenado de chaves com o nome inteiro e o nome a
+  partir de cada palavra ("sao paulo", "paulo"). Um prefixo e uma
+  faixa contigua do array, achada com duas buscas binarias.
+- Aproximada: se o prefixo nao encontra k resultados, completa com
+  trigramas (pedacos de 3 letras) em comum, pela similaridade de
+  Jaccard. Os trigramas ficam num indice invertido em formato CSR
+  (trigramas ordenados + offsets + localizacoes).
+- Ordem: nome exato, prefixo do nome, prefixo de uma palavra e por
+  ultimo os aproximados; dentro de cada grupo, localizacoes com mais
+  medicoes (cobertura de dados) primeiro.
+
+Uso:
+    index = LocationSearchIndex.from_dim_location(dim_location, coverage)
+    index.search("sao pa", k=5, granularity='city')
+
+    search_locations("sao pa")  # usa o indice de SEARCH_INDEX_PATH
+
+    python -m src.utils.search build
+    python -m src.utils.search query "rio de jan"
+"""
+
+import argparse
+import logging
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import SEARCH_INDEX_PATH
+
+logger = logging.getLogger(__name__)
+
+
+# Similaridade minima (Jaccard de trigramas) para um resultado aproximado
+MIN_SIMILARITY = 0.3
+
+# Tipo de correspondencia -> posicao na ordenacao
+MATCH_EXACT = 0
+MATCH_NAME_PREFIX = 1
+MATCH_WORD_PREFIX = 2
+MATCH_FUZZY = 3
+MATCH_NAMES = {
+    MATCH_EXACT: 'exact',
+    MATCH_NAME_PREFIX: 'prefix',
+    MATCH_WORD_PREFIX: 'word_prefix',
+    MATCH_FUZZY: 'fuzzy',
+}
+
+# Coluna de dim_location com o nome de cada granularidade
+NAME_COLUMNS = {'city': 'city', 'state': 'state', 'country': 'country'}
+
+# Maior caractere possivel: q + _MAX_CHAR fecha a faixa do prefixo q
+_MAX_CHAR = '\U0010ffff'
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize_name(text: str) -> str:
+    """
+    Normaliza um nome para busca.
+
+    Exemplos:
+        >>> normalize_name("São Paulo")
+        'sao paulo'
+        >>> normalize_name("  Ürümqi ")
+        'urumqi'
+    """
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    without_accents = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_WORD.sub(' ', without_accents.casefold()).strip()
+
+
+def trigrams(normalized: str) -> List[str]:
+    """Trigramas distintos de um nome ja normalizado (com bordas)."""
+    padded = f"  {normalized} "
+    return sorted({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+class LocationSearchIndex:
+    """
+    Busca por prefixo e aproximada sobre os nomes de dim_location.
+
+    Tudo fica em arrays NumPy, entao salvar e carregar e so
+    np.savez/np.load.
+    """
+
+    def __init__(
+        self,
+        location_ids,
+        names,
+        countries,
+        granularities,
+        coverage=None
+    ):
+        """
+        Monta o indice.
+
+        Args:
+            location_ids: IDs de dim_location
+            names: Nome exibido (cidade, estado ou pais)
+            countries: Pais de cada localizacao ('' se nao houver)
+            granularities: 'city', 'state' ou 'country'
+            coverage: Medicoes de cada localizacao (ordenacao); padrao 0
+        """
+        self.location_ids = np.asarray(location_ids, dtype='int64')
+        self.names = np.asarray(names, dtype=str)
+        self.countries = np.asarray(countries, dtype=str)
+        self.granularities = np.asarray(granularities, dtype=str)
+        self.coverage = (
+            np.zeros(len(self.location_ids), dtype='int64') if coverage is None
+            else np.asarray(coverage, dtype='int64')
+        )
+
+        normalized = [normalize_name(name) for name in self.names]
+        self.normalized = np.asarray(normalized, dtype=str)
+
+        # Chaves de prefixo: nome inteiro e a partir de cada palavra
+        keys, entries, kinds = [], [], []
+        for entry, name in enumerate(normalized):
+            words = name.split(' ')
+            for i in range(len(words)):
+                keys.append(' '.join(words[i:]))
+                entries.append(entry)
+                kinds.append(MATCH_NAME_PREFIX if i == 0 else MATCH_WORD_PREFIX)
+        order = np.argsort(np.asarray(keys, dtype=str), kind='stable')
+        self.prefix_keys = np.asarray(keys, dtype=str)[order]
+        self.prefix_entries = np.asarray(entries, dtype='int64')[order]
+        self.prefix_kinds = np.asarray(kinds, dtype='int8')[order]
+
+        # Indice invertido de trigramas (CSR)
+        pairs = [(gram, entry) for entry, name in enumerate(normalized) for gram in trigrams(name)]
+        grams = np.asarray([gram for gram, _ in pairs], dtype=str)
+        gram_entries = np.asarray([entry for _, entry in pairs], dtype='int64')
+        order = np.argsort(grams, kind='stable')
+        self.trigram_keys, counts = np.unique(grams[order], return_counts=True)
+        self.trigram_offsets = np.concatenate([[0], np.cumsum(counts)]).astype('int64')
+        self.trigram_postings = gram_entries[order]
+        self.trigram_counts = np.bincount(gram_entries, minlength=len(self.location_ids))
+
+        self._prepare_ranking()
+
+    def _prepare_ranking(self) -> None:
+        """Ordem de desempate: mais cobertura, depois nome (alfabetico)."""
+        tie_break = np.lexsort((self.normalized, -self.coverage))
+        self._tie_rank = np.empty(len(tie_break), dtype='int64')
+        self._tie_rank[tie_break] = np.arange(len(tie_break))
+
+    def __len__(self) -> int:
+        return len(self.location_ids)
+
+    @classmethod
+    def from_dim_location(
+        cls,
+        dim_location: pd.DataFrame,
+        coverage: Optional[pd.Series] = None
+    ) -> 'LocationSearchIndex':
+        """
+        Indexa cidades, estados e paises de dim_location.
+
+        Args:
+            dim_location: Dimensao de localizacao
+            coverage: Medicoes por location_id (ver
+                src.load.rollups.location_coverage); opcional
+        """
+        frames = []
+        for granularity, column in NAME_COLUMNS.items():
+            rows = dim_location[
+                (dim_location['granularity'] == granularity) & dim_location[column].notna()
+            ]
+            frames.append(pd.DataFrame({
+                'location_id': rows['location_id'].to_numpy(dtype='int64'),
+                'name': rows[column].astype(str).to_numpy(),
+                'country': (
+                    rows['country'].fillna('').astype(str).to_numpy()
+                    if granularity != 'country' else np.full(len(rows), '', dtype=object)
+                ),
+                'granularity': granularity,
+            }))
+        entries = pd.concat(frames, ignore_index=True)
+
+        measurements = np.zeros(len(entries), dtype='int64')
+        if coverage is not None:
+            measurements = (
+                entries['location_id'].map(coverage).fillna(0).to_numpy(dtype='int64')
+            )
+
+        logger.info(f"Indice de busca: {len(entries)} nomes")
+        return cls(
+            entries['location_id'], entries['name'], entries['country'],
+            entries['granularity'], measurements
+        )
+
+    def _prefix_matches(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Localizacoes cujo nome (ou uma palavra dele) comeca com query."""
+        # prefix_keys tem largura fixa ('<U{n}') e, conforme a versao, o
+        # NumPy trunca a busca nessa largura: query + _MAX_CHAR so serve
+        # como limite se couber. Query maior que a chave mais longa nao
+        # e prefixo de nenhuma; do mesmo tamanho, so casa com ela mesma.
+        width = self.prefix_keys.dtype.itemsize // np.dtype('<U1').itemsize
+        if len(query) > width:
+            return np.empty(0, dtype='int64'), np.empty(0, dtype='int64')
+        start = np.searchsorted(self.prefix_keys, query, side='left')
+        if len(query) == width:
+            end = np.searchsorted(self.prefix_keys, query, side='right')
+        else:
+            end = np.searchsorted(self.prefix_keys, query + _MAX_CHAR, side='left')
+        entries = self.prefix_entries[start:end]
+        kinds = self.prefix_kinds[start:end].astype('int64')
+        kinds[(kinds == MATCH_NAME_PREFIX) & (self.normalized[entries] == query)] = MATCH_EXACT
+
+        # Uma localizacao pode casar pelo nome e por uma palavra: fica o melhor
+        order = np.lexsort((kinds, entries))
+        entries, kinds = entries[order], kinds[order]
+        first = np.ones(len(entries), dtype=bool)
+        first[1:] = entries[1:] != entries[:-1]
+        return entries[first], kinds[first]
+
+    def _fuzzy_matches(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Localizacoes com similaridade de trigramas >= MIN_SIMILARITY."""
+        query_grams = trigrams(query)
+        positions = np.searchsorted(self.trigram_keys, query_grams)
+        postings = [
+            self.trigram_postings[self.trigram_offsets[p]:self.trigram_offsets[p + 1]]
+            for p, gram in zip(positions.tolist(), query_grams)
+            if p < len(self.trigram_keys) and self.trigram_keys[p] == gram
+        ]
+        if not postings:
+            return np.empty(0, dtype='int64'), np.empty(0)
+
+        shared = np.bincount(np.concatenate(postings), minlength=len(self))
+        union = len(query_grams) + self.trigram_counts - shared
+        similarity = shared / np.maximum(union, 1)
+
+        entries = np.flatnonzero(similarity >= MIN_SIMILARITY)
+        return entries, similarity[entries]
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        granularity: Optional[str] = None,
+        fuzzy: bool = True
+    ) -> List[Dict]:
+        """
+        Melhores k localizacoes para o texto digitado.
+
+        Args:
+            query: Texto digitado (acentos e maiusculas sao ignorados)
+            k: Maximo de resultados
+            granularity: Restringe a 'city', 'state' ou 'country'
+            fuzzy: Completa com resultados aproximados se faltar
+
+        Returns:
+            Lista de dicts com location_id, name, country, granularity,
+            coverage, match ('exact', 'prefix', 'word_prefix' ou
+            'fuzzy') e score (1.0 para prefixo, similaridade no fuzzy)
+        """
+        normalized = normalize_name(query)
+        if not normalized or k < 1:
+            return []
+
+        allowed = None
+        if granularity is not None:
+            allowed = self.granularities == granularity
+
+        entries, kinds = self._prefix_matches(normalized)
+        if allowed is not None:
+            keep = allowed[entries]
+            entries, kinds = entries[keep], kinds[keep]
+        order = np.lexsort((self._tie_rank[entries], kinds))[:k]
+        results = [
+            self._result(entry, int(kind), 1.0)
+            for entry, kind in zip(entries[order], kinds[order])
+        ]
+
+        if fuzzy and len(results) < k:
+            candidates, similarity = self._fuzzy_matches(normalized)
+            found = np.zeros(len(self), dtype=bool)
+            found[entries] = True
+            keep = ~found[candidates]
+            if allowed is not None:
+                keep &= allowed[candidates]
+            candidates, similarity = candidates[keep], similarity[keep]
+            order = np.lexsort((self._tie_rank[candidates], -similarity))[:k - len(results)]
+            results.extend(
+                self._result(entry, MATCH_FUZZY, round(float(score), 4))
+                for entry, score in zip(candidates[order], similarity[order])
+            )
+
+        return results
+
+    def _result(self, entry: int, kind: int, score: float) -> Dict:
+        return {
+            'location_id': int(self.location_ids[entry]),
+            'name': str(self.names[entry]),
+            'country': str(self.countries[entry]) or None,
+            'granularity': str(self.granularities[entry]),
+            'coverage': int(self.coverage[entry]),
+            'match': MATCH_NAMES[kind],
+            'score': score,
+        }
+
+    def save(self, path: Union[str, Path] = SEARCH_INDEX_PATH) -> Path:
+        """Grava o indice em .npz (escrita atomica: arquivo temporario + rename)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **{name: getattr(self, name) for name in _SAVED_ARRAYS})
+        tmp_path.replace(path)
+        logger.info(f"Indice de busca salvo em {path} ({len(self)} nomes)")
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = SEARCH_INDEX_PATH) -> 'LocationSearchIndex':
+        """Le um indice gravado por save() sem reconstruir as chaves."""
+        index = cls.__new__(cls)
+        with np.load(path, allow_pickle=False) as data:
+            for name in _SAVED_ARRAYS:
+                setattr(index, name, data[name])
+        index._prepare_ranking()
+        return index
+
+
+# Arrays gravados no .npz (o resto e derivado em _prepare_ranking)
+_SAVED_ARRAYS = [
+    'location_ids', 'names', 'countries', 'granularities', 'coverage', 'normalized',
+    'prefix_keys', 'prefix_entries', 'prefix_kinds',
+    'trigram_keys', 'trigram_offsets', 'trigram_postings', 'trigram_counts',
+]
+
+# Indices ja lidos do disco: caminho -> (mtime, indice)
+_LOADED_INDEXES: Dict[Path, Tuple[int, LocationSearchIndex]] = {}
+
+
+def load_search_index(path: Union[str, Path] = SEARCH_INDEX_PATH) -> LocationSearchIndex:
+    """Le o indice do disco uma vez por processo (rele se o arquivo mudar)."""
+    path = Path(path)
+    mtime = path.stat().st_mtime_ns
+    cached = _LOADED_INDEXES.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, LocationSearchIndex.load(path))
+        _LOADED_INDEXES[path] = cached
+    return cached[1]
+
+
+def search_locations(
+    query: str,
+    k: int = 10,
+    granularity: Optional[str] = None,
+    index: Optional[LocationSearchIndex] = None
+) -> List[Dict]:
+    """Atalho para LocationSearchIndex.search com o indice de SEARCH_INDEX_PATH."""
+    index = index or load_search_index()
+    return index.search(query, k=k, granularity=granularity)
+
+
+def build_search_index(
+    dim_location: pd.DataFrame,
+    coverage: Optional[pd.Series] = None,
+    path: Union[str, Path] = SEARCH_INDEX_PATH
+) -> LocationSearchIndex:
+    """Monta e salva o indice de busca a partir de dim_location."""
+    index = LocationSearchIndex.from_dim_location(dim_location, coverage)
+    index.save(path)
+    return index
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Linha de comando: build (a partir do banco) e query."""
+    parser = argparse.ArgumentParser(description="Indice de busca por nome das localizacoes.")
+    parser.add_argument("--path", default=str(SEARCH_INDEX_PATH), help="Arquivo .npz")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Monta o indice a partir de dim_location")
+    build.add_argument("--backend", choices=["postgres", "duckdb"], default="postgres")
+    build.add_argument("--duckdb-path", help="Arquivo DuckDB (com --backend duckdb)")
+
+    query = commands.add_parser("query", help="Busca um nome")
+    query.add_argument("text")
+    query.add_argument("--k", type=int, default=10)
+    query.add_argument("--granularity", choices=list(NAME_COLUMNS))
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    if args.command == "build":
+        # Import tardio: rollups importa os dois loaders
+        from src.load.rollups import location_coverage
+
+        if args.backend == "duckdb":
+            from src.load.duckdb_loader import DuckDBLoader
+
+            loader = DuckDBLoader(args.duckdb_path)
+        else:
+            from src.load.database_loader import DatabaseLoader
+
+            loader = DatabaseLoader()
+
+        dim_location = loader.read_table('dim_location')
+        try:
+            coverage = location_coverage(loader)
+        except Exception as e:
+            logger.warning(f"Sem rollups para ordenar por cobertura ({e})")
+            coverage = None
+        if args.backend == "duckdb":
+            loader.close()
+
+        build_search_index(dim_location, coverage, args.path)
+    else:
+        index = load_search_index(args.path)
+        results = index.search(args.text, k=args.k, granularity=args.granularity)
+        print(pd.DataFrame(results).to_string(index=False) if results else "Nada encontrado")
+
+
+if __name__ == "__main__":
+    main()
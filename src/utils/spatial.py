@@ -0,0 +1,490 @@
+"""
+Indice espacial das localizacoes (vizinho mais proximo e raio).
+
+Responde "qual cidade com dados fica mais perto deste ponto" sem
+percorrer dim_location inteira para cada ponto.
+
+Como funciona:
+- Cada (latitude, longitude) vira um vetor unitario 3D. A distancia
+  reta (corda) entre dois vetores cresce junto com a distancia sobre a
+  esfera, entao o vizinho mais proximo pela corda e o mesmo pela
+  haversine, e a corda converte exatamente para km:
+  d = 2R * asin(corda / 2). Nao ha problema no antimeridiano (180/-180)
+  nem perto dos polos, como haveria com graus.
+- Uma KD-tree divide os vetores pela mediana da dimensao mais espalhada
+  ate cada folha ter no maximo LEAF_SIZE pontos; cada folha guarda a
+  caixa (min/max) dos seus pontos.
+- A consulta e em lote e vetorizada: para todos os pontos de uma vez,
+  calcula a distancia minima ate cada caixa e visita as folhas da mais
+  proxima para a mais distante, parando quando a proxima caixa ja esta
+  mais longe que o k-esimo vizinho encontrado (busca exata).
+
+Com ~3.5k cidades sao ~55 folhas: milhares de pontos por chamada
+levam poucos milissegundos.
+
+O indice e salvo em .npz (LOCATION_INDEX_PATH) ao lado dos dados
+processados, entao o pipeline e uma camada de servico usam o mesmo
+arquivo sem consultar o banco.
+
+Uso:
+    index = LocationIndex.from_dim_location(dim_location)
+    distances_km, location_ids = index.query([-15.78], [-47.93], k=3)
+
+    nearest_locations([-15.78, 51.5], [-47.93, -0.12], k=1)  # DataFrame
+
+    python -m src.utils.spatial build               # a partir do PostgreSQL
+    python -m src.utils.spatial build --backend duckdb
+    python -m src.utils.spatial query -15.78 -47.93 --k 3
+"""
+
+import argparse
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import LOCATION_INDEX_PATH
+
+logger = logging.getLogger(__name__)
+
+
+# Raio medio da Terra (IUGG), o mesmo usado pela formula de haversine
+EARTH_RADIUS_KM = 6371.0088
+
+# Pontos por folha da KD-tree
+LEAF_SIZE = 64
+
+# Pontos de consulta processados por vez (limita a matriz pontos x folhas)
+QUERY_BLOCK = 4_096
+
+ArrayLike = Union[Sequence[float], np.ndarray, pd.Series]
+
+
+def to_unit_vectors(latitudes: ArrayLike, longitudes: ArrayLike) -> np.ndarray:
+    """
+    Converte graus em vetores unitarios (x, y, z).
+
+    Raises:
+        ValueError: Se houver coordenada nula ou latitude fora de [-90, 90]
+    """
+    lat = np.asarray(latitudes, dtype='float64')
+    lon = np.asarray(longitudes, dtype='float64')
+    if lat.shape != lon.shape:
+        raise ValueError("latitudes e longitudes com tamanhos diferentes")
+    if np.isnan(lat).any() or np.isnan(lon).any():
+        raise ValueError("Coordenadas nulas nao podem ser indexadas/consultadas")
+    if (np.abs(lat) > 90).any():
+        raise ValueError("Latitude fora de [-90, 90]")
+
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Distancia reta entre vetores unitarios -> distancia sobre a esfera (km)."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def km_to_chord(distance_km: float) -> float:
+    """Inverso de chord_to_km (raios acima de meia volta viram o diametro)."""
+    angle = min(distance_km / EARTH_RADIUS_KM, np.pi)
+    return 2 * np.sin(angle / 2)
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Distancia de haversine em km (vetorizada; usada como referencia)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype='float64'))
+                              for v in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _build_leaves(points: np.ndarray, leaf_size: int) -> List[np.ndarray]:
+    """Divide os pontos pela mediana da dimensao mais espalhada (KD-tree)."""
+    leaves = []
+    stack = [np.arange(len(points))]
+    while stack:
+        members = stack.pop()
+        if len(members) <= leaf_size:
+            leaves.append(members)
+            continue
+
+        coords = points[members]
+        axis = int(np.argmax(coords.max(axis=0) - coords.min(axis=0)))
+        order = np.argsort(coords[:, axis], kind='stable')
+        half = len(members) // 2
+        stack.append(members[order[half:]])
+        stack.append(members[order[:half]])
+
+    return leaves
+
+
+class LocationIndex:
+    """
+    KD-tree sobre os vetores unitarios das localizacoes.
+
+    Guarda tudo em arrays NumPy (sem objetos por no), entao salvar e
+    carregar e so np.savez/np.load.
+    """
+
+    def __init__(
+        self,
+        location_ids: ArrayLike,
+        latitudes: ArrayLike,
+        longitudes: ArrayLike,
+        cities: Optional[ArrayLike] = None,
+        countries: Optional[ArrayLike] = None,
+        leaf_size: int = LEAF_SIZE
+    ):
+        """
+        Monta o indice.
+
+        Args:
+            location_ids: IDs de dim_location de cada ponto
+            latitudes: Latitudes em graus (positivo = Norte)
+            longitudes: Longitudes em graus (positivo = Leste)
+            cities: Nome da cidade de cada ponto (opcional)
+            countries: Pais de cada ponto (opcional)
+            leaf_size: Pontos por folha
+        """
+        self.location_ids = np.asarray(location_ids, dtype='int64')
+        self.latitudes = np.asarray(latitudes, dtype='float64')
+        self.longitudes = np.asarray(longitudes, dtype='float64')
+        n = len(self.location_ids)
+        self.cities = np.asarray(cities if cities is not None else [''] * n, dtype=str)
+        self.countries = np.asarray(countries if countries is not None else [''] * n, dtype=str)
+
+        self.points = to_unit_vectors(self.latitudes, self.longitudes).reshape(-1, 3)
+        self.leaf_size = leaf_size
+
+        leaves = _build_leaves(self.points, leaf_size) if n else []
+        # Folhas com tamanho fixo: posicoes extras = -1
+        self.leaf_members = np.full((len(leaves), leaf_size), -1, dtype='int64')
+        for i, members in enumerate(leaves):
+            self.leaf_members[i, :len(members)] = members
+        self._prepare_leaves()
+
+    def _prepare_leaves(self) -> None:
+        """Caixas e coordenadas das folhas (derivadas de points e leaf_members)."""
+        valid = self.leaf_members >= 0
+        coords = self.points[np.maximum(self.leaf_members, 0)]
+        coords[~valid] = np.inf
+        self._leaf_valid = valid
+        self._leaf_points = coords
+
+        self.leaf_min = np.where(valid[..., None], coords, np.inf).min(axis=1)
+        self.leaf_max = np.where(valid[..., None], coords, -np.inf).max(axis=1)
+
+    def __len__(self) -> int:
+        return len(self.location_ids)
+
+    @classmethod
+    def from_dim_location(
+        cls,
+        dim_location: pd.DataFrame,
+        leaf_size: int = LEAF_SIZE
+    ) -> 'LocationIndex':
+        """
+        Indexa as localizacoes de dim_location que tem coordenadas.
+
+        Paises, estados e o registro global nao tem latitude/longitude
+        e ficam de fora; na pratica o indice e o das cidades.
+        """
+        located = dim_location.dropna(subset=['latitude', 'longitude'])
+        logger.info(f"Indice espacial: {len(located)} localizacoes com coordenadas")
+        return cls(
+            located['location_id'],
+            located['latitude'].astype('float64'),
+            located['longitude'].astype('float64'),
+            cities=located['city'].fillna('').astype(str) if 'city' in located else None,
+            countries=located['country'].fillna('').astype(str) if 'country' in located else None,
+            leaf_size=leaf_size,
+        )
+
+    # As distancias internas sao cordas ao quadrado: a ordem e a mesma
+    # e evita uma raiz por par consulta x ponto
+
+    def _box_distances(self, queries: np.ndarray) -> np.ndarray:
+        """Corda^2 minima de cada consulta ate cada caixa: (Q, folhas)."""
+        squared = np.zeros((len(queries), len(self.leaf_min)))
+        # Um eixo por vez: evita temporarios (Q, folhas, 3)
+        for axis in range(3):
+            coords = queries[:, axis, None]
+            gap = np.maximum(self.leaf_min[:, axis] - coords, coords - self.leaf_max[:, axis])
+            np.maximum(gap, 0, out=gap)
+            squared += gap * gap
+        return squared
+
+    def _leaf_distances(self, queries: np.ndarray, leaves: np.ndarray) -> np.ndarray:
+        """Corda^2 de cada consulta ate os pontos da sua folha: (A, leaf_size)."""
+        diff = self._leaf_points[leaves] - queries[:, None, :]
+        squared = np.einsum('ijk,ijk->ij', diff, diff)
+        squared[~self._leaf_valid[leaves]] = np.inf
+        return squared
+
+    def query(
+        self,
+        latitudes: ArrayLike,
+        longitudes: ArrayLike,
+        k: int = 1
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Os k vizinhos mais proximos de cada ponto.
+
+        Args:
+            latitudes: Latitudes das consultas (graus)
+            longitudes: Longitudes das consultas (graus)
+            k: Vizinhos por consulta (limitado ao tamanho do indice)
+
+        Returns:
+            Tupla (distancias em km, location_ids), ambos (Q, k) e
+            ordenados do mais proximo para o mais distante
+        """
+        queries = to_unit_vectors(latitudes, longitudes).reshape(-1, 3)
+        k = min(k, len(self))
+        if k < 1:
+            empty = np.empty((len(queries), 0))
+            return empty, empty.astype('int64')
+
+        chords = np.empty((len(queries), k))  # ao quadrado
+        positions = np.empty((len(queries), k), dtype='int64')
+        for start in range(0, len(queries), QUERY_BLOCK):
+            block = slice(start, start + QUERY_BLOCK)
+            chords[block], positions[block] = self._query_block(queries[block], k)
+
+        return chord_to_km(np.sqrt(chords)), self.location_ids[positions]
+
+    def _query_block(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Busca exata dos k vizinhos para um bloco de consultas."""
+        bounds = self._box_distances(queries)
+        leaf_order = np.argsort(bounds, axis=1)
+
+        best = np.full((len(queries), k), np.inf)
+        best_positions = np.full((len(queries), k), -1, dtype='int64')
+        active = np.arange(len(queries))
+
+        for rank in range(leaf_order.shape[1]):
+            leaves = leaf_order[active, rank]
+            # Para quem a proxima caixa ja esta mais longe que o k-esimo vizinho
+            needed = bounds[active, leaves] <= best[active, k - 1]
+            active, leaves = active[needed], leaves[needed]
+            if not len(active):
+                break
+
+            candidates = np.concatenate(
+                [best[active], self._leaf_distances(queries[active], leaves)], axis=1
+            )
+            candidate_positions = np.concatenate(
+                [best_positions[active], self.leaf_members[leaves]], axis=1
+            )
+            keep = np.argpartition(candidates, k - 1, axis=1)[:, :k]
+            best[active] = np.take_along_axis(candidates, keep, axis=1)
+            best_positions[active] = np.take_along_axis(candidate_positions, keep, axis=1)
+
+        order = np.argsort(best, axis=1)
+        return np.take_along_axis(best, order, axis=1), np.take_along_axis(best_positions, order, axis=1)
+
+    def query_radius(
+        self,
+        latitudes: ArrayLike,
+        longitudes: ArrayLike,
+        radius_km: float
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """
+        Todas as localizacoes a ate radius_km de cada ponto.
+
+        Returns:
+            Tupla (distancias em km, location_ids): uma lista com um
+            array por consulta, ordenado pela distancia
+        """
+        queries = to_unit_vectors(latitudes, longitudes).reshape(-1, 3)
+        max_squared = km_to_chord(radius_km) ** 2
+
+        query_parts, position_parts, chord_parts = [], [], []
+        for start in range(0, len(queries), QUERY_BLOCK):
+            block = queries[start:start + QUERY_BLOCK]
+            reachable = self._box_distances(block) <= max_squared
+
+            # Poucas folhas: o laco e por folha, vetorizado nas consultas
+            for leaf in np.flatnonzero(reachable.any(axis=0)):
+                rows = np.flatnonzero(reachable[:, leaf])
+                distances = self._leaf_distances(block[rows], np.full(len(rows), leaf))
+                hit_rows, hit_cols = np.nonzero(distances <= max_squared)
+                query_parts.append(start + rows[hit_rows])
+                position_parts.append(self.leaf_members[leaf, hit_cols])
+                chord_parts.append(distances[hit_rows, hit_cols])
+
+        if query_parts:
+            query_ids = np.concatenate(query_parts)
+            positions = np.concatenate(position_parts)
+            chords = np.concatenate(chord_parts)
+        else:
+            query_ids = positions = np.empty(0, dtype='int64')
+            chords = np.empty(0)
+
+        order = np.lexsort((chords, query_ids))
+        splits = np.searchsorted(query_ids[order], np.arange(1, len(queries)))
+        distances = np.split(chord_to_km(np.sqrt(chords[order])), splits)
+        location_ids = np.split(self.location_ids[positions[order]], splits)
+        return distances, location_ids
+
+    def save(self, path: Union[str, Path] = LOCATION_INDEX_PATH) -> Path:
+        """Grava o indice em .npz (escrita atomica: arquivo temporario + rename)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                location_ids=self.location_ids,
+                latitudes=self.latitudes,
+                longitudes=self.longitudes,
+                cities=self.cities,
+                countries=self.countries,
+                points=self.points,
+                leaf_members=self.leaf_members,
+            )
+        tmp_path.replace(path)
+        logger.info(f"Indice espacial salvo em {path} ({len(self)} localizacoes)")
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = LOCATION_INDEX_PATH) -> 'LocationIndex':
+        """Le um indice gravado por save() sem reconstruir a arvore."""
+        with np.load(path, allow_pickle=False) as data:
+            index = cls.__new__(cls)
+            index.location_ids = data['location_ids']
+            index.latitudes = data['latitudes']
+            index.longitudes = data['longitudes']
+            index.cities = data['cities']
+            index.countries = data['countries']
+            index.points = data['points']
+            index.leaf_members = data['leaf_members']
+        index.leaf_size = index.leaf_members.shape[1] if index.leaf_members.size else LEAF_SIZE
+        index._prepare_leaves()
+        return index
+
+
+# Indices ja lidos do disco: caminho -> (mtime, indice)
+_LOADED_INDEXES: Dict[Path, Tuple[int, LocationIndex]] = {}
+
+
+def load_location_index(path: Union[str, Path] = LOCATION_INDEX_PATH) -> LocationIndex:
+    """
+    Le o indice do disco uma vez por processo.
+
+    Se o arquivo for regravado (nova carga), a proxima chamada le a
+    versao nova.
+    """
+    path = Path(path)
+    mtime = path.stat().st_mtime_ns
+    cached = _LOADED_INDEXES.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, LocationIndex.load(path))
+        _LOADED_INDEXES[path] = cached
+    return cached[1]
+
+
+def nearest_locations(
+    latitudes: ArrayLike,
+    longitudes: ArrayLike,
+    k: int = 1,
+    max_distance_km: Optional[float] = None,
+    index: Optional[LocationIndex] = None
+) -> pd.DataFrame:
+    """
+    Localizacoes mais proximas de cada ponto, como DataFrame.
+
+    Args:
+        latitudes: Latitudes das consultas (graus)
+        longitudes: Longitudes das consultas (graus)
+        k: Vizinhos por ponto
+        max_distance_km: Descarta vizinhos mais distantes que isso
+        index: Indice a usar (padrao: o de LOCATION_INDEX_PATH)
+
+    Returns:
+        DataFrame com query (posicao do ponto), rank (0 = mais proximo),
+        location_id, city, country, latitude, longitude e distance_km
+    """
+    index = index or load_location_index()
+    distances, location_ids = index.query(latitudes, longitudes, k)
+
+    n_queries, n_neighbors = location_ids.shape
+    positions = pd.Index(index.location_ids).get_indexer(location_ids.ravel())
+    result = pd.DataFrame({
+        'query': np.repeat(np.arange(n_queries), n_neighbors),
+        'rank': np.tile(np.arange(n_neighbors), n_queries),
+        'location_id': location_ids.ravel(),
+        'city': index.cities[positions],
+        'country': index.countries[positions],
+        'latitude': index.latitudes[positions],
+        'longitude': index.longitudes[positions],
+        'distance_km': distances.ravel(),
+    })
+
+    if max_distance_km is not None:
+        result = result[result['distance_km'] <= max_distance_km].reset_index(drop=True)
+    return result
+
+
+def build_location_index(
+    dim_location: pd.DataFrame,
+    path: Union[str, Path] = LOCATION_INDEX_PATH
+) -> Optional[LocationIndex]:
+    """
+    Monta e salva o indice a partir de dim_location.
+
+    Returns:
+        O indice, ou None se nenhuma localizacao tiver coordenadas
+        (o arquivo anterior, se houver, e mantido)
+    """
+    index = LocationIndex.from_dim_location(dim_location)
+    if not len(index):
+        logger.info("Nenhuma localizacao com coordenadas; indice espacial nao gravado")
+        return None
+    index.save(path)
+    return index
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Linha de comando: build (a partir do banco) e query."""
+    parser = argparse.ArgumentParser(description="Indice espacial das localizacoes.")
+    parser.add_argument("--path", default=str(LOCATION_INDEX_PATH), help="Arquivo .npz")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Monta o indice a partir de dim_location")
+    build.add_argument("--backend", choices=["postgres", "duckdb"], default="postgres")
+    build.add_argument("--duckdb-path", help="Arquivo DuckDB (com --backend duckdb)")
+
+    query = commands.add_parser("query", help="Localizacoes mais proximas de um ponto")
+    query.add_argument("latitude", type=float)
+    query.add_argument("longitude", type=float)
+    query.add_argument("--k", type=int, default=5)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    if args.command == "build":
+        if args.backend == "duckdb":
+            from src.load.duckdb_loader import DuckDBLoader
+
+            loader = DuckDBLoader(args.duckdb_path)
+            dim_location = loader.read_table('dim_location')
+            loader.close()
+        else:
+            from src.load.database_loader import DatabaseLoader
+
+            dim_location = DatabaseLoader().read_table('dim_location')
+        build_location_index(dim_location, args.path)
+    else:
+        index = load_location_index(args.path)
+        print(nearest_locations([args.latitude], [args.longitude], args.k, index=index)
+              .drop(columns='query').to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class FakePostgREST(ThreadingHTTPServer):
+    """
+    Servidor local no lugar do /rest/v1 do Supabase.
+
+    `respond(n, table, rows)` decide a resposta da n-esima requisicao:
+    (status, headers, atraso em segundos). Padrao: 201 imediato.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.rows = {}
+        self.respond = lambda n, table, rows: (201, {}, 0)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        table = parsed.path.rsplit('/', 1)[-1]
+        rows = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+
+        with self.server.lock:
+            n = len(self.server.requests)
+            self.server.requests.append({
+                'path': parsed.path,
+                'params': parse_qs(parsed.query),
+                'headers': dict(self.headers),
+                'rows': len(rows),
+            })
+            status, headers, delay = self.server.respond(n, table, rows)
+            if status < 300:
+                self.server.rows.setdefault(table, []).extend(rows)
+
+        time.sleep(delay)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def postgrest():
+    server = FakePostgREST()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
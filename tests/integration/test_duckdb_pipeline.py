@@ -0,0 +1,138 @@
+import json
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import make_city_frame
+from src.config import SQL_DIR
+from src.load.duckdb_loader import DuckDBLoader
+from src.pipeline.streaming import run_streaming_pipeline
+from src.utils.search import LocationSearchIndex
+from src.utils.spatial import LocationIndex
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """CSVs sinteticos de cidades e global; cache Parquet em tmp_path."""
+    monkeypatch.setattr("src.extract.csv_extractor.CACHE_DIR", tmp_path / "cache")
+
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    make_city_frame(2_400, n_cities=10, n_countries=4).to_csv(
+        raw_dir / "GlobalLandTemperaturesByCity.csv", index=False
+    )
+
+    months = pd.date_range("1990-01-01", periods=240, freq="MS")
+    pd.DataFrame({
+        'dt': months.strftime('%Y-%m-%d'),
+        'LandAverageTemperature': np.linspace(8.0, 9.0, len(months)).round(3),
+        'LandAverageTemperatureUncertainty': 0.1,
+    }).to_csv(raw_dir / "GlobalTemperatures.csv", index=False)
+
+    return str(raw_dir)
+
+
+class TestDuckDBPipeline:
+
+    def test_builds_star_schema_and_runs_analytics(self, data_dir, tmp_path):
+        db_path = tmp_path / "warehouse.duckdb"
+        index_path = tmp_path / "location_index.npz"
+        search_path = tmp_path / "location_search.npz"
+
+        for source in ['global', 'city']:
+            run_streaming_pipeline(
+                source, chunk_size=1_000, data_dir=data_dir,
+                backend='duckdb', duckdb_path=str(db_path),
+                location_index_path=str(index_path), search_index_path=str(search_path)
+            )
+        # Recarregar uma fonte nao duplica a tabela fato
+        run_streaming_pipeline(
+            'city', chunk_size=1_000, data_dir=data_dir,
+            backend='duckdb', duckdb_path=str(db_path),
+            location_index_path=str(index_path), search_index_path=str(search_path)
+        )
+
+        loader = DuckDBLoader(db_path)
+        try:
+            counts = loader.query(
+                "SELECT source_file, COUNT(*) AS n FROM climate.fact_temperature "
+                "GROUP BY source_file ORDER BY source_file"
+            )
+            decades, warmest = loader.run_sql_file(
+                SQL_DIR / "analytics" / "warming_trends.sql"
+            )
+        finally:
+            loader.close()
+
+        assert counts.set_index('source_file')['n'].to_dict() == {'city': 2_400, 'global': 240}
+        assert len(LocationIndex.load(index_path)) == 10
+        cities = LocationSearchIndex.load(search_path).search('city', k=20, granularity='city')
+        assert len(cities) == 10
+        assert all(200 < city['coverage'] <= 240 for city in cities)
+        assert decades['decade'].tolist() == [1990, 2000]
+        assert decades['measurements'].sum() == 240
+        assert len(warmest) == 10
+        assert warmest['year'].iloc[0] == 2009
+
+    def test_metrics_record_each_stage_once_per_chunk(self, data_dir, tmp_path):
+        metrics_path = tmp_path / "metrics.jsonl"
+
+        run_streaming_pipeline(
+            'global', chunk_size=100, data_dir=data_dir,
+            backend='duckdb', duckdb_path=str(tmp_path / "warehouse.duckdb"),
+            location_index_path=None, search_index_path=None,
+            metrics_path=str(metrics_path), prometheus_path=None
+        )
+
+        records = [json.loads(line) for line in metrics_path.read_text().splitlines()]
+        chunks = Counter(r['stage'] for r in records)
+        rows = Counter()
+        for r in records:
+            rows[r['stage']] += r['rows_out'] or 0
+
+        # 3 chunks de 100 linhas, lidos e limpos nas duas passadas
+        assert chunks['extract'] == chunks['clean'] == 6
+        assert chunks['lookup'] == chunks['load'] == 3
+        assert rows['load'] == rows['lookup'] == 240
+        assert chunks['dim_date'] == chunks['dim_location'] == 1
+
+    def test_bulk_requires_postgres(self, tmp_path):
+        # Falha antes de ler o arquivo (o diretorio nem existe)
+        with pytest.raises(ValueError):
+            run_streaming_pipeline(
+                'global', data_dir=str(tmp_path / "missing"), bulk=True,
+                backend='duckdb', duckdb_path=str(tmp_path / "warehouse.duckdb")
+            )
+
+    def test_resume_requires_postgres(self, tmp_path):
+        with pytest.raises(ValueError):
+            run_streaming_pipeline(
+                'global', data_dir=str(tmp_path / "missing"), resume=True,
+                backend='duckdb', duckdb_path=str(tmp_path / "warehouse.duckdb")
+            )
+
+    def test_incremental_requires_postgres(self, tmp_path):
+        with pytest.raises(ValueError):
+            run_streaming_pipeline(
+                'global', data_dir=str(tmp_path / "missing"), incremental=True,
+                backend='duckdb', duckdb_path=str(tmp_path / "warehouse.duckdb")
+            )
+
+    def test_failed_load_closes_duckdb(self, data_dir, tmp_path, monkeypatch):
+        closed = []
+        close = DuckDBLoader.close
+        monkeypatch.setattr(DuckDBLoader, 'close', lambda self: closed.append(close(self)))
+
+        def fail(loader, location_ids):
+            raise RuntimeError("rollups falharam")
+
+        monkeypatch.setattr("src.load.rollups.refresh_rollups", fail)
+
+        with pytest.raises(RuntimeError):
+            run_streaming_pipeline(
+                'global', data_dir=data_dir, backend='duckdb',
+                duckdb_path=str(tmp_path / "warehouse.duckdb"),
+                location_index_path=None, search_index_path=None
+            )
+        assert len(closed) == 1
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import make_city_frame
+from src.load.supabase_uploader import SupabaseUploader
+from src.pipeline.supabase_migration import (
+    build_warehouse,
+    migrate_to_supabase,
+    stratified_locations,
+)
+
+pytest.importorskip("httpx")
+
+
+@pytest.fixture
+def warehouse(tmp_path, monkeypatch):
+    """Warehouse DuckDB com 12 cidades de 3 paises e a serie global."""
+    monkeypatch.setattr("src.extract.csv_extractor.CACHE_DIR", tmp_path / "cache")
+
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    cities = make_city_frame(2_880, n_cities=12, n_countries=3)
+    # Mesmos 20 anos da serie global (as tendencias comecam em 1900)
+    cities['dt'] = cities['dt'] + pd.DateOffset(months=(1990 - 1743) * 12 - 10)
+    cities.to_csv(raw_dir / "GlobalLandTemperaturesByCity.csv", index=False)
+    months = pd.date_range("1990-01-01", periods=240, freq="MS")
+    pd.DataFrame({
+        'dt': months.strftime('%Y-%m-%d'),
+        'LandAverageTemperature': np.linspace(8.0, 9.0, len(months)).round(3),
+        'LandAverageTemperatureUncertainty': 0.1,
+    }).to_csv(raw_dir / "GlobalTemperatures.csv", index=False)
+
+    db_path = tmp_path / "warehouse.duckdb"
+    loaded = build_warehouse(db_path, data_dir=raw_dir, chunk_size=1_000)
+    assert loaded == ['global', 'city']
+    return db_path
+
+
+def make_uploader(postgrest, tmp_path):
+    return SupabaseUploader(
+        postgrest.url, 'service-key', concurrency=4, batch_size=200,
+        journal_path=tmp_path / "failed.jsonl",
+    )
+
+
+class TestStratifiedLocations:
+
+    def test_spreads_picks_over_latitude_per_country(self):
+        dim_location = pd.DataFrame({
+            'location_id': range(1, 9),
+            'granularity': ['global', 'country', 'city', 'city', 'city', 'city', 'city', 'state'],
+            'city': [None, None, 'A', 'B', 'C', 'D', 'E', None],
+            'state': [None] * 7 + ['S'],
+            'country': [None, 'X', 'X', 'X', 'X', 'X', 'Y', 'X'],
+            'latitude': [None, None, 10.0, -20.0, 50.0, 0.0, 5.0, None],
+        })
+
+        # X: B(-20), D(0), A(10), C(50) -> extremos; Y e o estado entram inteiros
+        assert stratified_locations(dim_location, 2).tolist() == [1, 2, 4, 5, 7, 8]
+
+
+class TestSupabaseMigration:
+
+    def test_full_migration_uploads_every_table(self, warehouse, postgrest, tmp_path):
+        uploaded = migrate_to_supabase(make_uploader(postgrest, tmp_path), warehouse)
+
+        assert uploaded['dim_date'] == 240
+        assert uploaded['dim_location'] == 13
+        assert uploaded['fact_temperature'] == 2_880 + 240
+        assert uploaded['agg_location_year'] == 13 * 20
+        assert uploaded['location_trend'] == 13
+        assert list(uploaded) == [
+            'dim_date', 'dim_location', 'fact_temperature', 'agg_location_year', 'location_trend'
+        ]
+
+        fact = postgrest.rows['fact_temperature']
+        assert set(fact[0]) == {
+            'date_id', 'location_id', 'avg_temperature', 'avg_temperature_uncertainty',
+            'land_max_temperature', 'land_max_temp_uncertainty', 'land_min_temperature',
+            'land_min_temp_uncertainty', 'land_ocean_avg_temperature',
+            'land_ocean_avg_temp_uncertainty', 'source_file',
+        }
+        fact_requests = [r for r in postgrest.requests if r['path'].endswith('fact_temperature')]
+        assert fact_requests[0]['params'] == {'on_conflict': ['date_id,location_id,source_file']}
+        assert isinstance(postgrest.rows['dim_date'][0]['full_date'], str)
+
+    def test_stratified_subset_keeps_complete_series(self, warehouse, postgrest, tmp_path):
+        uploaded = migrate_to_supabase(
+            make_uploader(postgrest, tmp_path), warehouse, per_country=2,
+            tables=['dim_location', 'fact_temperature', 'location_trend']
+        )
+
+        locations = postgrest.rows['dim_location']
+        cities = [loc for loc in locations if loc['granularity'] == 'city']
+        assert len(cities) == 6
+        assert sorted({loc['country'] for loc in cities}) == ['Country 000', 'Country 001', 'Country 002']
+
+        ids = {loc['location_id'] for loc in locations}
+        assert {row['location_id'] for row in postgrest.rows['fact_temperature']} == ids
+        assert uploaded['fact_temperature'] == 6 * 240 + 240
+        assert uploaded['location_trend'] == 7
+        assert 'dim_date' not in uploaded
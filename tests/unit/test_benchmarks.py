@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+from benchmarks.suite import compare, run_suite
+from benchmarks.synthetic import (
+    MAX_MONTHS,
+    SOURCE_GENERATORS,
+    make_city_frame,
+    write_source_csv,
+)
+from src.extract.csv_extractor import CSVExtractor
+
+
+class TestSynthetic:
+
+    def test_chunked_csv_keeps_series_layout(self, tmp_path):
+        path = write_source_csv('city', 9_000, tmp_path, chunk_rows=4_000)
+
+        chunked = pd.read_csv(path)
+        whole = make_city_frame(9_000)
+
+        assert len(chunked) == 9_000
+        # Cidades e coordenadas nao dependem dos blocos
+        assert (chunked['City'] == whole['City']).all()
+        assert (chunked['Latitude'] == whole['Latitude']).all()
+        # Mesma semente e mesmos blocos: arquivo identico
+        again = write_source_csv('city', 9_000, tmp_path / "again", chunk_rows=4_000)
+        assert again.read_bytes() == path.read_bytes()
+
+    @pytest.mark.parametrize('source', list(SOURCE_GENERATORS))
+    def test_every_source_is_readable_by_extractor(self, tmp_path, source):
+        write_source_csv(source, 2_000, tmp_path)
+
+        df = CSVExtractor(tmp_path, use_cache=False).extract(source)
+
+        assert len(df) == 2_000
+
+    def test_rejects_dates_past_supported_range(self):
+        with pytest.raises(ValueError, match="meses"):
+            SOURCE_GENERATORS['global'](MAX_MONTHS + 1)
+
+
+class TestSuite:
+
+    def test_run_and_compare(self):
+        result = run_suite(3_000, repeat=1, only=['parse_coordinate_series', 'clean'])
+
+        assert set(result['benchmarks']) == {'parse_coordinate_series', 'clean'}
+        assert result['benchmarks']['clean']['rows'] == 3_000
+        assert result['parameters']['load_backend'] == 'duckdb'
+
+        slower = {
+            **result,
+            'benchmarks': {
+                name: {**values, 'rows_per_s': values['rows_per_s'] / 2}
+                for name, values in result['benchmarks'].items()
+            },
+        }
+        assert compare(result, result) == []
+        assert sorted(compare(result, slower)) == ['clean', 'parse_coordinate_series']
+
+    def test_unknown_benchmark(self):
+        with pytest.raises(ValueError, match="desconhecidos"):
+            run_suite(100, only=['nope'])
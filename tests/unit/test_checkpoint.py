@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.load.checkpoint import LoadCheckpoint, chunk_hash, load_fingerprint
+from src.load.duckdb_loader import DuckDBLoader
+from src.transform.transformers import FACT_COLUMNS
+
+
+def make_fact(location_id, n):
+    """Chunk da tabela fato com n meses de uma localizacao."""
+    fact = pd.DataFrame({
+        'date_id': np.arange(1, n + 1),
+        'location_id': location_id,
+        'avg_temperature': np.linspace(10, 20, n),
+    })
+    for col in FACT_COLUMNS:
+        if col not in fact.columns:
+            fact[col] = np.nan
+    fact['source_file'] = 'city'
+    return fact[FACT_COLUMNS]
+
+
+@pytest.fixture
+def chunks():
+    return [make_fact(1, 3), make_fact(2, 4), make_fact(3, 2)]
+
+
+def checkpoint_for(chunks, done_indexes):
+    """LoadCheckpoint com os chunks `done_indexes` ja gravados (pending nao usa o banco)."""
+    checkpoint = LoadCheckpoint(DuckDBLoader(':memory:'), 'city', load_fingerprint('f', 3, 'rows'))
+    row_start = 0
+    for index, fact in enumerate(chunks):
+        if index in done_indexes:
+            checkpoint.completed[index] = (row_start, row_start + len(fact), chunk_hash(fact))
+        row_start += len(fact)
+    return checkpoint
+
+
+class TestChunkHash:
+
+    def test_independent_of_dtypes_and_row_order(self):
+        fact = make_fact(1, 5)
+        shuffled = fact.iloc[::-1].astype({'date_id': 'int32', 'avg_temperature': 'float32'})
+        assert chunk_hash(fact) == chunk_hash(shuffled)
+        assert chunk_hash(fact) != chunk_hash(make_fact(2, 5))
+
+    def test_fits_bigint(self):
+        value = chunk_hash(make_fact(1, 1000))
+        assert -2 ** 63 <= value < 2 ** 63
+        assert chunk_hash(make_fact(1, 0)) == 0
+
+
+class TestPending:
+
+    def test_new_load_yields_every_chunk_with_row_ranges(self, chunks):
+        checkpoint = checkpoint_for(chunks, set())
+
+        pending = list(checkpoint.pending(chunks))
+
+        assert len(pending) == 3
+        params = [statements[0][1] for _, statements in pending]
+        assert [(p['chunk'], p['row_start'], p['row_end']) for p in params] == [
+            (0, 0, 3), (1, 3, 7), (2, 7, 9)
+        ]
+        assert params[1]['content_hash'] == chunk_hash(chunks[1])
+        assert "INSERT INTO" in pending[0][1][0][0]
+
+    def test_resume_skips_finished_chunks(self, chunks):
+        checkpoint = checkpoint_for(chunks, {0, 2})
+
+        pending = list(checkpoint.pending(chunks))
+
+        assert [fact['location_id'].iloc[0] for fact, _ in pending] == [2]
+        assert (checkpoint.skipped_chunks, checkpoint.skipped_rows) == (2, 5)
+
+    def test_changed_chunk_is_rejected(self, chunks):
+        checkpoint = checkpoint_for(chunks, {0})
+        changed = [make_fact(1, 3).assign(avg_temperature=99.0)] + chunks[1:]
+
+        with pytest.raises(ValueError, match="difere do checkpoint"):
+            list(checkpoint.pending(changed))
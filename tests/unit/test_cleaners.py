@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+from src.transform.cleaners import (
+    clean_temperature_data,
+    clean_text_columns,
+    handle_missing_values,
+)
+
+
+@pytest.fixture
+def raw_cities():
+    """Dados brutos de cidade."""
+    return pd.DataFrame({
+        'dt': ['2010-01-01', '2010-02-01'],
+        'AverageTemperature': [10.5, None],
+        'City': [' Sao Paulo ', 'Sao Paulo'],
+        'Country': ['Brazil', 'Brazil'],
+        'Latitude': ['23.55S', '23.55S'],
+        'Longitude': ['46.64W', '46.64W'],
+    })
+
+
+class TestCleanTemperatureData:
+
+    def test_default_leaves_input_untouched(self, raw_cities):
+        original = raw_cities.copy()
+
+        clean_temperature_data(raw_cities, 'city')
+
+        pd.testing.assert_frame_equal(raw_cities, original)
+
+    def test_inplace_matches_copy(self, raw_cities):
+        expected = clean_temperature_data(raw_cities, 'city')
+
+        result = clean_temperature_data(raw_cities, 'city', inplace=True)
+
+        assert result is raw_cities
+        pd.testing.assert_frame_equal(result, expected)
+
+
+class TestCleanTextColumns:
+
+    def test_missing_values_stay_missing(self):
+        df = pd.DataFrame({
+            'City': [' Paris', None, 'Lyon '],
+            'Country': pd.Series([' France', 'France', None], dtype='category'),
+        })
+
+        result = clean_text_columns(df, ['City', 'Country'])
+
+        assert result['City'].tolist()[::2] == ['Paris', 'Lyon']
+        assert result['City'].isna().tolist() == [False, True, False]
+        assert result['Country'].cat.categories.tolist() == ['France']
+        assert result['Country'].isna().tolist() == [False, False, True]
+
+    def test_nan_text_becomes_missing(self):
+        df = pd.DataFrame({
+            'City': ['nan', ' NaN ', 'Nan'],
+            'Country': pd.Series(['nan', 'Thailand', 'Thailand'], dtype='category'),
+        })
+
+        result = clean_text_columns(df, ['City', 'Country'])
+
+        assert result['City'].isna().tolist() == [True, True, False]
+        assert result['City'].iloc[2] == 'Nan'
+        assert result['Country'].cat.categories.tolist() == ['Thailand']
+        assert result['Country'].isna().tolist() == [True, False, False]
+
+
+class TestHandleMissingValues:
+
+    def test_drop_inplace(self, raw_cities):
+        df = clean_temperature_data(raw_cities, 'city')
+
+        result = handle_missing_values(df, strategy='drop', inplace=True)
+
+        assert result is df
+        assert len(df) == 1
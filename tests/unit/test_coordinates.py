@@ -1,5 +1,11 @@
 import pytest
-from src.utils.coordinates import parse_coordinate
+import pandas as pd
+from src.utils.coordinates import (
+    parse_coordinate,
+    parse_coordinate_series,
+    hemisphere_series,
+    clear_coordinate_cache,
+)
 
 class TestParseCoordinate:
 
@@ -22,4 +28,50 @@ class TestParseCoordinate:
         assert parse_coordinate("") is None
 
     def test_invalid_format(self):
-        assert parse_coordinate("invalid") is None
\ No newline at end of file
+        assert parse_coordinate("invalid") is None
+
+class TestParseCoordinateSeries:
+
+    def test_matches_scalar_parser(self):
+        values = ["57.05N", "23.45S", "10.33E", "46.64W", None, "", "invalid", "57.05N"]
+        result = parse_coordinate_series(pd.Series(values))
+        expected = [parse_coordinate(v) for v in values]
+        for got, exp in zip(result, expected):
+            if exp is None:
+                assert pd.isna(got)
+            else:
+                assert got == exp
+
+    def test_keeps_index(self):
+        series = pd.Series(["1.5N", "2.5S"], index=[10, 20])
+        result = parse_coordinate_series(series)
+        assert list(result.index) == [10, 20]
+
+    def test_categorical_input(self):
+        series = pd.Series(["1.5N", "2.5W", "1.5N"], dtype="category")
+        assert parse_coordinate_series(series).tolist() == [1.5, -2.5, 1.5]
+
+    def test_cache_reused_between_calls(self):
+        clear_coordinate_cache()
+        parse_coordinate_series(pd.Series(["12.00N"]))
+        assert parse_coordinate_series(pd.Series(["12.00N", "12.00N"])).tolist() == [12.0, 12.0]
+
+    def test_cache_never_exceeds_limit(self, monkeypatch):
+        from src.utils import coordinates
+
+        clear_coordinate_cache()
+        monkeypatch.setattr(coordinates, "_COORDINATE_CACHE_MAX", 2)
+        result = parse_coordinate_series(pd.Series(["1.0N", "2.0N", "3.0S", "4.0W"]))
+        assert result.tolist() == [1.0, 2.0, -3.0, -4.0]
+        assert len(coordinates._COORDINATE_CACHE) <= 2
+
+
+class TestHemisphereSeries:
+
+    def test_latitude(self):
+        result = hemisphere_series(pd.Series(["57.05N", "23.45s", None, "10.33E"]), 'ns')
+        assert result.tolist() == ['N', 'S', None, None]
+
+    def test_longitude(self):
+        result = hemisphere_series(pd.Series(["10.33E", "46.64W", "57.05N"]), 'ew')
+        assert result.tolist() == ['E', 'W', None]
@@ -0,0 +1,139 @@
+import os
+import pandas as pd
+import pytest
+from src.extract.csv_extractor import CSVExtractor
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    """Extrator apontando para um CSV de cidades pequeno."""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    pd.DataFrame({
+        'dt': ['2010-01-01', '2010-02-01', '2010-03-01', '2010-04-01', '2010-05-01'],
+        'AverageTemperature': [10.5, 12.3, None, 14.0, 15.2],
+        'AverageTemperatureUncertainty': [0.5, 0.4, None, 0.3, 0.2],
+        'City': ['Sao Paulo'] * 5,
+        'Country': ['Brazil'] * 5,
+        'Latitude': ['23.55S'] * 5,
+        'Longitude': ['46.64W'] * 5,
+    }).to_csv(raw_dir / "GlobalLandTemperaturesByCity.csv", index=False)
+
+    return CSVExtractor(data_dir=str(raw_dir), cache_dir=str(tmp_path / "cache"))
+
+
+class TestParquetCache:
+
+    def test_cache_matches_csv(self, extractor):
+        from_csv = CSVExtractor(data_dir=str(extractor.data_dir), use_cache=False).extract("city")
+        first = extractor.extract("city")
+        second = extractor.extract("city")
+
+        stem = extractor._cache_stem("city", extractor._get_filepath("city"))
+        assert (extractor.cache_dir / f"{stem}.parquet").exists()
+        pd.testing.assert_frame_equal(first, from_csv)
+        pd.testing.assert_frame_equal(second, from_csv)
+
+    def test_cache_is_per_data_dir(self, extractor, tmp_path):
+        other_dir = tmp_path / "other"
+        other_dir.mkdir()
+        csv_name = "GlobalLandTemperaturesByCity.csv"
+        (other_dir / csv_name).write_bytes((extractor.data_dir / csv_name).read_bytes())
+        other = CSVExtractor(data_dir=str(other_dir), cache_dir=str(extractor.cache_dir))
+
+        extractor.extract("city")
+        other.extract("city")
+
+        assert len(list(extractor.cache_dir.glob("city-*.parquet"))) == 2
+
+    def test_chunks_from_cache(self, extractor):
+        extractor.extract("city")
+        chunks = list(extractor.extract("city", chunksize=2))
+
+        assert [len(c) for c in chunks] == [2, 2, 1]
+        pd.testing.assert_frame_equal(
+            pd.concat(chunks, ignore_index=True), extractor.extract("city")
+        )
+
+    def test_column_projection(self, extractor):
+        df = extractor.extract("city", columns=["dt", "AverageTemperature", "City"])
+        assert list(df.columns) == ["dt", "AverageTemperature", "City"]
+
+    def test_cache_invalidated_when_csv_changes(self, extractor):
+        extractor.extract("city")
+
+        filepath = extractor.data_dir / "GlobalLandTemperaturesByCity.csv"
+        with open(filepath, 'a') as f:
+            f.write("2010-06-01,16.1,0.2,Sao Paulo,Brazil,23.55S,46.64W\n")
+        os.utime(filepath, ns=(0, 0))
+
+        assert len(extractor.extract("city")) == 6
+
+
+class TestByteRanges:
+
+    def test_ranges_cover_file_in_order(self, extractor):
+        ranges = extractor.byte_ranges("city", chunk_rows=2)
+
+        parts = [extractor.read_byte_range("city", start, end) for start, end in ranges]
+        combined = pd.concat(parts, ignore_index=True)
+
+        assert len(ranges) > 1
+        assert combined['AverageTemperature'].tolist()[:2] == pytest.approx([10.5, 12.3])
+        assert combined['dt'].tolist() == extractor.extract("city")['dt'].tolist()
+
+
+class TestArrowEngine:
+
+    def test_same_frame_as_pandas(self, extractor):
+        data_dir = str(extractor.data_dir)
+        expected = CSVExtractor(data_dir, use_cache=False).extract("city")
+
+        result = CSVExtractor(data_dir, use_cache=False, engine="arrow").extract("city")
+
+        pd.testing.assert_frame_equal(result, expected, check_categorical=False)
+
+    def test_chunks_and_columns(self, extractor):
+        arrow = CSVExtractor(str(extractor.data_dir), use_cache=False, engine="arrow")
+
+        chunks = list(arrow.extract("city", chunksize=2, columns=["City", "dt"]))
+
+        assert [len(c) for c in chunks] == [2, 2, 1]
+        assert list(chunks[0].columns) == ["dt", "City"]
+
+
+class TestFileInfo:
+
+    def test_counts_rows_with_and_without_trailing_newline(self, tmp_path):
+        with_newline = tmp_path / "a.csv"
+        with_newline.write_bytes(b"dt,x\n2010-01-01,1\n2010-02-01,2\n")
+        without_newline = tmp_path / "b.csv"
+        without_newline.write_bytes(b"dt,x\n2010-01-01,1\n2010-02-01,2")
+
+        assert CSVExtractor._count_rows(with_newline, block_size=4) == 2
+        assert CSVExtractor._count_rows(without_newline, block_size=4) == 2
+
+    def test_profile_is_cached_until_file_changes(self, extractor, monkeypatch):
+        info = extractor.get_file_info("city", profile=True)
+
+        assert info["actual_rows"] == 5
+        assert info["profile"]["distinct_locations"] == 1
+        assert info["profile"]["date_min"] == "2010-01-01"
+        assert info["profile"]["null_pct"]["AverageTemperature"] == 20.0
+        stem = extractor._cache_stem("city", extractor._get_filepath("city"))
+        info_path = extractor.cache_dir / f"{stem}.info.json"
+        assert info_path.exists()
+
+        # Acerto no cache nao regrava o JSON
+        writes = []
+        with monkeypatch.context() as m:
+            m.setattr(extractor, "_write_info_cache", lambda *args: writes.append(args))
+            assert extractor.get_file_info("city", profile=True) == info
+            assert extractor.get_file_info("city")["actual_rows"] == 5
+        assert writes == []
+
+        csv_path = extractor.data_dir / "GlobalLandTemperaturesByCity.csv"
+        with open(csv_path, "a") as f:
+            f.write("2010-06-01,16.0,0.2,Sao Paulo,Brazil,23.55S,46.64W\n")
+
+        assert extractor.get_file_info("city")["actual_rows"] == 6
@@ -0,0 +1,206 @@
+import os
+import re
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.load.database_loader import DatabaseLoader
+
+
+@pytest.fixture
+def loader(monkeypatch):
+    """DatabaseLoader cuja carga de chunk so registra as chamadas (o engine nunca conecta)."""
+    loader = DatabaseLoader()
+    loader.calls = []
+    loader.broken = {1}
+
+    def fake_load_chunk(chunk, qualified_table, method, statements=None):
+        index = int(chunk['index'].iloc[0])
+        loader.calls.append(index)
+        if index in loader.broken:
+            raise ConnectionError(f"chunk {index} caiu")
+        return len(chunk)
+
+    monkeypatch.setattr(loader, '_load_chunk', fake_load_chunk)
+    yield loader
+    loader.engine.dispose()
+
+
+def make_chunks(n):
+    return [pd.DataFrame({'index': [i, i], 'value': [0.5, 1.5]}) for i in range(n)]
+
+
+class TestLoadParallel:
+
+    def test_backoff_does_not_hold_a_worker(self, loader):
+        with pytest.raises(RuntimeError, match="1 chunks"):
+            loader.load_chunks_parallel(make_chunks(3), 'fact', workers=1, max_retries=1)
+
+        # Com um unico worker, os chunks 2 e 3 rodam enquanto o 1 espera o backoff
+        assert loader.calls == [0, 1, 2, 1]
+
+    def test_failed_chunks_are_spilled_and_retried(self, loader):
+        chunks = make_chunks(3)
+        with pytest.raises(RuntimeError):
+            loader.load_chunks_parallel(chunks, 'fact', workers=2, max_retries=0)
+
+        [failure] = loader.failed_chunks
+        assert 'chunk' not in failure
+        assert failure['rows'] == 2
+        pd.testing.assert_frame_equal(pd.read_parquet(failure['path']), chunks[1])
+
+        loader.broken.clear()
+        assert loader.retry_failed_chunks('fact') == 2
+        assert loader.failed_chunks == []
+        assert not os.path.exists(failure['path'])
+
+
+class FakeCursor:
+    """Cursor do psycopg2 que guarda o SQL e o CSV de cada COPY."""
+
+    def __init__(self, log):
+        self.log = log
+
+    def copy_expert(self, sql, buffer):
+        self.log.append(('copy', sql, buffer.read().decode()))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+
+    def __init__(self, log):
+        self.log = log
+        self.connection = self
+
+    def cursor(self):
+        return FakeCursor(self.log)
+
+    def execute(self, statement, params=None):
+        self.log.append(('sql', str(statement), params))
+        return type('Result', (), {'rowcount': 0})()
+
+
+class FakeEngine:
+    """Engine que registra, em ordem, tudo o que seria enviado ao banco."""
+
+    def __init__(self):
+        self.log = []
+
+    @contextmanager
+    def begin(self):
+        yield FakeConnection(self.log)
+
+    def dispose(self):
+        pass
+
+
+@pytest.fixture
+def copy_loader():
+    loader = DatabaseLoader()
+    loader.engine.dispose()
+    loader.engine = FakeEngine()
+    return loader
+
+
+def executed_sql(loader):
+    return [entry[1] for entry in loader.engine.log if entry[0] == 'sql']
+
+
+class TestCopyLoad:
+
+    def test_csv_buffer_and_copy_sql(self, copy_loader):
+        df = pd.DataFrame({
+            'full_date': pd.to_datetime(['2000-01-01', '2000-02-01']),
+            'avg_temperature': pd.Series([1.5, np.nan], dtype='float32'),
+            'city': pd.Series(['', None], dtype=object),
+            'country': pd.Series(['Brazil', 'Chile'], dtype='category'),
+        })
+
+        assert copy_loader.load_dataframe(df, 'dim_date', method='copy') == 2
+
+        [(kind, sql, csv)] = copy_loader.engine.log
+        assert sql == (
+            'COPY climate.dim_date ("full_date", "avg_temperature", "city", "country") '
+            'FROM STDIN WITH (FORMAT csv)'
+        )
+        # Nulo: campo vazio sem aspas; string vazia: ""; DATE aceita a meia-noite
+        assert csv.splitlines() == [
+            '2000-01-01 00:00:00.000000000,1.5,"","Brazil"',
+            '2000-02-01 00:00:00.000000000,,,"Chile"',
+        ]
+
+    def test_staging_upsert_statements(self, copy_loader):
+        df = pd.DataFrame({'location_id': [1], 'date_id': [2], 'avg_temperature': [3.0]})
+        delete = ("DELETE FROM climate.fact_temperature WHERE location_id = :id", {'id': 1})
+
+        copy_loader.load_dataframe(
+            df, 'fact_temperature', method='copy', staging=True,
+            conflict_columns=['location_id', 'date_id'], on_conflict='update',
+            statements=[delete]
+        )
+
+        create, copy, run_delete, insert, drop = copy_loader.engine.log
+        staging = re.fullmatch(
+            r'CREATE UNLOGGED TABLE (climate\.fact_temperature_staging_[0-9a-f]{8}) AS '
+            r'SELECT "location_id", "date_id", "avg_temperature" '
+            r'FROM climate\.fact_temperature WITH NO DATA',
+            create[1]
+        ).group(1)
+        assert copy[1].startswith(f'COPY {staging} (')
+        assert run_delete[1:] == delete
+        assert insert[1] == (
+            'INSERT INTO climate.fact_temperature ("location_id", "date_id", "avg_temperature") '
+            f'SELECT "location_id", "date_id", "avg_temperature" FROM {staging} '
+            'ON CONFLICT ("location_id", "date_id") '
+            'DO UPDATE SET "avg_temperature" = EXCLUDED."avg_temperature"'
+        )
+        assert drop[1] == f'DROP TABLE IF EXISTS {staging}'
+
+    def test_do_nothing_without_conflict_columns(self, copy_loader):
+        df = pd.DataFrame({'date_id': [1]})
+
+        copy_loader.load_dataframe(df, 'dim_date', method='copy', staging=True)
+
+        insert = executed_sql(copy_loader)[1]
+        assert insert.endswith('ON CONFLICT DO NOTHING')
+
+    def test_do_nothing_with_conflict_columns(self, copy_loader):
+        df = pd.DataFrame({'date_id': [1]})
+
+        copy_loader.load_dataframe(
+            df, 'dim_date', method='copy', staging=True, conflict_columns=['date_id']
+        )
+
+        assert executed_sql(copy_loader)[1].endswith('ON CONFLICT ("date_id") DO NOTHING')
+
+    def test_update_requires_conflict_columns(self, copy_loader):
+        with pytest.raises(ValueError, match="conflict_columns"):
+            copy_loader.load_dataframe(
+                pd.DataFrame({'date_id': [1]}), 'dim_date',
+                method='copy', staging=True, on_conflict='update'
+            )
+
+    def test_staging_names_are_unique(self, copy_loader):
+        df = pd.DataFrame({'date_id': [1]})
+        for _ in range(2):
+            copy_loader.load_dataframe(df, 'dim_date', method='copy', staging=True)
+
+        creates = [sql for sql in executed_sql(copy_loader) if sql.startswith('CREATE')]
+        assert len(set(creates)) == 2
+
+    def test_staging_dropped_when_merge_fails(self, copy_loader, monkeypatch):
+        def broken_merge(*args):
+            raise RuntimeError("merge caiu")
+
+        monkeypatch.setattr(copy_loader, '_merge_staging', broken_merge)
+        with pytest.raises(RuntimeError, match="merge caiu"):
+            copy_loader.load_dataframe(
+                pd.DataFrame({'date_id': [1]}), 'dim_date', method='copy', staging=True
+            )
+
+        assert executed_sql(copy_loader)[-1].startswith(
+            'DROP TABLE IF EXISTS climate.dim_date_staging_'
+        )
@@ -0,0 +1,210 @@
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.config import CSV_FILES
+from src.load.fact_layout import (
+    FACT_UNIQUE,
+    clear_source,
+    create_fact_indexes,
+    drop_fact_indexes,
+    partition_fact_table,
+)
+
+INIT_DB = Path(__file__).resolve().parents[2] / "docker" / "init-db.sql"
+
+
+class FakeLoader:
+    """
+    Loader que registra o SQL em vez de enviar ao PostgreSQL.
+
+    Responde as consultas ao catalogo (particoes e constraints) com as
+    listas `partitions` e `constraints`; CREATE TABLE ... PARTITION OF
+    acrescenta a particao criada.
+    """
+
+    schema = 'climate'
+
+    def __init__(self, partitions=(), constraints=()):
+        self.partitions = list(partitions)
+        self.constraints = list(constraints)
+        self.log = []
+        self._lock = threading.Lock()
+
+    def run_statements(self, statements):
+        for statement in statements:
+            self._record(statement, None)
+
+    def _record(self, sql, params):
+        with self._lock:
+            self.log.append((sql, params))
+            match = re.match(r"CREATE TABLE climate\.(\w+) PARTITION OF", sql)
+            if match:
+                self.partitions.append(match.group(1))
+
+    @property
+    def engine(self):
+        loader = self
+
+        class Result:
+            def __init__(self, rows):
+                self.rows = rows
+
+            def scalars(self):
+                return self
+
+            def all(self):
+                return list(self.rows)
+
+        class Connection:
+            def execute(self, statement, params=None):
+                sql = str(statement)
+                if 'pg_inherits i' in sql:
+                    return Result(loader.partitions)
+                if 'FROM pg_constraint' in sql:
+                    return Result(loader.constraints)
+                loader._record(sql, params)
+                return Result([])
+
+        class Engine:
+            @contextmanager
+            def connect(self):
+                yield Connection()
+
+            begin = connect
+
+        return Engine()
+
+    def sql(self):
+        return [sql for sql, _ in self.log]
+
+
+class TestDropFactIndexes:
+
+    def test_drops_constraints_then_indexes(self):
+        loader = FakeLoader()
+
+        drop_fact_indexes(loader)
+
+        assert loader.sql() == [
+            "ALTER TABLE climate.fact_temperature DROP CONSTRAINT IF EXISTS uq_fact_location_date_source",
+            "ALTER TABLE climate.fact_temperature DROP CONSTRAINT IF EXISTS "
+            "fact_temperature_date_id_location_id_source_file_key",
+            "ALTER TABLE climate.fact_temperature DROP CONSTRAINT IF EXISTS "
+            "fact_temperature_date_id_fkey",
+            "ALTER TABLE climate.fact_temperature DROP CONSTRAINT IF EXISTS "
+            "fact_temperature_location_id_fkey",
+            "DROP INDEX IF EXISTS climate.idx_fact_date",
+            "DROP INDEX IF EXISTS climate.idx_fact_location",
+            "DROP INDEX IF EXISTS climate.idx_fact_date_brin",
+        ]
+
+
+class TestCreateFactIndexes:
+
+    def test_unpartitioned(self):
+        loader = FakeLoader()
+
+        create_fact_indexes(loader, workers=2)
+
+        sql = loader.sql()
+        builds = [s for s in sql if s.startswith('CREATE')]
+        assert sorted(builds) == [
+            "CREATE INDEX IF NOT EXISTS idx_fact_date ON climate.fact_temperature (date_id)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_fact_location_date_source "
+            "ON climate.fact_temperature (location_id, date_id, source_file)",
+        ]
+        assert sql.count("SET LOCAL maintenance_work_mem = '256MB'") == 2
+        assert sql[-3:] == [
+            "ALTER TABLE climate.fact_temperature ADD CONSTRAINT uq_fact_location_date_source "
+            "UNIQUE USING INDEX uq_fact_location_date_source",
+            "ALTER TABLE climate.fact_temperature ADD CONSTRAINT fact_temperature_date_id_fkey "
+            "FOREIGN KEY (date_id) REFERENCES climate.dim_date(date_id)",
+            "ALTER TABLE climate.fact_temperature ADD CONSTRAINT fact_temperature_location_id_fkey "
+            "FOREIGN KEY (location_id) REFERENCES climate.dim_location(location_id)",
+        ]
+
+    def test_partitioned_builds_per_partition_and_skips_existing(self):
+        loader = FakeLoader(
+            partitions=['fact_temperature_city'],
+            constraints=[FACT_UNIQUE, 'fact_temperature_date_id_fkey'],
+        )
+
+        create_fact_indexes(loader)
+
+        sql = loader.sql()
+        assert "CREATE UNIQUE INDEX IF NOT EXISTS fact_temperature_city_uq_fact_location_date_source " \
+            "ON climate.fact_temperature_city (location_id, date_id, source_file)" in sql
+        assert "CREATE INDEX IF NOT EXISTS fact_temperature_city_idx_fact_date " \
+            "ON climate.fact_temperature_city (date_id)" in sql
+        assert sql[-3:] == [
+            "ALTER TABLE climate.fact_temperature_city ADD CONSTRAINT "
+            "fact_temperature_city_uq_fact_location_date_source "
+            "UNIQUE USING INDEX fact_temperature_city_uq_fact_location_date_source",
+            "CREATE INDEX IF NOT EXISTS idx_fact_date ON climate.fact_temperature (date_id)",
+            "ALTER TABLE climate.fact_temperature ADD CONSTRAINT fact_temperature_location_id_fkey "
+            "FOREIGN KEY (location_id) REFERENCES climate.dim_location(location_id)",
+        ]
+
+
+class TestPartitionFactTable:
+
+    def test_migrates_to_one_partition_per_source(self):
+        loader = FakeLoader()
+
+        partition_fact_table(loader)
+
+        sql = loader.sql()
+        assert "ALTER TABLE climate.fact_temperature RENAME TO fact_temperature_unpartitioned" in sql
+        assert any(s.strip().endswith("PARTITION BY LIST (source_file)") for s in sql)
+        for source in CSV_FILES:
+            assert (
+                f"CREATE TABLE climate.fact_temperature_{source} "
+                f"PARTITION OF climate.fact_temperature FOR VALUES IN ('{source}')"
+            ) in sql
+        assert "CREATE TABLE climate.fact_temperature_default " \
+            "PARTITION OF climate.fact_temperature DEFAULT" in sql
+        assert "INSERT INTO climate.fact_temperature " \
+            "SELECT * FROM climate.fact_temperature_unpartitioned" in sql
+        assert "DROP TABLE climate.fact_temperature_unpartitioned" in sql
+        # Indices recriados em cada particao nova
+        assert "CREATE INDEX IF NOT EXISTS fact_temperature_city_idx_fact_date " \
+            "ON climate.fact_temperature_city (date_id)" in sql
+
+    def test_noop_when_already_partitioned(self):
+        loader = FakeLoader(partitions=['fact_temperature_city'])
+
+        partition_fact_table(loader)
+
+        assert loader.log == []
+
+
+class TestClearSource:
+
+    def test_truncates_partition(self):
+        loader = FakeLoader(partitions=['fact_temperature_city'])
+
+        clear_source(loader, 'city')
+
+        assert loader.log == [("TRUNCATE climate.fact_temperature_city", None)]
+
+    def test_deletes_with_bound_source(self):
+        loader = FakeLoader()
+
+        clear_source(loader, "city'; DROP TABLE x; --")
+
+        assert loader.log == [(
+            "DELETE FROM climate.fact_temperature WHERE source_file = :source",
+            {'source': "city'; DROP TABLE x; --"},
+        )]
+
+
+class TestInitDb:
+
+    def test_fact_indexes_match_layout(self):
+        sql = INIT_DB.read_text()
+
+        assert f"CONSTRAINT {FACT_UNIQUE} UNIQUE (location_id, date_id, source_file)" in sql
+        assert "CREATE INDEX idx_fact_date ON climate.fact_temperature(date_id);" in sql
+        assert "BRIN" not in sql
@@ -0,0 +1,216 @@
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.load.incremental import (
+    FACT_CONFLICT_COLUMNS,
+    IncrementalLoader,
+    merge_summaries,
+    plan_partitions,
+    row_hashes,
+    select_rows,
+    summarize_partitions,
+)
+from src.transform.transformers import FACT_COLUMNS
+
+
+@pytest.fixture
+def dim_date():
+    """Quatro meses de 2010."""
+    return pd.DataFrame({
+        'date_id': [1, 2, 3, 4],
+        'full_date': pd.to_datetime(['2010-01-01', '2010-02-01', '2010-03-01', '2010-04-01']),
+    })
+
+
+def make_fact(rows):
+    """Cria uma tabela fato a partir de (date_id, location_id, avg_temperature)."""
+    fact = pd.DataFrame(rows, columns=['date_id', 'location_id', 'avg_temperature'])
+    for col in FACT_COLUMNS:
+        if col not in fact.columns:
+            fact[col] = np.nan
+    fact['source_file'] = 'city'
+    return fact[FACT_COLUMNS]
+
+
+def state_from(summary):
+    """Simula o estado gravado no banco depois de carregar `summary`."""
+    return pd.DataFrame({
+        'location_id': summary['location_id'],
+        'max_date': summary['max_date'],
+        'content_hash': summary['content_hash'].to_numpy(dtype='uint64').view('int64'),
+        'row_count': summary['row_count'],
+    })
+
+
+EMPTY_STATE = pd.DataFrame(columns=['location_id', 'max_date', 'content_hash', 'row_count'])
+
+
+class TestRowHashes:
+
+    def test_ignores_dtype_changes(self):
+        fact = make_fact([(1, 10, 12.3456)])
+        narrow = fact.astype({'avg_temperature': 'float32', 'date_id': 'int32'})
+
+        assert row_hashes(fact)[0] == row_hashes(narrow)[0]
+
+    def test_changes_with_value(self):
+        a = make_fact([(1, 10, 12.3)])
+        b = make_fact([(1, 10, 12.4)])
+
+        assert row_hashes(a)[0] != row_hashes(b)[0]
+
+
+class TestIncrementalPlan:
+
+    def test_summary_is_additive_across_chunks(self, dim_date):
+        rows = [(1, 10, 1.0), (2, 10, 2.0), (3, 10, 3.0), (1, 20, 5.0)]
+
+        whole = summarize_partitions(make_fact(rows), dim_date, EMPTY_STATE)
+        chunked = merge_summaries([
+            summarize_partitions(make_fact(rows[:2]), dim_date, EMPTY_STATE),
+            summarize_partitions(make_fact(rows[2:]), dim_date, EMPTY_STATE),
+        ])
+
+        pd.testing.assert_frame_equal(whole, chunked)
+
+    def test_first_run_loads_everything(self, dim_date):
+        fact = make_fact([(1, 10, 1.0), (2, 10, 2.0)])
+
+        summary = summarize_partitions(fact, dim_date, EMPTY_STATE)
+        plan = plan_partitions(summary, EMPTY_STATE)
+
+        assert plan['action'].tolist() == ['new']
+        assert len(select_rows(fact, dim_date, plan)) == 2
+
+    def test_new_months_append_only_after_watermark(self, dim_date):
+        old = make_fact([(1, 10, 1.0), (2, 10, 2.0), (1, 20, 5.0)])
+        state = state_from(summarize_partitions(old, dim_date, EMPTY_STATE))
+
+        new = make_fact([(1, 10, 1.0), (2, 10, 2.0), (3, 10, 3.0), (1, 20, 5.0)])
+        summary = summarize_partitions(new, dim_date, state)
+        plan = plan_partitions(summary, state)
+
+        assert plan.set_index('location_id')['action'].to_dict() == {10: 'append', 20: 'skip'}
+        selected = select_rows(new, dim_date, plan)
+        assert selected['date_id'].tolist() == [3]
+
+    def test_revised_history_reloads_partition(self, dim_date):
+        old = make_fact([(1, 10, 1.0), (2, 10, 2.0)])
+        state = state_from(summarize_partitions(old, dim_date, EMPTY_STATE))
+
+        revised = make_fact([(1, 10, 1.5), (2, 10, 2.0)])
+        plan = plan_partitions(summarize_partitions(revised, dim_date, state), state)
+
+        assert plan['action'].tolist() == ['reload']
+        assert len(select_rows(revised, dim_date, plan)) == 2
+
+    def test_hash_keeps_low_bits_when_a_location_is_new(self, dim_date):
+        old = make_fact([(1, 10, 1.0), (2, 10, 2.0)])
+        state = state_from(summarize_partitions(old, dim_date, EMPTY_STATE))
+        # Hash que so difere nos bits baixos (float64 nao distingue)
+        hashes = state['content_hash'].to_numpy(dtype='int64').view('uint64')
+        state['content_hash'] = (hashes ^ np.uint64(1)).view('int64')
+
+        new = make_fact([(1, 10, 1.0), (2, 10, 2.0), (1, 20, 5.0)])
+        plan = plan_partitions(summarize_partitions(new, dim_date, state), state)
+
+        assert plan.set_index('location_id')['action'].to_dict() == {10: 'reload', 20: 'new'}
+
+
+class StubLoader:
+    """
+    DatabaseLoader de mentira: registra as cargas em ordem e guarda o
+    estado gravado em etl_state para a proxima execucao.
+    """
+
+    schema = 'climate'
+
+    def __init__(self):
+        self.calls = []
+        self.state = EMPTY_STATE
+        self.fail_fact_loads = False
+
+    @property
+    def engine(self):
+        loader = self
+
+        class Connection:
+            def execute(self, statement, params=None):
+                loader.calls.append(('sql', str(statement).split('(')[0].strip()))
+
+        class Engine:
+            @contextmanager
+            def begin(self):
+                yield Connection()
+
+        return Engine()
+
+    def load_dataframe(self, df, table_name, **kwargs):
+        self.calls.append(('load', table_name, len(df), kwargs))
+        if table_name == 'fact_temperature' and self.fail_fact_loads:
+            raise ConnectionError("upsert caiu")
+        if table_name == 'etl_state':
+            self.state = df[['location_id', 'max_date', 'content_hash', 'row_count']]
+        return len(df)
+
+
+class TestIncrementalLoad:
+
+    @pytest.fixture
+    def loader(self):
+        return StubLoader()
+
+    def run(self, loader, dim_date, chunks):
+        incremental = IncrementalLoader(loader, dim_date, 'city')
+        incremental.read_state = lambda: loader.state
+        loader.calls.clear()
+        return incremental, incremental.load(lambda: iter(chunks))
+
+    def test_reload_deletes_in_first_upsert_then_saves_state(self, loader, dim_date):
+        self.run(loader, dim_date, [make_fact([(1, 10, 1.0), (2, 10, 2.0)])])
+
+        revised = [make_fact([(1, 10, 1.5)]), make_fact([(2, 10, 2.0), (1, 20, 3.0)])]
+        incremental, total = self.run(loader, dim_date, revised)
+
+        assert total == 3
+        assert sorted(incremental.touched_locations) == [10, 20]
+        assert [call[:3] for call in loader.calls] == [
+            ('sql', 'CREATE TABLE IF NOT EXISTS climate.etl_state'),
+            ('load', 'fact_temperature', 1),
+            ('load', 'fact_temperature', 2),
+            ('load', 'etl_state', 2),
+        ]
+
+        first, second = loader.calls[1][3], loader.calls[2][3]
+        for kwargs in (first, second):
+            assert kwargs['method'] == 'copy'
+            assert kwargs['staging'] is True
+            assert kwargs['on_conflict'] == 'update'
+            assert kwargs['conflict_columns'] == FACT_CONFLICT_COLUMNS
+
+        [(sql, params)] = first['statements']
+        assert sql.startswith("DELETE FROM climate.fact_temperature WHERE source_file = :source")
+        assert params == {'source': 'city', 'location_ids': [10]}
+        assert second['statements'] == []
+
+    def test_state_not_saved_when_upsert_fails(self, loader, dim_date):
+        loader.fail_fact_loads = True
+
+        with pytest.raises(ConnectionError):
+            self.run(loader, dim_date, [make_fact([(1, 10, 1.0)])])
+
+        assert [call[1] for call in loader.calls if call[0] == 'load'] == ['fact_temperature']
+        assert loader.state is EMPTY_STATE
+
+    def test_unchanged_input_skips_every_location(self, loader, dim_date):
+        chunks = [make_fact([(1, 10, 1.0), (2, 10, 2.0)]), make_fact([(1, 20, 5.0)])]
+        _, first_total = self.run(loader, dim_date, chunks)
+
+        incremental, total = self.run(loader, dim_date, chunks)
+
+        assert first_total == 3
+        assert total == 0
+        assert incremental.touched_locations == []
+        assert [call[0] for call in loader.calls] == ['sql']
@@ -0,0 +1,114 @@
+import json
+import threading
+
+import pandas as pd
+import pytest
+from src.utils.instrumentation import Instrumentation, instrumented
+
+
+@instrumented('double')
+def double(df):
+    return pd.concat([df, df], ignore_index=True)
+
+
+@instrumented('chunks')
+def chunks(n):
+    for i in range(n):
+        yield pd.DataFrame({'x': range(i + 1)})
+
+
+class TestInstrumentation:
+
+    def test_stage_records_rows_time_and_json_line(self, tmp_path):
+        path = tmp_path / "metrics.jsonl"
+        metrics = Instrumentation(source='city', jsonl_path=path, run_id='run1')
+
+        with metrics.stage('clean', rows_in=100_000) as m:
+            m.set_result(pd.DataFrame({'x': range(50_000)}))
+
+        record = json.loads(path.read_text())
+        assert record['run_id'] == 'run1'
+        assert record['source'] == 'city'
+        assert (record['stage'], record['chunk']) == ('clean', 0)
+        assert (record['rows_in'], record['rows_out']) == (100_000, 50_000)
+        assert record['wall_s'] >= 0 and record['cpu_s'] >= 0
+        assert record['memory_mb'] > 0
+        assert metrics.totals['clean']['rows'] == 50_000
+
+    def test_memory_is_shallow_unless_deep_requested(self):
+        df = pd.DataFrame({'city': ['Sao Paulo' * 10] * 1_000})
+        shallow, deep = Instrumentation(), Instrumentation(deep_memory=True)
+
+        for metrics in (shallow, deep):
+            with metrics.stage('clean') as m:
+                m.set_result(df)
+
+        assert shallow.totals['clean']['memory_mb'] < deep.totals['clean']['memory_mb']
+
+    def test_failed_stage_is_recorded_with_error(self, tmp_path):
+        path = tmp_path / "metrics.jsonl"
+        metrics = Instrumentation(jsonl_path=path)
+
+        with pytest.raises(KeyError):
+            with metrics.stage('lookup'):
+                raise KeyError('x')
+
+        assert json.loads(path.read_text())['error'] == 'KeyError'
+
+    def test_iterate_records_one_line_per_chunk(self, tmp_path):
+        path = tmp_path / "metrics.jsonl"
+        metrics = Instrumentation(jsonl_path=path)
+
+        frames = [pd.DataFrame({'x': range(n)}) for n in (3, 5)]
+        assert len(list(metrics.iterate('extract', frames))) == 2
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [(r['chunk'], r['rows_out']) for r in records] == [(0, 3), (1, 5)]
+
+    def test_decorator_only_measures_when_active(self):
+        metrics = Instrumentation()
+        df = pd.DataFrame({'x': [1, 2]})
+
+        double(df)
+        assert metrics.totals == {}
+
+        with metrics.activate():
+            double(df)
+        assert metrics.totals['double']['rows'] == 4
+
+    def test_decorator_inside_stage_is_not_counted_twice(self):
+        metrics = Instrumentation()
+
+        with metrics.activate():
+            with metrics.stage('transform') as m:
+                m.set_result(double(pd.DataFrame({'x': [1]})))
+            # Generator decorado: um registro por chunk
+            assert sum(len(c) for c in chunks(3)) == 6
+
+        assert set(metrics.totals) == {'transform', 'chunks'}
+        assert metrics.totals['chunks']['chunks'] == 3
+
+    def test_activation_does_not_leak_to_other_threads(self):
+        metrics = Instrumentation()
+        df = pd.DataFrame({'x': [1]})
+
+        with metrics.activate():
+            worker = threading.Thread(target=double, args=(df,))
+            worker.start()
+            worker.join()
+            double(df)
+
+        assert metrics.totals['double']['chunks'] == 1
+
+    def test_prometheus_textfile(self, tmp_path):
+        metrics = Instrumentation(source='global')
+        metrics.record('load', rows=100, seconds=2.0, cpu_seconds=0.5)
+
+        path = tmp_path / "node" / "climate.prom"
+        metrics.write_prometheus(path)
+
+        text = path.read_text()
+        assert '# TYPE climate_etl_stage_seconds gauge' in text
+        assert 'climate_etl_stage_seconds{source="global",stage="load"} 2' in text
+        assert 'climate_etl_stage_rows{source="global",stage="load"} 100' in text
+        assert list(path.parent.iterdir()) == [path]
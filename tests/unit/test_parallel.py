@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+from benchmarks.synthetic import make_city_frame
+from src.extract.csv_extractor import CSVExtractor
+from src.pipeline.parallel import parallel_fact_chunks
+from src.transform.cleaners import clean_temperature_data
+from src.transform.transformers import (
+    create_date_dimension,
+    create_fact_temperature,
+    create_location_dimension,
+)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """CSV sintetico de cidades com algumas centenas de linhas."""
+    make_city_frame(600, n_cities=12, n_countries=3).to_csv(
+        tmp_path / "GlobalLandTemperaturesByCity.csv", index=False
+    )
+    return str(tmp_path)
+
+
+class TestParallelFactChunks:
+
+    def test_matches_single_process_in_order(self, data_dir):
+        cleaned = clean_temperature_data(
+            CSVExtractor(data_dir, use_cache=False).extract("city"), "city"
+        )
+        dim_date = create_date_dimension(cleaned['dt'])
+        dim_location = create_location_dimension({'city': cleaned})
+        expected = create_fact_temperature(cleaned, dim_date, dim_location)
+
+        chunks = list(parallel_fact_chunks(
+            "city", dim_date, dim_location, processes=2,
+            chunk_size=100, data_dir=data_dir
+        ))
+        result = pd.concat(chunks, ignore_index=True)
+
+        assert len(chunks) > 2
+        pd.testing.assert_frame_equal(
+            result.astype({'source_file': str}),
+            expected.astype({'source_file': str}),
+        )
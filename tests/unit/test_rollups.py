@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.load.duckdb_loader import DuckDBLoader
+from src.load.rollups import refresh_location_trends, refresh_rollups, rollup_statements
+from src.transform.transformers import FACT_COLUMNS
+
+DIRECT_YEAR = """
+SELECT f.location_id, d.year, COUNT(*) AS measurement_count,
+       AVG(f.avg_temperature) AS avg_temperature,
+       MIN(f.avg_temperature) AS min_temperature,
+       MAX(f.avg_temperature) AS max_temperature
+FROM climate.fact_temperature f
+JOIN climate.dim_date d ON f.date_id = d.date_id
+WHERE f.avg_temperature IS NOT NULL
+GROUP BY 1, 2 ORDER BY 1, 2
+"""
+
+ROLLUP_YEAR = """
+SELECT location_id, year, measurement_count,
+       avg_temperature, min_temperature, max_temperature
+FROM climate.agg_location_year ORDER BY 1, 2
+"""
+
+
+@pytest.fixture
+def loader():
+    """DuckDB em memoria com 3 localizacoes x 24 meses (2000-2001)."""
+    loader = DuckDBLoader(':memory:')
+
+    months = pd.date_range('2000-01-01', periods=24, freq='MS')
+    loader.load_dataframe(pd.DataFrame({
+        'date_id': np.arange(1, 25),
+        'full_date': months.date,
+        'year': months.year,
+        'month': months.month,
+        'month_name': months.month_name(),
+        'quarter': months.quarter,
+        'decade': months.year // 10 * 10,
+        'century': months.year // 100 + 1,
+        'is_modern_era': True,
+    }), 'dim_date')
+
+    rng = np.random.default_rng(0)
+    fact = pd.DataFrame({
+        'date_id': np.tile(np.arange(1, 25), 3),
+        'location_id': np.repeat([1, 2, 3], 24),
+        'avg_temperature': rng.normal(15, 5, 72).round(3),
+        'avg_temperature_uncertainty': 0.2,
+    })
+    fact.loc[5, 'avg_temperature'] = np.nan
+    for col in FACT_COLUMNS:
+        if col not in fact.columns:
+            fact[col] = np.nan
+    fact['source_file'] = 'city'
+    loader.load_dataframe(fact[FACT_COLUMNS], 'fact_temperature')
+
+    yield loader
+    loader.close()
+
+
+class TestRollupStatements:
+
+    def test_filters_by_location(self):
+        statements = rollup_statements('climate', [3, 7])
+        assert len(statements) == 9
+        assert "WHERE location_id IN (3, 7)" in statements[1]
+        assert "AND f.location_id IN (3, 7)" in statements[2]
+
+    def test_full_refresh_has_no_filter(self):
+        assert all("IN (" not in s for s in rollup_statements('climate'))
+
+
+class TestRefreshRollups:
+
+    def test_matches_direct_aggregation(self, loader):
+        refresh_rollups(loader)
+
+        pd.testing.assert_frame_equal(
+            loader.query(ROLLUP_YEAR), loader.query(DIRECT_YEAR), check_dtype=False
+        )
+        decades = loader.query("SELECT * FROM climate.agg_location_decade")
+        assert decades['measurement_count'].sum() == 71
+        months = loader.query("SELECT * FROM climate.agg_location_month")
+        assert len(months) == 3 * 12
+
+    def test_same_date_from_two_sources_counts_once(self, loader):
+        refresh_rollups(loader)
+        expected = loader.query(ROLLUP_YEAR)
+
+        # Cidade grande: mesma localizacao e datas vindas de major_city
+        duplicate = loader.query(
+            "SELECT * EXCLUDE (temperature_id, loaded_at) FROM climate.fact_temperature "
+            "WHERE location_id = 1"
+        )
+        duplicate['avg_temperature'] = duplicate['avg_temperature'].fillna(40.0) + 50
+        duplicate['source_file'] = 'major_city'
+        loader.load_dataframe(duplicate, 'fact_temperature')
+
+        refresh_rollups(loader, [1])
+        result = loader.query(ROLLUP_YEAR)
+
+        # A data nula em city vem de major_city; as demais continuam de city
+        assert result['measurement_count'].tolist() == [12, 12, 12, 12, 12, 12]
+        assert result['max_temperature'].iloc[0] == 90.0
+        pd.testing.assert_frame_equal(result.iloc[1:], expected.iloc[1:], check_dtype=False)
+
+    def test_refreshes_only_touched_locations(self, loader):
+        refresh_rollups(loader)
+        loader.conn.execute(
+            "UPDATE climate.fact_temperature SET avg_temperature = 100 "
+            "WHERE location_id IN (1, 2)"
+        )
+
+        refresh_rollups(loader, [2])
+
+        result = loader.query(
+            "SELECT location_id, MAX(max_temperature) AS hottest "
+            "FROM climate.agg_location_year GROUP BY 1 ORDER BY 1"
+        ).set_index('location_id')['hottest']
+        assert result[1] < 100  # nao recalculada
+        assert result[2] == 100
+        assert result[3] < 100
+
+    def test_empty_selection_is_noop(self, loader):
+        refresh_rollups(loader, [])
+        assert loader.query(
+            "SELECT COUNT(*) AS n FROM information_schema.tables "
+            "WHERE table_name = 'agg_location_year'"
+        )['n'].iloc[0] == 0
+
+    def test_location_trends_follow_yearly_rollup(self, loader):
+        refresh_rollups(loader)
+        refresh_location_trends(loader)
+
+        trends = loader.query("SELECT * FROM climate.location_trend ORDER BY location_id")
+        assert trends['location_id'].tolist() == [1, 2, 3]
+        assert trends['n_years'].tolist() == [2, 2, 2]
+        assert trends['data_points'].sum() == 71
+
+        # Refresh parcial so regrava a localizacao pedida
+        loader.conn.execute("UPDATE climate.location_trend SET slope = 99")
+        refresh_location_trends(loader, [3])
+        slopes = loader.query(
+            "SELECT location_id, slope FROM climate.location_trend ORDER BY location_id"
+        )['slope'].tolist()
+        assert slopes[:2] == [99, 99]
+        assert slopes[2] != 99
@@ -0,0 +1,35 @@
+import pandas as pd
+from src.models.schema import CLEAN_DTYPES, apply_dtypes
+from src.transform.cleaners import clean_temperature_data
+
+
+class TestApplyDtypes:
+
+    def test_converts_only_planned_columns(self):
+        df = pd.DataFrame({'country': ['Brazil', 'Brazil'], 'other': [1.5, 2.5]})
+
+        apply_dtypes(df, CLEAN_DTYPES)
+
+        assert df['country'].dtype == 'category'
+        assert df['other'].dtype == 'float64'
+
+
+class TestCleanKeepsCompactDtypes:
+
+    def test_clean_returns_categories_and_float32(self):
+        raw = pd.DataFrame({
+            'dt': ['2010-01-01', '2010-02-01'],
+            'AverageTemperature': [10.5, None],
+            'City': [' Sao Paulo', 'Sao Paulo'],
+            'Country': ['Brazil', 'Brazil'],
+            'Latitude': ['23.55S', '23.55S'],
+            'Longitude': ['46.64W', '46.64W'],
+        }).astype({'City': 'category'})
+
+        df = clean_temperature_data(raw, 'city')
+
+        assert df['averagetemperature'].dtype == 'float32'
+        assert df['city'].dtype == 'category'
+        assert df['city'].tolist() == ['Sao Paulo', 'Sao Paulo']
+        assert df['hemisphere_ns'].dtype == 'category'
+        assert df['source_file'].dtype == 'category'
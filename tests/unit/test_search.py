@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+from src.utils.search import LocationSearchIndex, load_search_index, normalize_name
+
+
+@pytest.fixture
+def dim_location():
+    return pd.DataFrame({
+        'location_id': [1, 2, 3, 4, 5, 6, 7],
+        'granularity': ['city', 'city', 'city', 'city', 'city', 'state', 'country'],
+        'city': ['São Paulo', 'Santos', 'Rio de Janeiro', 'Paulo Afonso', 'Saint Paul',
+                 None, None],
+        'state': [None, None, None, None, None, 'São Paulo', None],
+        'country': ['Brazil', 'Brazil', 'Brazil', 'Brazil', 'United States',
+                    'Brazil', 'Brazil'],
+    })
+
+
+@pytest.fixture
+def coverage():
+    return pd.Series({1: 3_000, 2: 100, 3: 2_500, 4: 50, 5: 4_000, 6: 9_000, 7: 20_000})
+
+
+@pytest.fixture
+def index(dim_location, coverage):
+    return LocationSearchIndex.from_dim_location(dim_location, coverage)
+
+
+def ids(results):
+    return [r['location_id'] for r in results]
+
+
+class TestNormalizeName:
+
+    def test_removes_accents_case_and_punctuation(self):
+        assert normalize_name("São Paulo") == "sao paulo"
+        assert normalize_name("  Ürümqi ") == "urumqi"
+        assert normalize_name("Winston-Salem") == "winston salem"
+
+
+class TestLocationSearchIndex:
+
+    def test_prefix_ignores_accents(self, index):
+        results = index.search("SAO", granularity='city')
+        assert ids(results)[:1] == [1]
+        assert results[0]['name'] == 'São Paulo'
+        assert results[0]['match'] == 'prefix'
+
+    def test_exact_match_first_then_coverage(self, index):
+        assert ids(index.search("sa", fuzzy=False)) == [6, 5, 1, 2]
+        assert index.search("santos")[0]['match'] == 'exact'
+
+    def test_word_prefix_ranks_after_name_prefix(self, index):
+        results = index.search("paulo", granularity='city', fuzzy=False)
+        assert ids(results) == [4, 1]
+        assert [r['match'] for r in results] == ['prefix', 'word_prefix']
+
+    def test_query_as_long_as_longest_key(self, index):
+        # "rio de janeiro" e a chave mais longa do indice
+        results = index.search("rio de janeiro", fuzzy=False)
+        assert ids(results) == [3]
+        assert results[0]['match'] == 'exact'
+        assert index.search("rio de janeiroo", fuzzy=False) == []
+        assert index.search("rio de janeiro x", fuzzy=False) == []
+        assert ids(index.search("rio de janeiroo"))[:1] == [3]
+
+    def test_fuzzy_completes_prefix_results(self, index):
+        results = index.search("rio de janiero", k=3)
+        assert ids(results)[:1] == [3]
+        assert results[0]['match'] == 'fuzzy'
+        assert 0 < results[0]['score'] < 1
+
+    def test_granularity_filter_and_empty_query(self, index):
+        assert ids(index.search("brazil", granularity='country')) == [7]
+        assert index.search("brazil", granularity='city') == []
+        assert index.search("  ") == []
+
+    def test_save_and_load_roundtrip(self, index, tmp_path):
+        path = index.save(tmp_path / "search.npz")
+        loaded = load_search_index(path)
+
+        assert len(loaded) == len(index)
+        assert loaded.search("sao p") == index.search("sao p")
+        assert load_search_index(path) is loaded
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.utils.spatial import (
+    LocationIndex,
+    haversine_km,
+    load_location_index,
+    nearest_locations,
+)
+
+
+@pytest.fixture
+def points():
+    """2.000 pontos uniformes na esfera."""
+    rng = np.random.default_rng(7)
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, 2_000)))
+    lon = rng.uniform(-180, 180, 2_000)
+    return lat, lon
+
+
+@pytest.fixture
+def queries():
+    rng = np.random.default_rng(8)
+    return np.degrees(np.arcsin(rng.uniform(-1, 1, 500))), rng.uniform(-180, 180, 500)
+
+
+class TestLocationIndex:
+
+    def test_knn_matches_brute_force_haversine(self, points, queries):
+        lat, lon = points
+        index = LocationIndex(np.arange(10, 2_010), lat, lon, leaf_size=16)
+
+        distances, ids = index.query(*queries, k=4)
+
+        brute = haversine_km(queries[0][:, None], queries[1][:, None], lat, lon)
+        expected = np.argsort(brute, axis=1)[:, :4]
+        np.testing.assert_array_equal(ids, expected + 10)
+        np.testing.assert_allclose(
+            distances, np.take_along_axis(brute, expected, axis=1), atol=1e-6
+        )
+
+    def test_radius_matches_brute_force(self, points, queries):
+        lat, lon = points
+        index = LocationIndex(np.arange(2_000), lat, lon)
+
+        distances, ids = index.query_radius(*queries, radius_km=500)
+
+        brute = haversine_km(queries[0][:, None], queries[1][:, None], lat, lon)
+        assert len(ids) == 500
+        for i in range(500):
+            assert set(ids[i]) == set(np.flatnonzero(brute[i] <= 500))
+            assert (np.diff(distances[i]) >= 0).all()
+
+    def test_antimeridian_and_poles(self):
+        index = LocationIndex([1, 2, 3], [0.0, 0.0, 89.9], [179.9, 90.0, 0.0])
+
+        _, ids = index.query([0.0, 89.95], [-179.9, 120.0], k=1)
+
+        assert ids[:, 0].tolist() == [1, 3]
+
+    def test_k_larger_than_index(self):
+        index = LocationIndex([1, 2], [0.0, 10.0], [0.0, 10.0])
+        distances, ids = index.query([0.0], [0.0], k=5)
+        assert ids.tolist() == [[1, 2]]
+        assert distances[0, 0] == 0
+
+    def test_rejects_missing_coordinates(self):
+        index = LocationIndex([1], [0.0], [0.0])
+        with pytest.raises(ValueError):
+            index.query([np.nan], [0.0])
+
+
+class TestDimLocationIndex:
+
+    @pytest.fixture
+    def dim_location(self):
+        return pd.DataFrame({
+            'location_id': [1, 2, 3, 4],
+            'granularity': ['global', 'country', 'city', 'city'],
+            'city': [None, None, 'Brasilia', 'London'],
+            'country': [None, 'Brazil', 'Brazil', 'United Kingdom'],
+            'latitude': [None, None, -15.27, 52.24],
+            'longitude': [None, None, -47.50, -0.59],
+        })
+
+    def test_only_located_rows_are_indexed(self, dim_location):
+        index = LocationIndex.from_dim_location(dim_location)
+        assert index.location_ids.tolist() == [3, 4]
+
+    def test_save_load_and_nearest_locations(self, dim_location, tmp_path):
+        path = LocationIndex.from_dim_location(dim_location).save(tmp_path / "index.npz")
+
+        result = nearest_locations(
+            [-15.78, 51.51], [-47.93, -0.13], k=2, index=load_location_index(path)
+        )
+
+        first = result[result['rank'] == 0]
+        assert first['city'].tolist() == ['Brasilia', 'London']
+        assert first['distance_km'].iloc[0] == pytest.approx(
+            haversine_km(-15.78, -47.93, -15.27, -47.50), rel=1e-9
+        )
+        assert len(nearest_locations(
+            [-15.78], [-47.93], k=2, max_distance_km=1_000, index=load_location_index(path)
+        )) == 1
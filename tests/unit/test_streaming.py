@@ -0,0 +1,73 @@
+import warnings
+
+import pandas as pd
+import pytest
+
+from src.extract.csv_extractor import CSVExtractor
+from src.pipeline.streaming import (
+    MAX_CHUNK_SIZE,
+    MIN_CHUNK_SIZE,
+    _concat_members,
+    estimate_chunk_size,
+)
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    """Extrator apontando para um CSV de cidades pequeno."""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    pd.DataFrame({
+        'dt': pd.date_range('2000-01-01', periods=100, freq='MS').strftime('%Y-%m-%d'),
+        'AverageTemperature': 15.0,
+        'AverageTemperatureUncertainty': 0.5,
+        'City': 'Sao Paulo',
+        'Country': 'Brazil',
+        'Latitude': '23.55S',
+        'Longitude': '46.64W',
+    }).to_csv(raw_dir / "GlobalLandTemperaturesByCity.csv", index=False)
+
+    return CSVExtractor(data_dir=str(raw_dir), cache_dir=str(tmp_path / "cache"))
+
+
+class TestEstimateChunkSize:
+
+    def test_tiny_target_uses_minimum(self, extractor):
+        assert estimate_chunk_size(extractor, "city", memory_target_mb=1) == MIN_CHUNK_SIZE
+
+    def test_huge_target_is_capped(self, extractor):
+        assert estimate_chunk_size(extractor, "city", memory_target_mb=10**7) == MAX_CHUNK_SIZE
+
+    def test_scales_with_target_between_bounds(self, extractor):
+        small = estimate_chunk_size(extractor, "city", memory_target_mb=64)
+        large = estimate_chunk_size(extractor, "city", memory_target_mb=128)
+
+        assert MIN_CHUNK_SIZE <= small < large <= MAX_CHUNK_SIZE
+
+
+class TestConcatMembers:
+
+    def test_keeps_existing_dtypes_without_warning(self):
+        existing = pd.DataFrame({
+            'location_id': pd.Series([1], dtype='int64'),
+            'city': pd.Series(['Sao Paulo'], dtype=object),
+            'latitude': pd.Series([-23.55], dtype='float64'),
+        })
+        new = pd.DataFrame({
+            'city': pd.Series(['Lisboa'], dtype='category'),
+            'latitude': pd.Series([None], dtype=object),
+            'location_id': pd.Series([2], dtype='int64'),
+        })
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            merged = _concat_members(existing, new)
+
+        assert merged.dtypes.to_dict() == existing.dtypes.to_dict()
+        assert merged['location_id'].tolist() == [1, 2]
+        assert pd.isna(merged.loc[1, 'latitude'])
+
+    def test_empty_existing_returns_new(self):
+        new = pd.DataFrame({'location_id': [5, 6]}, index=[3, 4])
+
+        assert _concat_members(new.iloc[0:0], new)['location_id'].tolist() == [5, 6]
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.load.supabase_uploader import SupabaseUploader, frame_records
+
+pytest.importorskip("httpx")
+
+
+def make_uploader(postgrest, tmp_path, **kwargs):
+    options = dict(
+        key='service-key', concurrency=4, batch_size=100, min_batch_size=10,
+        backoff_s=0.01, max_backoff_s=0.05, journal_path=tmp_path / "failed.jsonl",
+    )
+    options.update(kwargs)
+    return SupabaseUploader(postgrest.url, **options)
+
+
+def records(n):
+    return [{'date_id': i, 'value': float(i)} for i in range(n)]
+
+
+class TestFrameRecords:
+
+    def test_nulls_dates_and_numpy_types(self):
+        df = pd.DataFrame({
+            'full_date': pd.to_datetime(['2000-01-01', '2000-02-01']),
+            'value': [1.5, np.nan],
+            'year': np.array([2000, 2000], dtype='int16'),
+        })
+
+        rows = frame_records(df)
+
+        assert rows[0] == {'full_date': '2000-01-01', 'value': 1.5, 'year': 2000}
+        assert rows[1]['value'] is None
+        json.dumps(rows, allow_nan=False)
+
+
+class TestSupabaseUploader:
+
+    def test_uploads_all_rows_as_upsert(self, postgrest, tmp_path):
+        uploader = make_uploader(postgrest, tmp_path)
+
+        uploaded = asyncio.run(uploader.upload(
+            'fact_temperature', records(1_050), on_conflict='date_id,location_id,source_file'
+        ))
+
+        assert uploaded == 1_050
+        assert sorted(r['date_id'] for r in postgrest.rows['fact_temperature']) == list(range(1_050))
+        request = postgrest.requests[0]
+        assert request['path'] == '/rest/v1/fact_temperature'
+        assert request['params'] == {'on_conflict': ['date_id,location_id,source_file']}
+        assert request['headers']['Authorization'] == 'Bearer service-key'
+        assert 'resolution=merge-duplicates' in request['headers']['Prefer']
+        assert not (tmp_path / "failed.jsonl").exists()
+
+    def test_batches_are_sent_concurrently(self, postgrest, tmp_path):
+        postgrest.respond = lambda n, table, rows: (201, {}, 0.2)
+        uploader = make_uploader(postgrest, tmp_path, batch_size=50, target_latency_s=0.2)
+
+        start = time.perf_counter()
+        asyncio.run(uploader.upload('dim_date', records(400)))
+
+        # 8 batches de 0,2s com 4 em voo: ~0,4s (em serie seriam 1,6s)
+        assert time.perf_counter() - start < 1.0
+        assert len(postgrest.rows['dim_date']) == 400
+
+    def test_transient_errors_are_retried(self, postgrest, tmp_path):
+        postgrest.respond = lambda n, table, rows: (
+            (503, {}, 0) if n < 3 else (429, {'Retry-After': '0'}, 0) if n == 3 else (201, {}, 0)
+        )
+        uploader = make_uploader(postgrest, tmp_path, concurrency=1)
+
+        assert asyncio.run(uploader.upload('dim_date', records(300))) == 300
+        assert uploader.retries == 4
+        assert uploader.failed_batches == []
+
+    def test_batch_size_follows_latency(self, postgrest, tmp_path):
+        uploader = make_uploader(postgrest, tmp_path, concurrency=1, target_latency_s=10)
+        asyncio.run(uploader.upload('dim_date', records(2_000)))
+        assert uploader.batch_size > 100
+
+        postgrest.respond = lambda n, table, rows: (201, {}, 0.02)
+        uploader = make_uploader(postgrest, tmp_path, concurrency=1, target_latency_s=0.005)
+        asyncio.run(uploader.upload('dim_date', records(300)))
+        assert uploader.batch_size < 100
+
+    def test_payload_too_large_splits_batch(self, postgrest, tmp_path):
+        postgrest.respond = lambda n, table, rows: (413, {}, 0) if len(rows) > 40 else (201, {}, 0)
+        uploader = make_uploader(postgrest, tmp_path, concurrency=1)
+
+        assert asyncio.run(uploader.upload('dim_date', records(200))) == 200
+        assert max(r['rows'] for r in postgrest.requests if r['rows'] <= 40) <= 40
+
+    def test_failed_batches_go_to_journal_and_replay(self, postgrest, tmp_path):
+        postgrest.respond = lambda n, table, rows: (
+            (400, {}, 0) if any(r['date_id'] == 150 for r in rows) else (201, {}, 0)
+        )
+        uploader = make_uploader(postgrest, tmp_path, concurrency=2)
+
+        assert asyncio.run(uploader.upload('dim_date', records(300))) == 200
+        assert uploader.retries == 0  # 400 e definitivo
+        assert uploader.failed_batches[0]['rows'] == 100
+        entry = json.loads((tmp_path / "failed.jsonl").read_text())
+        assert entry['table'] == 'dim_date'
+        assert entry['error'].startswith('HTTP 400')
+        assert [r['date_id'] for r in entry['records']] == list(range(100, 200))
+
+        postgrest.respond = lambda n, table, rows: (201, {}, 0)
+        replayer = make_uploader(postgrest, tmp_path)
+
+        assert asyncio.run(replayer.replay()) == 100
+        assert sorted(r['date_id'] for r in postgrest.rows['dim_date']) == list(range(300))
+        assert not (tmp_path / "failed.jsonl").exists()
+        assert not (tmp_path / "failed.jsonl.replaying").exists()
+
+    def test_nan_in_dict_records_is_sent_as_null(self, postgrest, tmp_path):
+        rows = records(300)
+        rows[10]['value'] = float('nan')
+        rows[20]['value'] = np.float64('nan')
+        uploader = make_uploader(postgrest, tmp_path)
+
+        assert asyncio.run(uploader.upload('dim_date', rows)) == 300
+        sent = {r['date_id']: r['value'] for r in postgrest.rows['dim_date']}
+        assert sent[10] is None and sent[20] is None and sent[30] == 30.0
+
+    def test_unserializable_batch_goes_to_journal(self, postgrest, tmp_path):
+        rows = records(300)
+        rows[150]['value'] = float('inf')
+        uploader = make_uploader(postgrest, tmp_path, concurrency=2)
+
+        assert asyncio.run(uploader.upload('dim_date', rows)) == 200
+        assert uploader.failed_batches[0]['error'].startswith('JSON invalido')
+        entry = json.loads((tmp_path / "failed.jsonl").read_text())
+        assert [r['date_id'] for r in entry['records']] == list(range(100, 200))
+
+    def test_requires_credentials(self):
+        with pytest.raises(ValueError):
+            SupabaseUploader(url=None, key=None)
@@ -0,0 +1,187 @@
+import warnings
+
+import pandas as pd
+import pytest
+from src.models.schema import LOCATION_DIMENSION_DTYPES
+from src.transform.cleaners import clean_temperature_data
+from src.transform.transformers import (
+    FACT_COLUMNS,
+    DateCollector,
+    LocationCollector,
+    create_date_dimension,
+    create_fact_temperature,
+    create_location_dimension,
+    merge_date_dimension,
+)
+
+
+@pytest.fixture
+def cleaned_cities():
+    """Dados de cidade ja limpos."""
+    raw = pd.DataFrame({
+        'dt': ['2010-01-01', '2010-02-01', '2010-01-01', '2010-02-01'],
+        'AverageTemperature': [10.5, 12.3, 20.1, None],
+        'AverageTemperatureUncertainty': [0.5, 0.4, 0.3, None],
+        'City': ['Sao Paulo', 'Sao Paulo', 'Rio de Janeiro', 'Rio de Janeiro'],
+        'Country': ['Brazil'] * 4,
+        'Latitude': ['23.55S', '23.55S', '22.91S', '22.91S'],
+        'Longitude': ['46.64W', '46.64W', '43.17W', '43.17W'],
+    })
+    return clean_temperature_data(raw, 'city')
+
+
+@pytest.fixture
+def cleaned_global():
+    """Dados globais ja limpos."""
+    raw = pd.DataFrame({
+        'dt': ['2010-01-01', '2010-02-01'],
+        'LandAverageTemperature': [3.5, 4.2],
+        'LandAverageTemperatureUncertainty': [0.5, 0.4],
+        'LandMaxTemperature': [9.1, 9.8],
+    })
+    return clean_temperature_data(raw, 'global')
+
+
+class TestCreateDateDimension:
+
+    def test_calendar_attributes(self):
+        dates = pd.Series(['2013-08-01', None, '1899-12-01', '2013-08-01'])
+
+        dim_date = create_date_dimension(dates)
+
+        assert dim_date['date_id'].tolist() == [1, 2]
+        assert dim_date['full_date'].tolist() == [
+            pd.Timestamp('1899-12-01'), pd.Timestamp('2013-08-01')
+        ]
+        assert dim_date['month_name'].tolist() == ['December', 'August']
+        assert dim_date['quarter'].tolist() == [4, 3]
+        assert dim_date['decade'].tolist() == [1890, 2010]
+        assert dim_date['century'].tolist() == [19, 21]
+        assert dim_date['is_modern_era'].tolist() == [False, True]
+        assert str(dim_date['year'].dtype) == 'int16'
+
+    def test_collector_matches_full_series(self):
+        dates = pd.Series(pd.date_range('1990-01-01', periods=36, freq='MS')).sample(
+            frac=1, random_state=1
+        )
+        collector = DateCollector()
+        for start in range(0, len(dates), 10):
+            collector.update(dates.iloc[start:start + 10])
+
+        pd.testing.assert_frame_equal(
+            create_date_dimension(collector.dates()), create_date_dimension(dates)
+        )
+
+    def test_merge_keeps_existing_ids(self):
+        existing = create_date_dimension(pd.Series(pd.to_datetime(['2000-02-01', '2000-03-01'])))
+
+        merged, new_rows = merge_date_dimension(
+            existing, pd.Series(pd.to_datetime(['2000-01-01', '2000-03-01', '2000-04-01']))
+        )
+
+        assert new_rows['full_date'].tolist() == [
+            pd.Timestamp('2000-01-01'), pd.Timestamp('2000-04-01')
+        ]
+        assert new_rows['date_id'].tolist() == [3, 4]
+        assert merged.set_index('full_date')['date_id'].to_dict() == {
+            pd.Timestamp('2000-02-01'): 1, pd.Timestamp('2000-03-01'): 2,
+            pd.Timestamp('2000-01-01'): 3, pd.Timestamp('2000-04-01'): 4,
+        }
+
+        _, nothing_new = merge_date_dimension(merged, merged['full_date'])
+        assert nothing_new.empty
+
+    def test_merge_aligns_date_resolution(self):
+        # dim_date lida do DuckDB vem em microssegundos
+        existing = create_date_dimension(pd.Series(pd.to_datetime(['2000-02-01', '2000-03-01'])))
+        existing['full_date'] = existing['full_date'].astype('datetime64[us]')
+
+        merged, new_rows = merge_date_dimension(
+            existing, pd.Series(pd.to_datetime(['2000-03-01', '2000-04-01']))
+        )
+
+        assert new_rows['date_id'].tolist() == [3]
+        assert merged['full_date'].dtype == new_rows['full_date'].dtype
+        assert merged['full_date'].tolist() == [
+            pd.Timestamp('2000-02-01'), pd.Timestamp('2000-03-01'), pd.Timestamp('2000-04-01')
+        ]
+
+
+class TestCreateFactTemperature:
+
+    def test_resolves_keys(self, cleaned_cities):
+        dim_date = create_date_dimension(cleaned_cities['dt'])
+        dim_location = create_location_dimension({'city': cleaned_cities})
+
+        fact = create_fact_temperature(cleaned_cities, dim_date, dim_location)
+
+        assert list(fact.columns) == FACT_COLUMNS
+        assert len(fact) == 4
+
+        resolved = fact.merge(dim_location, on='location_id').merge(dim_date, on='date_id')
+        expected = cleaned_cities.sort_values(['city', 'dt']).reset_index(drop=True)
+        resolved = resolved.sort_values(['city', 'full_date']).reset_index(drop=True)
+        assert resolved['city'].tolist() == expected['city'].tolist()
+        assert resolved['full_date'].tolist() == expected['dt'].tolist()
+        assert resolved['avg_temperature'].equals(expected['averagetemperature'])
+
+    def test_global_uses_single_location(self, cleaned_global):
+        dim_date = create_date_dimension(cleaned_global['dt'])
+        dim_location = create_location_dimension({})
+
+        fact = create_fact_temperature(cleaned_global, dim_date, dim_location)
+
+        assert fact['location_id'].unique().tolist() == [1]
+        assert fact['land_max_temperature'].tolist() == pytest.approx([9.1, 9.8])
+        assert fact['land_min_temperature'].isna().all()
+
+    def test_drops_rows_without_keys(self, cleaned_cities):
+        dim_date = create_date_dimension(cleaned_cities['dt'])
+        only_sao_paulo = cleaned_cities[cleaned_cities['city'] == 'Sao Paulo']
+        dim_location = create_location_dimension({'city': only_sao_paulo})
+
+        fact = create_fact_temperature(cleaned_cities, dim_date, dim_location)
+
+        assert len(fact) == 2
+        assert fact['source_file'].tolist() == ['city', 'city']
+
+
+class TestCreateLocationDimension:
+
+    def test_city_coordinates(self, cleaned_cities):
+        dim_location = create_location_dimension({'city': cleaned_cities})
+
+        assert dim_location['granularity'].tolist() == ['global', 'city', 'city']
+        assert dim_location['location_id'].tolist() == [1, 2, 3]
+
+        sao_paulo = dim_location[dim_location['city'] == 'Sao Paulo'].iloc[0]
+        assert sao_paulo['latitude'] == -23.55
+        assert sao_paulo['longitude'] == -46.64
+        assert sao_paulo['hemisphere_ns'] == 'S'
+        assert sao_paulo['hemisphere_ew'] == 'W'
+
+    def test_collector_matches_full_frame(self, cleaned_cities):
+        collector = LocationCollector()
+        for start in range(0, len(cleaned_cities), 3):
+            collector.update('city', cleaned_cities.iloc[start:start + 3])
+
+        pd.testing.assert_frame_equal(
+            create_location_dimension(collector.frames()),
+            create_location_dimension({'city': cleaned_cities}),
+        )
+
+    def test_blocks_share_dtypes(self, cleaned_cities):
+        countries = pd.DataFrame({'country': pd.Series(['Brazil', 'Chile'], dtype='category')})
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            dim_location = create_location_dimension(
+                {'country': countries, 'city': cleaned_cities}
+            )
+
+        assert dim_location['granularity'].tolist() == [
+            'global', 'country', 'country', 'city', 'city'
+        ]
+        assert {
+            col: str(dtype) for col, dtype in dim_location.dtypes.items() if col != 'location_id'
+        } == LOCATION_DIMENSION_DTYPES
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.transform.trends import TREND_COLUMNS, compute_location_trends
+
+
+def make_yearly(series):
+    """Cria linhas de agg_location_year a partir de {location_id: (anos, temperaturas)}."""
+    frames = []
+    for location_id, (years, temps) in series.items():
+        temps = np.asarray(temps, dtype='float64')
+        frames.append(pd.DataFrame({
+            'location_id': location_id,
+            'year': years,
+            'measurement_count': 12,
+            'avg_temperature': temps,
+            'min_temperature': temps - 5,
+            'max_temperature': temps + 5,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+class TestComputeLocationTrends:
+
+    def test_matches_polyfit_per_location(self):
+        rng = np.random.default_rng(42)
+        series = {}
+        for location_id in range(1, 21):
+            years = np.arange(1900 + location_id, 2014)
+            temps = 10 + 0.01 * location_id * (years - 1900) + rng.normal(0, 0.3, len(years))
+            series[location_id] = (years, temps)
+        # Ordem das linhas nao importa
+        yearly = make_yearly(series).sample(frac=1, random_state=0)
+
+        trends = compute_location_trends(yearly).set_index('location_id')
+
+        assert list(trends.reset_index().columns) == TREND_COLUMNS
+        for location_id, (years, temps) in series.items():
+            (slope, intercept), cov = np.polyfit(years, temps, 1, cov='unscaled')
+            residuals = temps - (intercept + slope * years)
+            ss_res = (residuals ** 2).sum()
+            r_squared = 1 - ss_res / ((temps - temps.mean()) ** 2).sum()
+            stderr = np.sqrt(ss_res / (len(years) - 2) * cov[0, 0])
+
+            row = trends.loc[location_id]
+            assert row['slope'] == pytest.approx(slope, rel=1e-9)
+            assert row['intercept'] == pytest.approx(intercept, rel=1e-9)
+            assert row['r_squared'] == pytest.approx(r_squared, rel=1e-9)
+            assert row['slope_stderr'] == pytest.approx(stderr, rel=1e-6)
+            assert row['warming_rate_per_decade'] == pytest.approx(slope * 10, rel=1e-9)
+            assert row['n_years'] == len(years)
+            assert row['year_start'] == years[0]
+            assert row['data_points'] == 12 * len(years)
+            assert row['max_temperature'] == pytest.approx(temps.max() + 5)
+
+    def test_degenerate_series_follow_api_conventions(self):
+        yearly = make_yearly({
+            1: ([2000], [15.0]),                 # um ano so
+            2: ([2000, 2001, 2002], [9.0] * 3),  # serie constante
+        })
+
+        trends = compute_location_trends(yearly).set_index('location_id')
+
+        assert trends.loc[1, 'slope'] == 0
+        assert trends.loc[1, 'intercept'] == 15.0
+        assert trends.loc[1, 'r_squared'] == 0
+        assert np.isnan(trends.loc[1, 'slope_stderr'])
+        assert trends.loc[2, 'slope'] == 0
+        assert trends.loc[2, 'r_squared'] == 1
+
+    def test_ignores_years_before_start_and_missing_values(self):
+        yearly = make_yearly({1: ([1850, 1950, 1960, 1970], [0.0, 10.0, np.nan, 12.0])})
+
+        trends = compute_location_trends(yearly, start_year=1900)
+
+        assert trends.loc[0, 'n_years'] == 2
+        assert trends.loc[0, 'slope'] == pytest.approx(0.1)
+
+    def test_empty_input(self):
+        trends = compute_location_trends(make_yearly({1: ([1800], [5.0])}))
+        assert trends.empty
+        assert list(trends.columns) == TREND_COLUMNS